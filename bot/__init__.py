@@ -25,6 +25,8 @@ from time import time
 from tzlocal import get_localzone
 from uvloop import install
 
+from bot.helper.ext_utils.task_registry import TaskRegistry
+
 # from faulthandler import enable as faulthandler_enable
 # faulthandler_enable()
 
@@ -51,7 +53,7 @@ LOGGER = getLogger(__name__)
 
 load_dotenv("config.env", override=True)
 
-Intervals = {"status": {}, "qb": "", "stopAll": False}
+Intervals = {"status": {}, "qb": "", "aria2": "", "stopAll": False}
 QbTorrents = {}
 DRIVES_NAMES = []
 DRIVES_IDS = []
@@ -60,10 +62,6 @@ GLOBAL_EXTENSION_FILTER = ["aria2", "!qB"]
 user_data = {}
 aria2_options = {}
 qbit_options = {}
-queued_dl = {}
-queued_up = {}
-non_queued_dl = set()
-non_queued_up = set()
 multi_tags = set()
 
 try:
@@ -76,10 +74,9 @@ except:
 task_dict_lock = Lock()
 queue_dict_lock = Lock()
 qb_listener_lock = Lock()
-cpu_eater_lock = Lock()
 subprocess_lock = Lock()
 status_dict = {}
-task_dict = {}
+task_dict = TaskRegistry()
 rss_dict = {}
 
 BOT_TOKEN = environ.get("BOT_TOKEN", "")
@@ -175,6 +172,9 @@ RCLONE_FLAGS = environ.get("RCLONE_FLAGS", "")
 if len(RCLONE_FLAGS) == 0:
     RCLONE_FLAGS = ""
 
+RCLONE_DAEMON = environ.get("RCLONE_DAEMON", "")
+RCLONE_DAEMON = RCLONE_DAEMON.lower() == "true"
+
 DEFAULT_UPLOAD = environ.get("DEFAULT_UPLOAD", "")
 if DEFAULT_UPLOAD != "rc":
     DEFAULT_UPLOAD = "gd"
@@ -279,6 +279,9 @@ LEECH_DUMP_CHAT = "" if len(LEECH_DUMP_CHAT) == 0 else LEECH_DUMP_CHAT
 STATUS_LIMIT = environ.get("STATUS_LIMIT", "")
 STATUS_LIMIT = 4 if len(STATUS_LIMIT) == 0 else int(STATUS_LIMIT)
 
+MEDIA_THREADS = environ.get("MEDIA_THREADS", "")
+MEDIA_THREADS = "" if len(MEDIA_THREADS) == 0 else int(MEDIA_THREADS)
+
 CMD_SUFFIX = environ.get("CMD_SUFFIX", "")
 
 RSS_CHAT = environ.get("RSS_CHAT", "")
@@ -299,15 +302,32 @@ QUEUE_DOWNLOAD = "" if len(QUEUE_DOWNLOAD) == 0 else int(QUEUE_DOWNLOAD)
 QUEUE_UPLOAD = environ.get("QUEUE_UPLOAD", "")
 QUEUE_UPLOAD = "" if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+QUEUE_ENGINES = environ.get("QUEUE_ENGINES", "")
+
+QUEUE_BANDWIDTH = environ.get("QUEUE_BANDWIDTH", "")
+QUEUE_BANDWIDTH = "" if len(QUEUE_BANDWIDTH) == 0 else float(QUEUE_BANDWIDTH)
+
 STOP_DUPLICATE = environ.get("STOP_DUPLICATE", "")
 STOP_DUPLICATE = STOP_DUPLICATE.lower() == "true"
 
 IS_TEAM_DRIVE = environ.get("IS_TEAM_DRIVE", "")
 IS_TEAM_DRIVE = IS_TEAM_DRIVE.lower() == "true"
 
+GDRIVE_WORKERS = environ.get("GDRIVE_WORKERS", "")
+GDRIVE_WORKERS = 4 if len(GDRIVE_WORKERS) == 0 else int(GDRIVE_WORKERS)
+
+DRIVE_INDEX_TTL = environ.get("DRIVE_INDEX_TTL", "")
+DRIVE_INDEX_TTL = "" if len(DRIVE_INDEX_TTL) == 0 else int(DRIVE_INDEX_TTL)
+
+LIST_CACHE_TTL = environ.get("LIST_CACHE_TTL", "")
+LIST_CACHE_TTL = 120 if len(LIST_CACHE_TTL) == 0 else int(LIST_CACHE_TTL)
+
 USE_SERVICE_ACCOUNTS = environ.get("USE_SERVICE_ACCOUNTS", "")
 USE_SERVICE_ACCOUNTS = USE_SERVICE_ACCOUNTS.lower() == "true"
 
+UPLOAD_CACHE = environ.get("UPLOAD_CACHE", "")
+UPLOAD_CACHE = UPLOAD_CACHE.lower() == "true"
+
 WEB_PINCODE = environ.get("WEB_PINCODE", "")
 WEB_PINCODE = WEB_PINCODE.lower() == "true"
 
@@ -317,6 +337,16 @@ AS_DOCUMENT = AS_DOCUMENT.lower() == "true"
 EQUAL_SPLITS = environ.get("EQUAL_SPLITS", "")
 EQUAL_SPLITS = EQUAL_SPLITS.lower() == "true"
 
+COMPRESS_FORMAT = environ.get("COMPRESS_FORMAT", "").lower()
+if COMPRESS_FORMAT not in ["zstd", "lz4"]:
+    COMPRESS_FORMAT = "7z"
+
+LEECH_PIPELINE = environ.get("LEECH_PIPELINE", "")
+LEECH_PIPELINE = LEECH_PIPELINE.lower() == "true"
+
+LEECH_WORKERS = environ.get("LEECH_WORKERS", "")
+LEECH_WORKERS = 1 if len(LEECH_WORKERS) == 0 else int(LEECH_WORKERS)
+
 BASE_URL_PORT = environ.get("BASE_URL_PORT", "")
 BASE_URL_PORT = 80 if len(BASE_URL_PORT) == 0 else int(BASE_URL_PORT)
 
@@ -385,22 +415,29 @@ config_dict = {
     "BASE_URL_PORT": BASE_URL_PORT,
     "BOT_TOKEN": BOT_TOKEN,
     "CMD_SUFFIX": CMD_SUFFIX,
+    "COMPRESS_FORMAT": COMPRESS_FORMAT,
     "DATABASE_URL": DATABASE_URL,
     "DEFAULT_UPLOAD": DEFAULT_UPLOAD,
     "DELETE_LINKS": DELETE_LINKS,
     "DIRECT_LIMIT": DIRECT_LIMIT,
     "DISABLE_SEED": DISABLE_SEED,
     "DOWNLOAD_DIR": DOWNLOAD_DIR,
+    "DRIVE_INDEX_TTL": DRIVE_INDEX_TTL,
     "EQUAL_SPLITS": EQUAL_SPLITS,
     "EXTENSION_FILTER": EXTENSION_FILTER,
     "FILELION_API": FILELION_API,
     "GDRIVE_ID": GDRIVE_ID,
+    "GDRIVE_WORKERS": GDRIVE_WORKERS,
     "GDRIVE_LIMIT": GDRIVE_LIMIT,
     "INDEX_URL": INDEX_URL,
     "IS_TEAM_DRIVE": IS_TEAM_DRIVE,
     "LEECH_DUMP_CHAT": LEECH_DUMP_CHAT,
     "LEECH_FILENAME_PREFIX": LEECH_FILENAME_PREFIX,
+    "LEECH_PIPELINE": LEECH_PIPELINE,
     "LEECH_SPLIT_SIZE": LEECH_SPLIT_SIZE,
+    "LEECH_WORKERS": LEECH_WORKERS,
+    "LIST_CACHE_TTL": LIST_CACHE_TTL,
+    "MEDIA_THREADS": MEDIA_THREADS,
     "MEGA_EMAIL": MEGA_EMAIL,
     "MEGA_LIMIT": MEGA_LIMIT,
     "MEGA_PASSWORD": MEGA_PASSWORD,
@@ -409,6 +446,9 @@ config_dict = {
     "QUEUE_ALL": QUEUE_ALL,
     "QUEUE_DOWNLOAD": QUEUE_DOWNLOAD,
     "QUEUE_UPLOAD": QUEUE_UPLOAD,
+    "QUEUE_ENGINES": QUEUE_ENGINES,
+    "QUEUE_BANDWIDTH": QUEUE_BANDWIDTH,
+    "RCLONE_DAEMON": RCLONE_DAEMON,
     "RCLONE_FLAGS": RCLONE_FLAGS,
     "RCLONE_PATH": RCLONE_PATH,
     "RCLONE_SERVE_URL": RCLONE_SERVE_URL,
@@ -431,6 +471,7 @@ config_dict = {
     "TG_SESSION_STRING": TG_SESSION_STRING,
     "TORRENT_LIMIT": TORRENT_LIMIT,
     "TORRENT_TIMEOUT": TORRENT_TIMEOUT,
+    "UPLOAD_CACHE": UPLOAD_CACHE,
     "UPSTREAM_REPO": UPSTREAM_REPO,
     "UPSTREAM_BRANCH": UPSTREAM_BRANCH,
     "USE_SERVICE_ACCOUNTS": USE_SERVICE_ACCOUNTS,
@@ -18,13 +18,16 @@ from time import time
 
 from bot import (
     bot,
+    bot_loop,
     botStartTime,
     LOGGER,
     Intervals,
     scheduler,
     config_dict
 )
+from .helper.ext_utils.aria2_sync import a2_sync
 from .helper.ext_utils.bot_utils import cmd_exec, sync_to_async, create_help_buttons
+from .helper.ext_utils.db_handler import DbManager, db_pool
 from .helper.ext_utils.files_utils import clean_all, exit_clean_up
 from .helper.ext_utils.status_utils import get_readable_file_size, get_readable_time
 from .helper.ext_utils.telegraph_helper import telegraph
@@ -101,6 +104,13 @@ async def stats(ctx):
         f"<b>⭕️ Mega: {int(MGA)}GB</b>\n"
         f"<b>🚀 Direct: {int(DIR)}GB</b>\n"
     )
+    if config_dict["DATABASE_URL"]:
+        db = db_pool.stats()
+        stats += (
+            f"\n\n<b>🗄 Database </b>\n\n"
+            f"<b>📥 Queue: {db['queue']} | Updates: {db['queued']} | Writes: {db['ops']}</b>\n"
+            f"<b>⏱ Latency: {db['avg_latency'] * 1000:.1f}ms | Max: {db['max_latency'] * 1000:.1f}ms</b>\n"
+        )
     await sendMessage(ctx.event.message, stats)
 
 
@@ -128,8 +138,12 @@ async def restart(ctx):
     restart_message = await sendMessage(ctx.event.message, "Restarting...")
     if scheduler.running:
         scheduler.shutdown(wait=False)
+    if config_dict["DATABASE_URL"]:
+        await DbManager().flush()
     if qb := Intervals["qb"]:
         qb.cancel()
+    if a2 := Intervals["aria2"]:
+        a2.cancel()
     if st := Intervals["status"]:
         for intvl in list(st.values()):
             intvl.cancel()
@@ -307,6 +321,7 @@ async def main():
         sync_to_async(start_aria2_listener, wait=False),
     )
     create_help_buttons()
+    Intervals["aria2"] = bot_loop.create_task(a2_sync.run())
 
     bot.add_handler(CommandHandler(BotCommands.StartCommand, start))
     bot.add_handler(
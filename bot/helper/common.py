@@ -1,7 +1,16 @@
-from aiofiles.os import path as aiopath, remove, makedirs
-from asyncio import sleep, create_subprocess_exec, gather
+from aiofiles.os import path as aiopath, remove, makedirs, listdir
+from asyncio import sleep, create_subprocess_exec, gather, Semaphore
 from asyncio.subprocess import PIPE
-from os import walk, path as ospath
+from os import (
+    walk,
+    path as ospath,
+    pipe,
+    close,
+    open as osopen,
+    O_WRONLY,
+    O_CREAT,
+    O_TRUNC,
+)
 from secrets import token_urlsafe
 from aioshutil import move, copy2
 from re import sub, I
@@ -16,13 +25,14 @@ from bot import (
     task_dict_lock,
     task_dict,
     GLOBAL_EXTENSION_FILTER,
-    cpu_eater_lock,
     subprocess_lock,
 )
 from bot.helper.ext_utils.bot_utils import new_task, sync_to_async, getSizeBytes
 from bot.helper.ext_utils.bulk_links import extractBulkLinks
 from bot.helper.ext_utils.exceptions import NotSupportedExtractionArchive
 from bot.helper.ext_utils.files_utils import (
+    check_storage_threshold,
+    get_archive_size,
     get_base_name,
     is_first_archive_split,
     is_archive,
@@ -35,6 +45,7 @@ from bot.helper.ext_utils.links_utils import (
     is_rclone_path,
     is_gdrive_link,
 )
+from bot.helper.ext_utils.media_pool import media_pool
 from bot.helper.ext_utils.media_utils import (
     createSampleVideo,
 )
@@ -44,6 +55,7 @@ from bot.helper.ext_utils.media_utils import (
     convert_video,
     convert_audio,
 )
+from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.mirror_leech_utils.gdrive_utils.list import gdriveList
 from bot.helper.mirror_leech_utils.rclone_utils.list import RcloneList
 from bot.helper.mirror_leech_utils.status_utils.extract_status import ExtractStatus
@@ -62,6 +74,9 @@ from bot.helper.switch_helper.message_utils import (
 )
 
 
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+
 class TaskConfig:
     def __init__(self):
         self.mid = self.message.id
@@ -369,67 +384,111 @@ class TaskConfig:
                 "Reply to text file or to telegram message that have links seperated by new line!",
             )
 
+    async def _extract_archive(self, f_path, t_path, pswd):
+        cmd = [
+            "7z",
+            "x",
+            f"-p{pswd}",
+            f_path,
+            f"-o{t_path}",
+            "-aot",
+            "-mmt=on",
+            "-xr!@PaxHeader",
+        ]
+        cmd.extend(f"-xr!*.{ext}" for ext in self.extensionFilter)
+        if not pswd:
+            del cmd[2]
+        if self.isCancelled:
+            return -9, ""
+        res = await media_pool.run(self, cmd, media_pool.encode_threads())
+        if res is None:
+            return -9, ""
+        code, stderr = res
+        try:
+            stderr = stderr.decode().strip()
+        except:
+            stderr = "Unable to decode the error!"
+        return code, stderr
+
+    async def _check_extract_space(self, archives, pswd, status):
+        sizes = await gather(
+            *(
+                get_archive_size(f_path, pswd, self.extensionFilter)
+                for f_path in archives
+            )
+        )
+        if None in sizes:
+            return True
+        status.unpacked = sum(sizes)
+        if not (STORAGE_THRESHOLD := config_dict["STORAGE_THRESHOLD"]):
+            return True
+        limit = STORAGE_THRESHOLD * 1024**3
+        if await sync_to_async(check_storage_threshold, status.unpacked, limit):
+            return True
+        LOGGER.error(
+            f"Not enough free space to extract {get_readable_file_size(status.unpacked)} "
+            f"and leave {get_readable_file_size(limit)} free! Uploading anyway. Path: {archives[0]}"
+        )
+        return False
+
     async def proceedExtract(self, dl_path, gid):
         pswd = self.extract if isinstance(self.extract, str) else ""
         try:
             LOGGER.info(f"Extracting: {self.name}")
+            status = ExtractStatus(self, gid)
             async with task_dict_lock:
-                task_dict[self.mid] = ExtractStatus(self, gid)
+                task_dict[self.mid] = status
             if await aiopath.isdir(dl_path):
                 if self.seed:
                     self.newDir = f"{self.dir}10000"
                     up_path = f"{self.newDir}/{self.name}"
                 else:
                     up_path = dl_path
-                for dirpath, _, files in await sync_to_async(
-                    walk, dl_path, topdown=False
-                ):
+                archives = {}
+                # listed once, the cleanup below goes over the same archives
+                tree = await sync_to_async(
+                    lambda: list(walk(dl_path, topdown=False))
+                )
+                for dirpath, _, files in tree:
                     for file_ in files:
                         if (
                             is_first_archive_split(file_)
                             or is_archive(file_)
                             and not file_.endswith(".rar")
                         ):
-                            f_path = ospath.join(dirpath, file_)
-                            t_path = (
+                            archives[ospath.join(dirpath, file_)] = (
                                 dirpath.replace(self.dir, self.newDir)
                                 if self.seed
                                 else dirpath
                             )
-                            cmd = [
-                                "7z",
-                                "x",
-                                f"-p{pswd}",
-                                f_path,
-                                f"-o{t_path}",
-                                "-aot",
-                                "-xr!@PaxHeader",
-                            ]
-                            if not pswd:
-                                del cmd[2]
-                            if self.isCancelled:
-                                return ""
-                            async with subprocess_lock:
-                                self.suproc = await create_subprocess_exec(
-                                    *cmd, stderr=PIPE
-                                )
-                            _, stderr = await self.suproc.communicate()
-                            if self.isCancelled:
-                                return ""
-                            code = self.suproc.returncode
-                            if code != 0:
-                                try:
-                                    stderr = stderr.decode().strip()
-                                except:
-                                    stderr = "Unable to decode the error!"
-                                LOGGER.error(
-                                    f"{stderr}. Unable to extract archive splits!. Path: {f_path}"
-                                )
-                    if (
-                        not self.seed
-                        and self.suproc is not None
-                        and self.suproc.returncode == 0
-                    ):
+                if not archives:
+                    return up_path
+                if not await self._check_extract_space(list(archives), pswd, status):
+                    self.newDir = ""
+                    return dl_path
+                results = await gather(
+                    *(
+                        self._extract_archive(f_path, t_path, pswd)
+                        for f_path, t_path in archives.items()
+                    )
+                )
+                if self.isCancelled:
+                    return ""
+                extracted = set()
+                failed = set()
+                for f_path, (code, stderr) in zip(archives, results):
+                    dirpath = f_path.rsplit("/", 1)[0]
+                    if code == 0:
+                        extracted.add(dirpath)
+                    else:
+                        failed.add(dirpath)
+                        LOGGER.error(
+                            f"{stderr}. Unable to extract archive splits!. Path: {f_path}"
+                        )
+                if not self.seed:
+                    for dirpath, _, files in tree:
+                        if dirpath not in extracted or dirpath in failed:
+                            continue
                         for file_ in files:
                             if is_archive_split(file_) or is_archive(file_):
                                 del_path = ospath.join(dirpath, file_)
@@ -443,25 +502,12 @@ class TaskConfig:
                 if self.seed:
                     self.newDir = f"{self.dir}10000"
                     up_path = up_path.replace(self.dir, self.newDir)
-                cmd = [
-                    "7z",
-                    "x",
-                    f"-p{pswd}",
-                    dl_path,
-                    f"-o{up_path}",
-                    "-aot",
-                    "-xr!@PaxHeader",
-                ]
-                if not pswd:
-                    del cmd[2]
-                if self.isCancelled:
-                    return ""
-                async with subprocess_lock:
-                    self.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
-                _, stderr = await self.suproc.communicate()
+                if not await self._check_extract_space([dl_path], pswd, status):
+                    self.newDir = ""
+                    return dl_path
+                code, stderr = await self._extract_archive(dl_path, up_path, pswd)
                 if self.isCancelled:
                     return ""
-                code = self.suproc.returncode
                 if code == -9:
                     self.isCancelled = True
                     return ""
@@ -474,10 +520,6 @@ class TaskConfig:
                             self.isCancelled = True
                     return up_path
                 else:
-                    try:
-                        stderr = stderr.decode().strip()
-                    except:
-                        stderr = "Unable to decode the error!"
                     LOGGER.error(
                         f"{stderr}. Unable to extract archive! Uploading anyway. Path: {dl_path}"
                     )
@@ -490,23 +532,120 @@ class TaskConfig:
             self.newDir = ""
             return dl_path
 
+    async def _compress_stream(self, dl_path, up_path, split_size, o_files, status):
+        """
+        tar the path and pipe it through zstd or lz4 straight into split volumes
+        (or a single file when split_size is 0). The tar stream is relayed here
+        to count the bytes read for ZipStatus.
+        """
+        parent, name = dl_path.rsplit("/", 1)
+        tar_cmd = ["tar", "-cf", "-", "-C", parent]
+        tar_cmd.extend(f"--exclude=*.{ext}" for ext in self.extensionFilter)
+        if o_files:
+            tar_cmd.append("--no-wildcards")
+            for f in o_files:
+                if self.newDir and self.newDir in f:
+                    tar_cmd.append(f"--exclude={f.replace(f'{self.newDir}/', '')}")
+                else:
+                    tar_cmd.append(f"--exclude={f.replace(f'{self.dir}/', '')}")
+        tar_cmd.extend(["--", name])
+        if config_dict["COMPRESS_FORMAT"] == "lz4":
+            comp_cmd = ["lz4", "-q", "-c"]
+        else:
+            comp_cmd = ["zstd", "-q", "-T0", "-c"]
+        await makedirs(up_path.rsplit("/", 1)[0], exist_ok=True)
+        procs = []
+        if split_size:
+            read_fd, write_fd = pipe()
+            procs.append(
+                await create_subprocess_exec(
+                    "split",
+                    "--numeric-suffixes=1",
+                    "--suffix-length=3",
+                    f"--bytes={split_size}",
+                    "-",
+                    f"{up_path}.",
+                    stdin=read_fd,
+                    stderr=PIPE,
+                )
+            )
+            close(read_fd)
+        else:
+            write_fd = osopen(up_path, O_WRONLY | O_CREAT | O_TRUNC, 0o644)
+        try:
+            procs.append(
+                await create_subprocess_exec(
+                    *comp_cmd, stdin=PIPE, stdout=write_fd, stderr=PIPE
+                )
+            )
+        finally:
+            close(write_fd)
+        async with subprocess_lock:
+            self.suproc = await create_subprocess_exec(
+                *tar_cmd, stdout=PIPE, stderr=PIPE
+            )
+        procs.append(self.suproc)
+        compressor = procs[-2]
+        try:
+            while chunk := await self.suproc.stdout.read(STREAM_CHUNK_SIZE):
+                compressor.stdin.write(chunk)
+                await compressor.stdin.drain()
+                status.streamed += len(chunk)
+        except Exception as e:
+            LOGGER.error(f"Compress stream: {e}")
+            if self.suproc.returncode is None:
+                self.suproc.kill()
+        finally:
+            compressor.stdin.close()
+        results = await gather(*(proc.communicate() for proc in procs))
+        for proc, (_, stderr) in zip(reversed(procs), reversed(results)):
+            if proc.returncode != 0:
+                return proc.returncode, stderr
+        return 0, b""
+
     async def proceedCompress(self, dl_path, gid, o_files, ft_delete):
         pswd = self.compress if isinstance(self.compress, str) else ""
+        stream = config_dict["COMPRESS_FORMAT"] in ["zstd", "lz4"] and not pswd
+        if stream:
+            ext = "tar.zst" if config_dict["COMPRESS_FORMAT"] == "zstd" else "tar.lz4"
+        else:
+            ext = "7z"
         if self.seed and not self.newDir:
             self.newDir = f"{self.dir}10000"
-            up_path = f"{self.newDir}/{self.name}.7z"
+            up_path = f"{self.newDir}/{self.name}.{ext}"
             delete = False
         else:
-            up_path = f"{dl_path}.7z"
+            up_path = f"{dl_path}.{ext}"
             delete = True
+        status = ZipStatus(self, gid)
         async with task_dict_lock:
-            task_dict[self.mid] = ZipStatus(self, gid)
+            task_dict[self.mid] = status
         size = await get_path_size(dl_path)
         if self.equalSplits:
             parts = -(-size // self.splitSize)
             split_size = (size // parts) + (size % parts)
         else:
             split_size = self.splitSize
+        if stream:
+            if not (self.isLeech and int(size) > self.splitSize):
+                split_size = 0
+            LOGGER.info(
+                f"Zip: orig_path: {dl_path}, zip_path: {up_path}{'.0*' if split_size else ''}"
+            )
+            if self.isCancelled:
+                return ""
+            status.streamed = 0
+            code, stderr = await self._compress_stream(
+                dl_path, up_path, split_size, o_files, status
+            )
+            if code != 0:
+                up_dir, up_name = up_path.rsplit("/", 1)
+                for file_ in await listdir(up_dir):
+                    if file_.startswith(up_name):
+                        await remove(f"{up_dir}/{file_}")
+            return await self._compress_result(
+                code, stderr, dl_path, up_path, delete, ft_delete
+            )
         cmd = [
             "7z",
             f"-v{split_size}b",
@@ -539,9 +678,15 @@ class TaskConfig:
         async with subprocess_lock:
             self.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
         _, stderr = await self.suproc.communicate()
+        return await self._compress_result(
+            self.suproc.returncode, stderr, dl_path, up_path, delete, ft_delete
+        )
+
+    async def _compress_result(
+        self, code, stderr, dl_path, up_path, delete, ft_delete
+    ):
         if self.isCancelled:
             return ""
-        code = self.suproc.returncode
         if code == -9:
             self.isCancelled = True
             return ""
@@ -575,7 +720,11 @@ class TaskConfig:
                 if f_path in o_files:
                     continue
                 f_size = await aiopath.getsize(f_path)
-                if f_size > self.splitSize:
+                if (
+                    f_size > self.splitSize
+                    and not self.asDoc
+                    and (await get_document_type(f_path))[0]
+                ):
                     if not checked:
                         checked = True
                         async with task_dict_lock:
@@ -606,7 +755,7 @@ class TaskConfig:
                         m_size.append(f_size)
                         o_files.append(f_path)
 
-    async def generateSampleVideo(self, dl_path, gid, unwanted_files, ft_delete):
+    def sampleOptions(self):
         data = self.sampleVideo.split(":") if isinstance(self.sampleVideo, str) else ""
         if data:
             sample_duration = int(data[0]) if data[0] else 60
@@ -614,20 +763,21 @@ class TaskConfig:
         else:
             sample_duration = 60
             part_duration = 4
+        return sample_duration, part_duration
 
+    async def generateSampleVideo(self, dl_path, gid, unwanted_files, ft_delete):
+        sample_duration, part_duration = self.sampleOptions()
+
+        status = SampleVideoStatus(self, gid)
         async with task_dict_lock:
-            task_dict[self.mid] = SampleVideoStatus(self, gid)
+            task_dict[self.mid] = status
 
-        checked = False
         if await aiopath.isfile(dl_path):
             if (await get_document_type(dl_path))[0]:
-                checked = True
-                await cpu_eater_lock.acquire()
                 LOGGER.info(f"Creating Sample video: {self.name}")
                 res = await createSampleVideo(
                     self, dl_path, sample_duration, part_duration
                 )
-                cpu_eater_lock.release()
                 if res:
                     newfolder = ospath.splitext(dl_path)[0]
                     name = dl_path.rsplit("/", 1)[1]
@@ -649,30 +799,42 @@ class TaskConfig:
                         )
                     return newfolder
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    if f_path in unwanted_files:
-                        continue
+            checked = False
+            limit = Semaphore(media_pool.budget())
+
+            async def proceedSample(f_path):
+                nonlocal checked
+                async with limit:
+                    if self.isCancelled:
+                        return
+                    f_size = await aiopath.getsize(f_path)
                     if (await get_document_type(f_path))[0]:
                         if not checked:
                             checked = True
-                            await cpu_eater_lock.acquire()
                             LOGGER.info(f"Creating Sample videos: {self.name}")
-                        if self.isCancelled:
-                            cpu_eater_lock.release()
-                            return ""
                         res = await createSampleVideo(
                             self, f_path, sample_duration, part_duration
                         )
                         if res:
                             ft_delete.append(res)
-            if checked:
-                cpu_eater_lock.release()
+                    status.add_processed(f_size)
+
+            await gather(
+                *(
+                    proceedSample(ospath.join(dirpath, file_))
+                    for dirpath, _, files in await sync_to_async(
+                        walk, dl_path, topdown=False
+                    )
+                    for file_ in files
+                    if ospath.join(dirpath, file_) not in unwanted_files
+                )
+            )
+            if self.isCancelled:
+                return ""
 
         return dl_path
 
-    async def convertMedia(self, dl_path, gid, o_files, m_size, ft_delete):
+    def convertOptions(self):
         fvext = []
         if self.convertVideo:
             vdata = self.convertVideo.split()
@@ -708,64 +870,64 @@ class TaskConfig:
         else:
             aext = ""
             astatus = ""
+        return vext, vstatus, fvext, aext, astatus, faext
 
-        checked = False
+    async def convertType(self, m_path, options):
+        vext, vstatus, fvext, aext, astatus, faext = options
+        is_video, is_audio, _ = await get_document_type(m_path)
+        if (
+            is_video
+            and vext
+            and not m_path.endswith(f".{vext}")
+            and (
+                vstatus == "+"
+                and m_path.endswith(tuple(fvext))
+                or vstatus == "-"
+                and not m_path.endswith(tuple(fvext))
+                or not vstatus
+            )
+        ):
+            return "video"
+        elif (
+            is_audio
+            and aext
+            and not is_video
+            and not m_path.endswith(f".{aext}")
+            and (
+                astatus == "+"
+                and m_path.endswith(tuple(faext))
+                or astatus == "-"
+                and not m_path.endswith(tuple(faext))
+                or not astatus
+            )
+        ):
+            return "audio"
+        return ""
+
+    async def convertMedia(self, dl_path, gid, o_files, m_size, ft_delete):
+        options = self.convertOptions()
+        vext, aext = options[0], options[3]
+        status = None
 
         async def proceedConvert(m_path):
-            nonlocal checked
-            is_video, is_audio, _ = await get_document_type(m_path)
-            if (
-                is_video
-                and vext
-                and not m_path.endswith(f".{vext}")
-                and (
-                    vstatus == "+"
-                    and m_path.endswith(tuple(fvext))
-                    or vstatus == "-"
-                    and not m_path.endswith(tuple(fvext))
-                    or not vstatus
-                )
-            ):
-                if not checked:
-                    checked = True
-                    async with task_dict_lock:
-                        task_dict[self.mid] = MediaConvertStatus(self, gid)
-                    await cpu_eater_lock.acquire()
-                    LOGGER.info(f"Converting: {self.name}")
-                else:
-                    LOGGER.info(f"Converting: {m_path}")
+            nonlocal status
+            if not (ctype := await self.convertType(m_path, options)):
+                return ""
+            if status is None:
+                status = MediaConvertStatus(self, gid)
+                async with task_dict_lock:
+                    task_dict[self.mid] = status
+                LOGGER.info(f"Converting: {self.name}")
+            else:
+                LOGGER.info(f"Converting: {m_path}")
+            if ctype == "video":
                 res = await convert_video(self, m_path, vext)
-                return "" if self.isCancelled else res
-            elif (
-                is_audio
-                and aext
-                and not is_video
-                and not m_path.endswith(f".{aext}")
-                and (
-                    astatus == "+"
-                    and m_path.endswith(tuple(faext))
-                    or astatus == "-"
-                    and not m_path.endswith(tuple(faext))
-                    or not astatus
-                )
-            ):
-                if not checked:
-                    checked = True
-                    async with task_dict_lock:
-                        task_dict[self.mid] = MediaConvertStatus(self, gid)
-                    await cpu_eater_lock.acquire()
-                    LOGGER.info(f"Converting: {self.name}")
-                else:
-                    LOGGER.info(f"Converting: {m_path}")
-                res = await convert_audio(self, m_path, aext)
-                return "" if self.isCancelled else res
             else:
-                return ""
+                res = await convert_audio(self, m_path, aext)
+            return "" if self.isCancelled else res
 
         if await aiopath.isfile(dl_path):
             output_file = await proceedConvert(dl_path)
-            if checked:
-                cpu_eater_lock.release()
             if output_file:
                 if self.seed:
                     self.newDir = f"{self.dir}10000"
@@ -780,17 +942,19 @@ class TaskConfig:
                         pass
                     return output_file
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
-                for file_ in files:
+            limit = Semaphore(media_pool.budget())
+
+            async def proceedFile(f_path):
+                async with limit:
                     if self.isCancelled:
-                        cpu_eater_lock.release()
-                        return ""
-                    f_path = ospath.join(dirpath, file_)
+                        return
+                    fsize = await aiopath.getsize(f_path)
                     res = await proceedConvert(f_path)
+                    if status is not None:
+                        status.add_processed(fsize)
                     if res:
                         if self.seed and not self.newDir:
                             o_files.append(f_path)
-                            fsize = await aiopath.getsize(f_path)
                             m_size.append(fsize)
                             ft_delete.append(res)
                         else:
@@ -798,8 +962,18 @@ class TaskConfig:
                                 await remove(f_path)
                             except:
                                 pass
-            if checked:
-                cpu_eater_lock.release()
+
+            await gather(
+                *(
+                    proceedFile(ospath.join(dirpath, file_))
+                    for dirpath, _, files in await sync_to_async(
+                        walk, dl_path, topdown=False
+                    )
+                    for file_ in files
+                )
+            )
+            if self.isCancelled:
+                return ""
         return dl_path
 
     async def substitute(self, dl_path):
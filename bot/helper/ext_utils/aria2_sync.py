@@ -0,0 +1,75 @@
+from aria2p import Download
+from asyncio import sleep
+
+from bot import aria2, LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "uploadLength",
+    "downloadSpeed",
+    "uploadSpeed",
+    "connections",
+    "numSeeders",
+    "seeder",
+    "followedBy",
+    "following",
+    "belongsTo",
+    "errorCode",
+    "errorMessage",
+    "dir",
+    "files",
+    "bittorrent",
+    "infoHash",
+]
+
+
+class Aria2Sync:
+    """
+    Gid indexed snapshot of all aria2 downloads. One system.multicall of
+    tellActive/tellWaiting/tellStopped per tick keeps it fresh, and the aria2
+    notifications push single downloads in between ticks, so status objects
+    and direct downloads can read from memory instead of calling the rpc.
+    """
+
+    def __init__(self):
+        self.downloads = {}
+        self._active = False
+
+    def sync(self):
+        calls = [
+            (aria2.client.TELL_ACTIVE, [KEYS]),
+            (aria2.client.TELL_WAITING, [0, 1000, KEYS]),
+            (aria2.client.TELL_STOPPED, [0, 1000, KEYS]),
+        ]
+        downloads = {}
+        for res in aria2.client.multicall2(calls):
+            if isinstance(res, dict):
+                LOGGER.error(f"{res.get('faultString')}: Aria2c, while syncing downloads")
+                continue
+            for struct in res[0]:
+                downloads[struct["gid"]] = Download(aria2, struct)
+        self._active = any(
+            d.status in ["active", "waiting"] for d in downloads.values()
+        )
+        self.downloads = downloads
+
+    def put(self, download):
+        self.downloads[download.gid] = download
+
+    def get(self, gid):
+        return self.downloads.get(gid)
+
+    async def run(self):
+        while True:
+            try:
+                await sync_to_async(self.sync)
+            except Exception as e:
+                LOGGER.error(f"{e}: Aria2c, while syncing downloads")
+            await sleep(1 if self._active else 3)
+
+
+a2_sync = Aria2Sync()
@@ -1,9 +1,14 @@
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath, makedirs
+from asyncio import Lock, sleep
+from atexit import register
+from copy import deepcopy
 from dotenv import dotenv_values
+from functools import partial
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
 from pymongo.errors import PyMongoError
+from time import time, sleep as time_sleep
 
 from bot import (
     DATABASE_URL,
@@ -17,33 +22,270 @@ from bot import (
     bot_loop,
 )
 
+WRITE_DELAY = 2
+MAX_RETRY_DELAY = 5 * 60
+SYNC_RETRIES = 3
+# user files are saved with update_user_doc, not with the user settings
+USER_FILES = ("thumb", "rclone_config", "token_pickle")
+
+
+def _collection(db, name):
+    if name == "users":
+        return db.users
+    if name == "rss":
+        return db.rss[bot_id]
+    return db.settings[name]
+
+
+def _user_doc(user_id):
+    data = user_data.get(user_id, {})
+    return {k: v for k, v in data.items() if k not in USER_FILES}
+
+
+def _rss_doc(user_id):
+    return rss_dict.get(user_id)
+
+
+def _with_files(doc, old):
+    """
+    A replacement user document that keeps the saved files of old.
+    """
+    files = {k: old[k] for k in USER_FILES if old and k in old and k not in doc}
+    return {**files, **doc}
+
+
+class DbPool:
+    """
+    One Motor client for the whole bot and a write-behind queue in front of it.
+    Updates of the same document within WRITE_DELAY seconds are merged into one
+    write. User and rss documents are written as a $set/$unset diff against the
+    last saved copy, and settings as the merged $set of their keys. Deletes go
+    straight through and drop the pending writes of their documents. Failed
+    writes go back into the queue and are retried with a growing delay. The
+    queue is flushed on restart and at exit.
+    """
 
-class DbManager:
     def __init__(self):
-        self._err = False
-        self._db = None
-        self._conn = None
-        self._connect()
+        self.err = False
+        self.conn = None
+        self.db = None
+        self._pending = {}
+        self._saved = {}
+        self._lock = Lock()
+        self._flush_task = None
+        self._failures = 0
+        self.ops = 0
+        self.op_time = 0
+        self.max_latency = 0
+        self.queued = 0
 
-    def _connect(self):
+    def connect(self):
+        if self.conn is not None or self.err:
+            return
         try:
-            self._conn = AsyncIOMotorClient(DATABASE_URL, server_api=ServerApi("1"))
-            self._db = self._conn.mlsb
+            self.conn = AsyncIOMotorClient(DATABASE_URL, server_api=ServerApi("1"))
+            self.db = self.conn.mlsb
         except PyMongoError as e:
             LOGGER.error(f"Error in DB connection: {e}")
-            self._err = True
+            self.err = True
+
+    async def run(self, op):
+        start = time()
+        try:
+            return await op
+        finally:
+            latency = time() - start
+            self.ops += 1
+            self.op_time += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def stats(self):
+        return {
+            "queue": len(self._pending),
+            "queued": self.queued,
+            "ops": self.ops,
+            "avg_latency": self.op_time / self.ops if self.ops else 0,
+            "max_latency": self.max_latency,
+        }
+
+    def saved(self, name, doc_id, doc):
+        self._saved[(name, doc_id)] = deepcopy(doc)
+
+    def queue(self, name, doc_id, source=None, set_=None):
+        """
+        Write document doc_id of collection name later, with the current
+        content of source(doc_id) or the fields of set_.
+        """
+        self.queued += 1
+        pending = self._pending.setdefault((name, doc_id), [None, {}])
+        if source is not None:
+            pending[0] = source
+        if set_:
+            pending[1].update(set_)
+        self._schedule(WRITE_DELAY)
+
+    def _schedule(self, delay):
+        if self._flush_task is None:
+            self._flush_task = bot_loop.create_task(self._delayed_flush(delay))
+
+    def _requeue(self, name, doc_id, source, set_, prev):
+        """
+        Put a failed write back before the writes queued since.
+        """
+        if prev is None:
+            self._saved.pop((name, doc_id), None)
+        else:
+            self._saved[(name, doc_id)] = prev
+        pending = self._pending.setdefault((name, doc_id), [None, {}])
+        if pending[0] is None:
+            pending[0] = source
+        if set_:
+            pending[1] = {**set_, **pending[1]}
+
+    async def delete(self, name, op, doc_id=None):
+        """
+        Run op() to delete document doc_id, or the whole collection, after
+        dropping its pending writes.
+        """
+        async with self._lock:
+            for key in list(self._pending):
+                if key[0] == name and (doc_id is None or key[1] == doc_id):
+                    del self._pending[key]
+            for key in list(self._saved):
+                if key[0] == name and (doc_id is None or key[1] == doc_id):
+                    del self._saved[key]
+            await self.run(op())
+
+    def _update(self, name, doc_id, source, set_):
+        """
+        The update for a pending write and the document to save after it, or
+        None if nothing changed.
+        """
+        doc = None
+        update = {}
+        if source is not None and (doc := source(doc_id)) is not None:
+            doc = deepcopy(doc)
+            if (old := self._saved.get((name, doc_id))) is None:
+                changed = dict(doc)
+                removed = {}
+            else:
+                changed = {
+                    k: v for k, v in doc.items() if k not in old or old[k] != v
+                }
+                removed = {k: "" for k in old if k not in doc}
+            if any("." in k or k.startswith("$") for k in [*changed, *removed]):
+                # field names that can't be update paths, like rss titles
+                return ("replace", {**doc, **(set_ or {})}), doc
+            if changed:
+                update["$set"] = changed
+            if removed:
+                update["$unset"] = removed
+        if set_:
+            update.setdefault("$set", {}).update(set_)
+        if not update:
+            return None, doc
+        return ("update", update), doc
+
+    def _take(self):
+        """
+        The pending writes, with what's needed to requeue them if they fail.
+        """
+        pending, self._pending = self._pending, {}
+        for (name, doc_id), (source, set_) in pending.items():
+            prev = self._saved.get((name, doc_id))
+            op, doc = self._update(name, doc_id, source, set_)
+            if doc is not None:
+                self._saved[(name, doc_id)] = doc
+            if op is not None:
+                yield name, doc_id, op, (source, set_, prev)
+
+    async def _delayed_flush(self, delay):
+        await sleep(delay)
+        self._flush_task = None
+        await self.flush()
+
+    async def _write(self, coll, name, doc_id, kind, value):
+        if kind == "update":
+            await self.run(coll.update_one({"_id": doc_id}, value, upsert=True))
+            return
+        if name == "users":
+            old = await self.run(
+                coll.find_one({"_id": doc_id}, {k: 1 for k in USER_FILES})
+            )
+            value = _with_files(value, old)
+        await self.run(coll.replace_one({"_id": doc_id}, value, upsert=True))
+
+    async def flush(self):
+        if self.err or self.db is None:
+            return
+        failed = False
+        async with self._lock:
+            for name, doc_id, (kind, value), retry in list(self._take()):
+                try:
+                    await self._write(
+                        _collection(self.db, name), name, doc_id, kind, value
+                    )
+                except Exception as e:
+                    failed = True
+                    self._requeue(name, doc_id, *retry)
+                    LOGGER.error(f"DataBase write of {name} {doc_id}: {e}")
+        if not failed:
+            self._failures = 0
+            return
+        self._failures += 1
+        delay = min(WRITE_DELAY * 2**self._failures, MAX_RETRY_DELAY)
+        LOGGER.warning(f"Retrying failed DataBase writes in {delay}s")
+        self._schedule(delay)
+
+    def flush_sync(self):
+        if self.err or self.conn is None or not self._pending:
+            return
+        db = self.conn.delegate.mlsb
+        for name, doc_id, (kind, value), _ in list(self._take()):
+            coll = _collection(db, name)
+            for tries in range(SYNC_RETRIES):
+                try:
+                    if kind == "update":
+                        coll.update_one({"_id": doc_id}, value, upsert=True)
+                    else:
+                        if name == "users":
+                            value = _with_files(
+                                value,
+                                coll.find_one(
+                                    {"_id": doc_id}, {k: 1 for k in USER_FILES}
+                                ),
+                            )
+                        coll.replace_one({"_id": doc_id}, value, upsert=True)
+                    break
+                except Exception as e:
+                    if tries == SYNC_RETRIES - 1:
+                        LOGGER.error(f"DataBase write of {name} {doc_id}: {e}")
+                    else:
+                        time_sleep(2**tries)
+
+
+db_pool = DbPool()
+register(db_pool.flush_sync)
+
+
+class DbManager:
+    def __init__(self):
+        db_pool.connect()
+        self._err = db_pool.err
+        self._db = db_pool.db
 
     async def db_load(self):
         if self._err:
             return
         # Save bot settings
         try:
-            await self._db.settings.config.replace_one(
-                {"_id": bot_id}, config_dict, upsert=True
+            await db_pool.run(
+                self._db.settings.config.replace_one(
+                    {"_id": bot_id}, config_dict, upsert=True
+                )
             )
         except Exception as e:
             LOGGER.error(f"DataBase Collection Error: {e}")
-            self._conn.close
             return
         # Save Aria2c options
         if await self._db.settings.aria2c.find_one({"_id": bot_id}) is None:
@@ -60,6 +302,9 @@ class DbManager:
             async for row in rows:
                 uid = row["_id"]
                 del row["_id"]
+                db_pool.saved(
+                    "users", uid, {k: v for k, v in row.items() if k not in USER_FILES}
+                )
                 thumb_path = f"Thumbnails/{uid}.jpg"
                 rclone_config_path = f"rclone/{uid}.conf"
                 token_path = f"tokens/{uid}.pickle"
@@ -90,50 +335,39 @@ class DbManager:
             async for row in rows:
                 user_id = row["_id"]
                 del row["_id"]
+                db_pool.saved("rss", user_id, row)
                 rss_dict[user_id] = row
             LOGGER.info("Rss data has been imported from Database.")
-        self._conn.close
 
     async def update_deploy_config(self):
         if self._err:
             return
         current_config = dict(dotenv_values("config.env"))
-        await self._db.settings.deployConfig.replace_one(
-            {"_id": bot_id}, current_config, upsert=True
+        await db_pool.run(
+            self._db.settings.deployConfig.replace_one(
+                {"_id": bot_id}, current_config, upsert=True
+            )
         )
-        self._conn.close
 
     async def update_config(self, dict_):
         if self._err:
             return
-        await self._db.settings.config.update_one(
-            {"_id": bot_id}, {"$set": dict_}, upsert=True
-        )
-        self._conn.close
+        db_pool.queue("config", bot_id, set_=dict_)
 
     async def update_aria2(self, key, value):
         if self._err:
             return
-        await self._db.settings.aria2c.update_one(
-            {"_id": bot_id}, {"$set": {key: value}}, upsert=True
-        )
-        self._conn.close
+        db_pool.queue("aria2c", bot_id, set_={key: value})
 
     async def update_qbittorrent(self, key, value):
         if self._err:
             return
-        await self._db.settings.qbittorrent.update_one(
-            {"_id": bot_id}, {"$set": {key: value}}, upsert=True
-        )
-        self._conn.close
+        db_pool.queue("qbittorrent", bot_id, set_={key: value})
 
     async def save_qbit_settings(self):
         if self._err:
             return
-        await self._db.settings.qbittorrent.update_one(
-            {"_id": bot_id}, {"$set": qbit_options}, upsert=True
-        )
-        self._conn.close
+        db_pool.queue("qbittorrent", bot_id, set_=qbit_options)
 
     async def update_private_file(self, path):
         if self._err:
@@ -144,26 +378,18 @@ class DbManager:
         else:
             pf_bin = ""
         path = path.replace(".", "__")
-        await self._db.settings.files.update_one(
-            {"_id": bot_id}, {"$set": {path: pf_bin}}, upsert=True
+        await db_pool.run(
+            self._db.settings.files.update_one(
+                {"_id": bot_id}, {"$set": {path: pf_bin}}, upsert=True
+            )
         )
         if path == "config.env":
             await self.update_deploy_config()
-        else:
-            self._conn.close
 
     async def update_user_data(self, user_id):
         if self._err:
             return
-        data = user_data.get(user_id, {})
-        if data.get("thumb"):
-            del data["thumb"]
-        if data.get("rclone_config"):
-            del data["rclone_config"]
-        if data.get("token_pickle"):
-            del data["token_pickle"]
-        await self._db.users.replace_one({"_id": user_id}, data, upsert=True)
-        self._conn.close
+        db_pool.queue("users", user_id, source=_user_doc)
 
     async def update_user_doc(self, user_id, key, path=""):
         if self._err:
@@ -173,40 +399,36 @@ class DbManager:
                 doc_bin = await doc.read()
         else:
             doc_bin = ""
-        await self._db.users.update_one(
-            {"_id": user_id}, {"$set": {key: doc_bin}}, upsert=True
-        )
-        self._conn.close
+        db_pool.queue("users", user_id, set_={key: doc_bin})
 
     async def rss_update_all(self):
         if self._err:
             return
         for user_id in list(rss_dict.keys()):
-            await self._db.rss[bot_id].replace_one(
-                {"_id": user_id}, rss_dict[user_id], upsert=True
-            )
-        self._conn.close
+            db_pool.queue("rss", user_id, source=_rss_doc)
 
     async def rss_update(self, user_id):
         if self._err:
             return
-        await self._db.rss[bot_id].replace_one(
-            {"_id": user_id}, rss_dict[user_id], upsert=True
-        )
-        self._conn.close
+        db_pool.queue("rss", user_id, source=_rss_doc)
 
     async def rss_delete(self, user_id):
         if self._err:
             return
-        await self._db.rss[bot_id].delete_one({"_id": user_id})
-        self._conn.close
+        await db_pool.delete(
+            "rss", partial(self._db.rss[bot_id].delete_one, {"_id": user_id}), user_id
+        )
 
     async def trunc_table(self, name):
         if self._err:
             return
-        await self._db[name][bot_id].drop()
-        self._conn.close
+        await db_pool.delete(name, self._db[name][bot_id].drop)
+
+    async def flush(self):
+        if self._err:
+            return
+        await db_pool.flush()
 
 
 if DATABASE_URL:
-    bot_loop.run_until_complete(DbManager().db_load())
\ No newline at end of file
+    bot_loop.run_until_complete(DbManager().db_load())
@@ -0,0 +1,196 @@
+from asyncio import Lock
+from base64 import b32decode
+from re import search as re_search
+from secrets import token_urlsafe
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from bot import bot_loop, task_dict, task_dict_lock, LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.files_utils import link_tree
+from bot.helper.ext_utils.links_utils import (
+    is_url,
+    is_magnet,
+    is_gdrive_link,
+    is_gdrive_id,
+    is_mega_link,
+    is_rclone_path,
+)
+from bot.helper.ext_utils.task_manager import limit_checker, stop_duplicate_check
+from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.status_utils.coalesce_status import CoalesceStatus
+from bot.helper.switch_helper.message_utils import sendStatusMessage
+
+
+def _magnet_key(link):
+    if not (match := re_search(r"xt=urn:(btih|btmh):([a-zA-Z0-9]+)", link)):
+        return None
+    kind, value = match.groups()
+    if kind == "btih" and len(value) == 32:
+        value = b32decode(value.upper()).hex()
+    return f"{kind}:{value.lower()}"
+
+
+def _url_key(link):
+    parts = urlsplit(link.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, "")
+    )
+
+
+class DownloadCoalescer:
+    """
+    Lets tasks of the same torrent, URL or Drive file share one download. The
+    first task of a key leads and downloads as usual, later ones follow it with
+    a CoalesceStatus. When the leader's download completes, its files are
+    hardlinked into the dir of every follower, which then goes on with its own
+    extract, convert and upload options. If the leader fails or is cancelled
+    before that, the oldest follower takes over and starts its own download.
+    """
+
+    def __init__(self):
+        self._leaders = {}
+        self._followers = {}
+        self._keys = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key_of(listener):
+        link = listener.link
+        if (
+            not isinstance(link, str)
+            or not link
+            or listener.sameDir
+            or listener.select
+            or listener.seed
+        ):
+            return None
+        if is_magnet(link):
+            return _magnet_key(link)
+        if is_gdrive_link(link) or is_gdrive_id(link):
+            try:
+                file_id = GoogleDriveHelper().getIdFromUrl(link, listener.userId)
+            except:
+                return None
+            if link.startswith("mtp:"):
+                return f"gd:{listener.userId}:{file_id}"
+            return f"gd:{file_id}"
+        if is_rclone_path(link):
+            if link.startswith("mrcc:"):
+                return f"rclone:{listener.userId}:{link}"
+            return f"rclone:{link}"
+        if is_url(link):
+            return _url_key(link)
+        return None
+
+    def leader(self, listener):
+        if (key := self._keys.get(listener.mid)) is None:
+            return None
+        return self._leaders.get(key)
+
+    async def run(self, listener, key, start):
+        """
+        Start the download with start() or, if another task is already
+        downloading key, follow that task.
+        """
+        if key is None:
+            await start()
+            return
+        async with self._lock:
+            leader = self._leaders.get(key)
+            if leader is None:
+                self._leaders[key] = listener
+            else:
+                self._followers.setdefault(key, []).append((listener, start))
+            self._keys[listener.mid] = key
+        if leader is None:
+            await self._lead(listener, start)
+            return
+        LOGGER.info(f"Following download of task {leader.mid}: {key}")
+        async with task_dict_lock:
+            task_dict[listener.mid] = CoalesceStatus(listener, self, token_urlsafe(12))
+        await listener.onDownloadStart()
+        if listener.multi <= 1:
+            await sendStatusMessage(listener.message)
+
+    async def _lead(self, listener, start):
+        await start()
+        async with task_dict_lock:
+            task = task_dict.get(listener.mid)
+            if isinstance(task, CoalesceStatus):
+                del task_dict[listener.mid]
+                task = None
+        if task is None:
+            # stopped before adding a status, like for limits
+            await self.fail(listener)
+
+    async def complete(self, listener, path):
+        """
+        Share the finished download of a leader at path with its followers.
+        """
+        async with self._lock:
+            key = self._keys.get(listener.mid)
+            if key is None or self._leaders.get(key) is not listener:
+                return
+            del self._keys[listener.mid]
+            del self._leaders[key]
+            followers = self._followers.pop(key, [])
+            for follower, _ in followers:
+                self._keys.pop(follower.mid, None)
+        for follower, _ in followers:
+            if follower.isCancelled:
+                continue
+            follower.name = follower.name or listener.name
+            follower.size = listener.size
+            msg, button = await stop_duplicate_check(follower)
+            if msg:
+                await follower.onDownloadError(msg, button)
+                continue
+            if limit_exceeded := await limit_checker(
+                follower,
+                isTorrent=key.startswith(("btih:", "btmh:")),
+                isMega=is_mega_link(follower.link),
+                isDriveLink=key.startswith("gd:"),
+                isRclone=key.startswith("rclone:"),
+            ):
+                await follower.onDownloadError(limit_exceeded)
+                continue
+            try:
+                await sync_to_async(
+                    link_tree, path, f"{follower.dir}/{follower.name}"
+                )
+            except Exception as e:
+                LOGGER.error(f"Sharing download failed: {e}. Path: {path}")
+                await follower.onDownloadError(f"Sharing download failed: {e}")
+                continue
+            follower.seed = False
+            bot_loop.create_task(follower.onDownloadComplete())
+
+    async def fail(self, listener):
+        """
+        Detach a failed task. A failed leader hands over to its oldest follower.
+        """
+        async with self._lock:
+            if (key := self._keys.pop(listener.mid, None)) is None:
+                return
+            followers = [
+                f
+                for f in self._followers.pop(key, [])
+                if f[0] is not listener and not f[0].isCancelled
+            ]
+            if self._leaders.get(key) is not listener:
+                if followers:
+                    self._followers[key] = followers
+                return
+            del self._leaders[key]
+            if not followers:
+                return
+            (new_leader, start), *followers = followers
+            self._leaders[key] = new_leader
+            if followers:
+                self._followers[key] = followers
+        LOGGER.info(f"Task {new_leader.mid} takes over download: {key}")
+        bot_loop.create_task(self._lead(new_leader, start))
+
+
+download_coalescer = DownloadCoalescer()
@@ -20,3 +20,9 @@ class TgLinkException(Exception):
     """No Access granted for this chat"""
 
     pass
+
+
+class RcloneRcError(Exception):
+    """The rclone rcd daemon returned an error for the call"""
+
+    pass
@@ -1,9 +1,9 @@
 from aiofiles.os import remove, path as aiopath, listdir, rmdir
 from aioshutil import rmtree as aiormtree
 from magic import Magic
-from os import walk, path as ospath, makedirs
+from os import walk, path as ospath, makedirs, copy_file_range, fstat, pread, write, link
 from re import split as re_split, I, search as re_search, escape
-from shutil import rmtree
+from shutil import rmtree, copytree, copy2, ignore_patterns
 from subprocess import run as srun
 from sys import exit as sexit
 from shutil import disk_usage
@@ -169,6 +169,36 @@ def get_base_name(orig_path):
         raise NotSupportedExtractionArchive("File format not supported for extraction")
 
 
+async def get_archive_size(path, pswd="", excluded=()):
+    """
+    Unpacked size of the archive entries from `7z l -slt`, leaving out the
+    entries ending with one of the excluded extensions. None if the archive
+    can't be listed.
+    """
+    try:
+        stdout, stderr, code = await cmd_exec(["7z", "l", "-slt", f"-p{pswd}", path])
+    except Exception as e:
+        LOGGER.error(f"List Archive: {e}. Path: {path}")
+        return None
+    if code != 0:
+        LOGGER.error(f"List Archive: {stderr}. Path: {path}")
+        return None
+    size = 0
+    for block in stdout.split("----------", 1)[-1].split("\n\n"):
+        entry = dict(
+            line.split(" = ", 1) for line in block.splitlines() if " = " in line
+        )
+        if entry.get("Folder") == "+" or "Size" not in entry:
+            continue
+        if entry.get("Path", "").lower().endswith(tuple(excluded)):
+            continue
+        try:
+            size += int(entry["Size"])
+        except ValueError:
+            continue
+    return size
+
+
 def get_mime_type(file_path):
     mime = Magic(mime=True)
     mime_type = mime.from_file(file_path)
@@ -176,6 +206,64 @@ def get_mime_type(file_path):
     return mime_type
 
 
+def _copy_fd(fin, fout, offset, length):
+    """
+    Copy length bytes from offset of fin to the position of fout. copy_file_range
+    keeps the data in the kernel and reflinks on filesystems that support it,
+    plain reads and writes are used where it isn't available.
+    """
+    try:
+        while length > 0:
+            if (copied := copy_file_range(fin, fout, length, offset)) == 0:
+                break
+            offset += copied
+            length -= copied
+    except OSError:
+        while length > 0:
+            if not (chunk := pread(fin, min(length, 1024 * 1024), offset)):
+                break
+            write(fout, chunk)
+            offset += len(chunk)
+            length -= len(chunk)
+
+
+def copy_range(src, dest, offset, length):
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        _copy_fd(fsrc.fileno(), fdst.fileno(), offset, length)
+
+
+def concat_files(parts, dest):
+    with open(dest, "wb") as fdst:
+        for part in parts:
+            with open(part, "rb") as fsrc:
+                _copy_fd(fsrc.fileno(), fdst.fileno(), 0, fstat(fsrc.fileno()).st_size)
+
+
+def _link_file(src, dest):
+    try:
+        link(src, dest)
+    except OSError:
+        copy2(src, dest)
+
+
+def link_tree(src, dest):
+    """
+    Hardlink a file or a folder tree into dest, copying the files that can't be
+    linked (another filesystem), so dest stays intact when src gets removed.
+    """
+    if ospath.isdir(src):
+        copytree(
+            src,
+            dest,
+            copy_function=_link_file,
+            ignore=ignore_patterns("*.aria2", "*.!qB"),
+            dirs_exist_ok=True,
+        )
+    else:
+        makedirs(ospath.dirname(dest), exist_ok=True)
+        _link_file(src, dest)
+
+
 async def join_files(path):
     files = await listdir(path)
     results = []
@@ -187,10 +275,15 @@ async def join_files(path):
             exists = True
             final_name = file_.rsplit(".", 1)[0]
             fpath = f"{path}/{final_name}"
-            cmd = f'cat "{fpath}."* > "{fpath}"'
-            _, stderr, code = await cmd_exec(cmd, True)
-            if code != 0:
-                LOGGER.error(f"Failed to join {final_name}, stderr: {stderr}")
+            parts = sorted(
+                f"{path}/{part}"
+                for part in files
+                if re_search(rf"^{escape(final_name)}\.\d+$", part)
+            )
+            try:
+                await sync_to_async(concat_files, parts, fpath)
+            except Exception as e:
+                LOGGER.error(f"Failed to join {final_name}, error: {e}")
                 if await aiopath.isfile(fpath):
                     await remove(fpath)
             else:
@@ -247,6 +247,7 @@ Title3 link -c cmd -d ratio:time -z password
 -inf For included words filter.
 -exf For excluded words filter.
 -stv true or false (sensitive filter)
+-int Check interval of this feed in seconds. Default is RSS_DELAY.
 
 Example: Title https://www.rss-url.com -inf 1080 or 720 or 144p|mkv or mp4|hevc -exf flv or web|xxx
 This filter will parse links that it's titles contains `(1080 or 720 or 144p) and (mkv or mp4) and hevc` and doesn't conyain (flv or web) and xxx` words. You can add whatever you want.
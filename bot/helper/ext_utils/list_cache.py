@@ -0,0 +1,85 @@
+from asyncio import create_task, shield, Semaphore
+from collections import OrderedDict
+from time import time
+
+from bot import config_dict, LOGGER
+
+LIST_CACHE_SIZE = 512
+PREFETCH_LIMIT = 4
+
+
+class ListCache:
+    """
+    Listings of remote folders shared by the rclone and Drive browsers. Keys
+    are (scope, owner, location, item type), where owner is the rclone config
+    or the Drive token the listing was made with and location the remote path
+    or folder id. Entries live LIST_CACHE_TTL seconds, or until an upload of
+    the bot into that location invalidates them. Concurrent requests for the
+    same key share one listing, and the child folders of the shown page are
+    listed ahead in the background.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._tasks = {}
+        self._prefetch = Semaphore(PREFETCH_LIMIT)
+
+    @staticmethod
+    def _ttl():
+        return config_dict.get("LIST_CACHE_TTL") or 0
+
+    def _fresh(self, key):
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if time() - entry[0] >= self._ttl():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value):
+        self._entries[key] = (time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > LIST_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    async def get(self, key, fetch):
+        """
+        Cached listing of key, otherwise the result of fetch(). Errors raised
+        by fetch aren't cached.
+        """
+        if not self._ttl():
+            return await fetch()
+        if entry := self._fresh(key):
+            return entry[1]
+        if (task := self._tasks.get(key)) is None:
+            task = self._tasks[key] = create_task(fetch())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        value = await shield(task)
+        self._store(key, value)
+        return value
+
+    async def _prefetch_key(self, key, fetch):
+        async with self._prefetch:
+            if self._fresh(key) or key in self._tasks:
+                return
+            try:
+                await self.get(key, fetch)
+            except Exception as e:
+                LOGGER.debug(f"List prefetch failed for {key}: {e}")
+
+    def prefetch(self, key, fetch):
+        if self._ttl() and key not in self._tasks and not self._fresh(key):
+            create_task(self._prefetch_key(key, fetch))
+
+    def invalidate(self, scope, location, owner=None, prefix=False):
+        for key in list(self._entries):
+            if (
+                key[0] == scope
+                and (owner is None or key[1] == owner)
+                and (key[2].startswith(location) if prefix else key[2] == location)
+            ):
+                del self._entries[key]
+
+
+list_cache = ListCache()
@@ -0,0 +1,92 @@
+from asyncio import create_subprocess_exec
+from asyncio.subprocess import PIPE
+from itertools import count
+from os import cpu_count
+
+from bot import bot_loop, config_dict
+
+
+class MediaJobPool:
+    """
+    Runs ffmpeg and 7z extraction jobs of all tasks concurrently within a thread
+    budget of MEDIA_THREADS (all cores by default). Every job asks for the
+    threads it will use, stream copies take one and encodes and extractions take
+    encode_threads(). Waiting jobs of the task with the fewest running jobs go
+    first, in arrival order.
+    """
+
+    def __init__(self):
+        self._used = 0
+        self._running = {}
+        self._waiting = []
+        self._procs = {}
+        self._seq = count()
+
+    @staticmethod
+    def budget():
+        return config_dict.get("MEDIA_THREADS") or cpu_count() or 1
+
+    def encode_threads(self):
+        budget = self.budget()
+        return min(budget, max(2, budget // 4))
+
+    def _dispatch(self):
+        self._waiting = [w for w in self._waiting if not w[3].done()]
+        while self._waiting:
+            self._waiting.sort(key=lambda w: (self._running.get(w[1], 0), w[0]))
+            _, mid, threads, future = self._waiting[0]
+            if self._used and self._used + threads > self.budget():
+                break
+            self._waiting.pop(0)
+            self._used += threads
+            self._running[mid] = self._running.get(mid, 0) + 1
+            future.set_result(None)
+
+    def _release(self, mid, threads):
+        self._used -= threads
+        if self._running.get(mid, 0) <= 1:
+            self._running.pop(mid, None)
+        else:
+            self._running[mid] -= 1
+        self._dispatch()
+
+    async def run(self, listener, cmd, threads=1):
+        """
+        Wait for a slot and run cmd, returning (returncode, stderr), or None if
+        the task got cancelled while waiting.
+        """
+        mid = listener.mid
+        threads = min(max(threads, 1), self.budget())
+        future = bot_loop.create_future()
+        self._waiting.append((next(self._seq), mid, threads, future))
+        self._dispatch()
+        try:
+            await future
+        except:
+            if future.done() and not future.cancelled():
+                self._release(mid, threads)
+            else:
+                future.cancel()
+            raise
+        try:
+            if listener.isCancelled:
+                return None
+            listener.suproc = proc = await create_subprocess_exec(*cmd, stderr=PIPE)
+            self._procs.setdefault(mid, set()).add(proc)
+            try:
+                _, stderr = await proc.communicate()
+            finally:
+                self._procs[mid].discard(proc)
+                if not self._procs[mid]:
+                    del self._procs[mid]
+            return proc.returncode, stderr
+        finally:
+            self._release(mid, threads)
+
+    def kill(self, listener):
+        for proc in list(self._procs.get(listener.mid, ())):
+            if proc.returncode is None:
+                proc.kill()
+
+
+media_pool = MediaJobPool()
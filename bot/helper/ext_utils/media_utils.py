@@ -1,8 +1,12 @@
 from PIL import Image
-from aiofiles.os import remove, path as aiopath, makedirs
-from asyncio import create_subprocess_exec, wait_for
+from aiofiles import open as aiopen
+from aiofiles.os import remove, path as aiopath, makedirs, stat
+from aioshutil import rmtree
+from asyncio import create_subprocess_exec, create_task, shield, wait_for
 from asyncio.subprocess import PIPE
-from os import path as ospath, cpu_count
+from collections import OrderedDict
+from json import loads
+from os import path as ospath
 from re import search as re_search
 from time import time
 
@@ -10,11 +14,18 @@ from bot import LOGGER, subprocess_lock, MAX_SPLIT_SIZE
 from bot.helper.ext_utils.bot_utils import cmd_exec
 from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.files_utils import ARCH_EXT, get_mime_type
+from bot.helper.ext_utils.media_pool import media_pool
+
+PROBE_CACHE_SIZE = 1024
+
+_probe_cache = OrderedDict()
+_probe_tasks = {}
 
 
 async def convert_video(listener, video_file, ext, retry=False):
     base_name = ospath.splitext(video_file)[0]
     output = f"{base_name}.{ext}"
+    threads = media_pool.encode_threads() if retry else 1
     if retry:
         cmd = [
             "ffmpeg",
@@ -25,7 +36,7 @@ async def convert_video(listener, video_file, ext, retry=False):
             "-c:a",
             "aac",
             "-threads",
-            f"{cpu_count() // 2}",
+            f"{threads}",
             output,
         ]
         if ext == "mp4":
@@ -38,11 +49,11 @@ async def convert_video(listener, video_file, ext, retry=False):
         cmd = ["ffmpeg", "-i", video_file, "-map", "0", "-c", "copy", output]
     if listener.isCancelled:
         return False
-    listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
-    _, stderr = await listener.suproc.communicate()
+    if (res := await media_pool.run(listener, cmd, threads)) is None:
+        return False
+    code, stderr = res
     if listener.isCancelled:
         return False
-    code = listener.suproc.returncode
     if code == 0:
         return output
     elif code == -9:
@@ -67,21 +78,22 @@ async def convert_video(listener, video_file, ext, retry=False):
 async def convert_audio(listener, audio_file, ext):
     base_name = ospath.splitext(audio_file)[0]
     output = f"{base_name}.{ext}"
+    threads = media_pool.encode_threads()
     cmd = [
         "ffmpeg",
         "-i",
         audio_file,
         "-threads",
-        f"{cpu_count() // 2}",
+        f"{threads}",
         output,
     ]
     if listener.isCancelled:
         return False
-    listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
-    _, stderr = await listener.suproc.communicate()
+    if (res := await media_pool.run(listener, cmd, threads)) is None:
+        return False
+    code, stderr = res
     if listener.isCancelled:
         return False
-    code = listener.suproc.returncode
     if code == 0:
         return output
     elif code == -9:
@@ -112,7 +124,7 @@ async def createThumb(msg, _id=""):
     return des_dir
 
 
-async def is_multi_streams(path):
+async def _ffprobe(path):
     try:
         result = await cmd_exec(
             [
@@ -123,56 +135,75 @@ async def is_multi_streams(path):
                 "-print_format",
                 "json",
                 "-show_streams",
+                "-show_format",
                 path,
             ]
         )
     except Exception as e:
-        LOGGER.error(f"Get Video Streams: {e}. Mostly File not found! - File: {path}")
-        return False
+        LOGGER.error(f"Probe Media: {e}. Mostly File not found! - File: {path}")
+        return None
     if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("streams")
-        if fields is None:
-            LOGGER.error(f"get_video_streams: {result}")
-            return False
-        videos = 0
-        audios = 0
-        for stream in fields:
-            if stream.get("codec_type") == "video":
-                videos += 1
-            elif stream.get("codec_type") == "audio":
-                audios += 1
-        return videos > 1 or audios > 1
-    return False
+        try:
+            return loads(result[0])
+        except ValueError:
+            pass
+    LOGGER.error(f"Probe Media: {result} - File: {path}")
+    return None
 
 
-async def get_media_info(path):
+async def probe_media(path):
+    """
+    ffprobe streams and format of path as a dict, or None if it can't be probed.
+    Results are cached by path and revalidated against size and mtime, and
+    concurrent calls for the same file share one ffprobe process.
+    """
     try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_format",
-                path,
-            ]
-        )
+        st = await stat(path)
     except Exception as e:
-        LOGGER.error(f"Get Media Info: {e}. Mostly File not found! - File: {path}")
+        LOGGER.error(f"Probe Media: {e}. Mostly File not found! - File: {path}")
+        return None
+    key = (st.st_size, st.st_mtime_ns)
+    if (cached := _probe_cache.get(path)) and cached[0] == key:
+        _probe_cache.move_to_end(path)
+        return cached[1]
+    if (task := _probe_tasks.get((path, key))) is None:
+        task = _probe_tasks[(path, key)] = create_task(_ffprobe(path))
+        task.add_done_callback(lambda _: _probe_tasks.pop((path, key), None))
+    data = await shield(task)
+    _probe_cache[path] = (key, data)
+    _probe_cache.move_to_end(path)
+    while len(_probe_cache) > PROBE_CACHE_SIZE:
+        _probe_cache.popitem(last=False)
+    return data
+
+
+async def is_multi_streams(path):
+    if (data := await probe_media(path)) is None:
+        return False
+    if (fields := data.get("streams")) is None:
+        LOGGER.error(f"get_video_streams: {data}")
+        return False
+    videos = 0
+    audios = 0
+    for stream in fields:
+        if stream.get("codec_type") == "video":
+            videos += 1
+        elif stream.get("codec_type") == "audio":
+            audios += 1
+    return videos > 1 or audios > 1
+
+
+async def get_media_info(path):
+    if (data := await probe_media(path)) is None:
         return 0, None, None
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("format")
-        if fields is None:
-            LOGGER.error(f"get_media_info: {result}")
-            return 0, None, None
-        duration = round(float(fields.get("duration", 0)))
-        tags = fields.get("tags", {})
-        artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
-        title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
-        return duration, artist, title
-    return 0, None, None
+    if (fields := data.get("format")) is None:
+        LOGGER.error(f"get_media_info: {data}")
+        return 0, None, None
+    duration = round(float(fields.get("duration", 0)))
+    tags = fields.get("tags", {})
+    artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
+    title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
+    return duration, artist, title
 
 
 async def get_document_type(path):
@@ -188,37 +219,16 @@ async def get_document_type(path):
         return False, True, False
     if not mime_type.startswith("video") and not mime_type.endswith("octet-stream"):
         return is_video, is_audio, is_image
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_streams",
-                path,
-            ]
-        )
-        if result[1] and mime_type.startswith("video"):
-            is_video = True
-    except Exception as e:
-        LOGGER.error(f"Get Document Type: {e}. Mostly File not found! - File: {path}")
-        if mime_type.startswith("video"):
+    if (data := await probe_media(path)) is None:
+        return mime_type.startswith("video"), is_audio, is_image
+    if (fields := data.get("streams")) is None:
+        LOGGER.error(f"get_document_type: {data}")
+        return mime_type.startswith("video"), is_audio, is_image
+    for stream in fields:
+        if stream.get("codec_type") == "video":
             is_video = True
-        return is_video, is_audio, is_image
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("streams")
-        if fields is None:
-            LOGGER.error(f"get_document_type: {result}")
-            return is_video, is_audio, is_image
-        is_video = False
-        for stream in fields:
-            if stream.get("codec_type") == "video":
-                is_video = True
-            elif stream.get("codec_type") == "audio":
-                is_audio = True
+        elif stream.get("codec_type") == "audio":
+            is_audio = True
     return is_video, is_audio, is_image
 
 
@@ -286,6 +296,170 @@ async def create_thumbnail(video_file, duration):
     return des_dir
 
 
+async def get_keyframes(path):
+    try:
+        stdout, stderr, code = await cmd_exec(
+            [
+                "ffprobe",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,pos,flags",
+                "-print_format",
+                "csv=p=0",
+                path,
+            ]
+        )
+    except Exception as e:
+        LOGGER.error(f"Get Keyframes: {e}. Mostly File not found! - File: {path}")
+        return []
+    if code != 0:
+        LOGGER.error(f"Get Keyframes: {stderr}. File: {path}")
+        return []
+    keyframes = []
+    for line in stdout.splitlines():
+        try:
+            pts_time, pos, flags = line.split(",")[:3]
+            if "K" in flags:
+                keyframes.append((float(pts_time), int(pos)))
+        except ValueError:
+            continue
+    return sorted(keyframes)
+
+
+async def get_start_time(path):
+    try:
+        stdout, _, code = await cmd_exec(
+            [
+                "ffprobe",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-show_entries",
+                "format=start_time",
+                "-print_format",
+                "csv=p=0",
+                path,
+            ]
+        )
+        return float(stdout.strip()) if code == 0 else 0
+    except:
+        return 0
+
+
+def plan_split(keyframes, size, split_size, equal_parts=0):
+    """
+    Pick the keyframe times to cut at, so every part stays under split_size
+    bytes, or, with equal_parts, so the parts end as close as possible to
+    size / equal_parts multiples. Packet offsets are used as the byte position.
+    """
+    times = []
+    start = 0
+    last = None
+    for pts_time, pos in keyframes:
+        if equal_parts:
+            limit = size * (len(times) + 1) / equal_parts
+        else:
+            limit = start + split_size
+        if pos > limit and last is not None and last[1] > start:
+            times.append(last[0])
+            start = last[1]
+        last = (pts_time, pos)
+    return times
+
+
+async def split_video_segments(
+    path, size, dirpath, file_, split_size, listener, equal_parts, multi_streams
+):
+    """
+    Split a video in one ffmpeg pass with the segment muxer, cutting at
+    keyframes planned from the packet index. Returns None when the file can't
+    be split this way, so split_file falls back to splitting part by part.
+    """
+    if not (keyframes := await get_keyframes(path)):
+        return None
+    if not (times := plan_split(keyframes, size, split_size, equal_parts)):
+        return None
+    # ffmpeg shifts the output timestamps to start at 0
+    start = await get_start_time(path)
+    times = [t - start for t in times]
+    base_name, extension = ospath.splitext(file_)
+    pattern = "%03d".join(
+        part.replace("%", "%%") for part in (f"{dirpath}/{base_name}.part", extension)
+    )
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0",
+        "-map_chapters",
+        "-1",
+        "-strict",
+        "-2",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_times",
+        ",".join(f"{max(t - 0.001, 0):.3f}" for t in times),
+        "-segment_start_number",
+        "1",
+        "-reset_timestamps",
+        "1",
+        pattern,
+    ]
+    if not multi_streams:
+        del cmd[6]
+        del cmd[6]
+    if listener.isCancelled:
+        return False
+    async with subprocess_lock:
+        listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
+    _, stderr = await listener.suproc.communicate()
+    outputs = [
+        out_path
+        for out_path in (pattern % i for i in range(1, len(times) + 2))
+        if await aiopath.exists(out_path)
+    ]
+    if listener.isCancelled:
+        return False
+    code = listener.suproc.returncode
+    if code == -9:
+        listener.isCancelled = True
+        return False
+    if code == 0:
+        # split_size is the part size less the 5 MB margin of split_file
+        limit = min(split_size + 5000000, MAX_SPLIT_SIZE)
+        for out_path in outputs:
+            if await aiopath.getsize(out_path) > limit:
+                LOGGER.warning(
+                    f"Part bigger than {limit} after segment split, splitting part by part. Path: {path}"
+                )
+                break
+        else:
+            return True
+    else:
+        try:
+            stderr = stderr.decode().strip()
+        except:
+            stderr = "Unable to decode the error!"
+        LOGGER.warning(f"{stderr}. Segment split failed. Path: {path}")
+    for out_path in outputs:
+        await remove(out_path)
+    if code != 0 and multi_streams:
+        return await split_video_segments(
+            path, size, dirpath, file_, split_size, listener, equal_parts, False
+        )
+    return None
+
+
 async def split_file(
     path,
     size,
@@ -307,6 +481,19 @@ async def split_file(
     if not listener.asDoc and (await get_document_type(path))[0]:
         if multi_streams:
             multi_streams = await is_multi_streams(path)
+        if not inLoop:
+            res = await split_video_segments(
+                path,
+                size,
+                dirpath,
+                file_,
+                split_size - 5000000,
+                listener,
+                parts if listener.equalSplits else 0,
+                multi_streams,
+            )
+            if res is not None:
+                return res
         duration = (await get_media_info(path))[0]
         base_name, extension = ospath.splitext(file_)
         split_size -= 5000000
@@ -442,6 +629,98 @@ async def split_file(
     return True
 
 
+async def copy_sample_video(
+    listener, video_file, segments, output_file, sample_duration
+):
+    """
+    Cut every segment with stream copy, seeking to the keyframe before its
+    start, and join them with the concat demuxer. Returns the sample path, or
+    False when the cuts can't be joined without re-encoding.
+    """
+    parts_dir = f"{output_file}.parts"
+    extension = ospath.splitext(video_file)[1]
+    await makedirs(parts_dir, exist_ok=True)
+    try:
+        parts = []
+        for i, (start, end) in enumerate(segments):
+            part = f"{parts_dir}/{i:03}{extension}"
+            cmd = [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-ss",
+                f"{start}",
+                "-i",
+                video_file,
+                "-t",
+                f"{end - start}",
+                "-map",
+                "0:v:0",
+                "-map",
+                "0:a:0?",
+                "-c",
+                "copy",
+                "-avoid_negative_ts",
+                "make_zero",
+                part,
+            ]
+            if (res := await media_pool.run(listener, cmd)) is None:
+                return False
+            code, stderr = res
+            if code == -9:
+                listener.isCancelled = True
+                return False
+            if code != 0:
+                try:
+                    stderr = stderr.decode().strip()
+                except:
+                    stderr = "Unable to decode the error!"
+                LOGGER.warning(
+                    f"{stderr}. Stream copy sample failed, re-encoding. Path: {video_file}"
+                )
+                return False
+            parts.append(part)
+        list_file = f"{parts_dir}/list.txt"
+        async with aiopen(list_file, "w") as f:
+            for part in parts:
+                await f.write("file '{}'\n".format(part.replace("'", "'\\''")))
+        cmd = [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            list_file,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            output_file,
+        ]
+        if (res := await media_pool.run(listener, cmd)) is None:
+            return False
+        code = res[0]
+        if code == -9:
+            listener.isCancelled = True
+            return False
+        duration = (await get_media_info(output_file))[0] if code == 0 else 0
+        if not 0 < duration <= sample_duration * 2:
+            LOGGER.warning(
+                f"Stream copy sample can't be joined, re-encoding. Path: {video_file}"
+            )
+            if await aiopath.exists(output_file):
+                await remove(output_file)
+            return False
+        return output_file
+    finally:
+        await rmtree(parts_dir, ignore_errors=True)
+
+
 async def createSampleVideo(listener, video_file, sample_duration, part_duration):
     filter_complex = ""
     dir, name = video_file.rsplit("/", 1)
@@ -457,6 +736,13 @@ async def createSampleVideo(listener, video_file, sample_duration, part_duration
         next_segment += time_interval
     segments.append((duration - part_duration, duration))
 
+    if res := await copy_sample_video(
+        listener, video_file, segments, output_file, sample_duration
+    ):
+        return res
+    if listener.isCancelled:
+        return False
+
     for i, (start, end) in enumerate(segments):
         filter_complex += (
             f"[0:v]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{i}]; "
@@ -470,6 +756,8 @@ async def createSampleVideo(listener, video_file, sample_duration, part_duration
 
     filter_complex += f"concat=n={len(segments)}:v=1:a=1[vout][aout]"
 
+    threads = media_pool.encode_threads()
+
     cmd = [
         "ffmpeg",
         "-i",
@@ -485,17 +773,17 @@ async def createSampleVideo(listener, video_file, sample_duration, part_duration
         "-c:a",
         "aac",
         "-threads",
-        f"{cpu_count() // 2}",
+        f"{threads}",
         output_file,
     ]
 
     if listener.isCancelled:
         return False
-    listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
-    _, stderr = await listener.suproc.communicate()
+    if (res := await media_pool.run(listener, cmd, threads)) is None:
+        return False
+    code, stderr = res
     if listener.isCancelled:
         return False
-    code = listener.suproc.returncode
     if code == -9:
         listener.isCancelled = True
         return False
@@ -0,0 +1,76 @@
+from qbittorrentapi import TorrentDictionary
+from threading import Lock
+
+from bot import qbittorrent_client
+
+
+class QbitSync:
+    """
+    In-memory mirror of qBittorrent torrents fed by the sync/maindata rid based
+    delta API. Only changed fields are transferred on each sync, so the listener
+    and the status objects can read torrent info without extra http requests.
+    """
+
+    def __init__(self):
+        self._rid = 0
+        self._lock = Lock()
+        self._tags = {}
+        self.torrents = {}
+
+    def reset(self):
+        with self._lock:
+            self._rid = 0
+            self._tags.clear()
+            self.torrents.clear()
+
+    def _add_tag(self, hash_, tags):
+        for tag in tags.split(","):
+            if tag := tag.strip():
+                self._tags[tag] = hash_
+
+    def _remove_tag(self, hash_):
+        for tag in [t for t, h in self._tags.items() if h == hash_]:
+            del self._tags[tag]
+
+    def sync(self):
+        with self._lock:
+            try:
+                data = qbittorrent_client.sync_maindata(rid=self._rid)
+            except Exception:
+                self._rid = 0
+                raise
+            if data.get("full_update"):
+                self._tags.clear()
+                self.torrents.clear()
+            for hash_, changes in (data.get("torrents") or {}).items():
+                if tor := self.torrents.get(hash_):
+                    tor.update(changes)
+                    if "tags" in changes:
+                        self._remove_tag(hash_)
+                        self._add_tag(hash_, tor.tags)
+                else:
+                    tor = TorrentDictionary(
+                        data={**changes, "hash": hash_}, client=qbittorrent_client
+                    )
+                    self.torrents[hash_] = tor
+                    self._add_tag(hash_, tor.get("tags", ""))
+            for hash_ in data.get("torrents_removed") or []:
+                self.torrents.pop(hash_, None)
+                self._remove_tag(hash_)
+            self._rid = data.get("rid", self._rid)
+
+    def remove(self, hash_):
+        with self._lock:
+            self.torrents.pop(hash_, None)
+            self._remove_tag(hash_)
+
+    def get_by_hash(self, hash_):
+        return self.torrents.get(hash_)
+
+    def get_by_tag(self, tag):
+        if hash_ := self._tags.get(tag):
+            return self.torrents.get(hash_)
+        return None
+
+
+qb_sync = QbitSync()
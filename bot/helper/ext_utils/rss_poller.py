@@ -0,0 +1,209 @@
+from asyncio import create_task, Semaphore, sleep
+from feedparser import parse as feedparse
+from hashlib import blake2b
+from httpx import AsyncClient, Limits, Timeout
+from re import compile as re_compile, escape, IGNORECASE
+from time import time
+
+from bot import config_dict
+
+FEED_CONCURRENCY = 16
+FEED_RETRIES = 3
+RETRY_DELAY = 2
+MAX_BACKOFF = 6 * 60 * 60
+POLL_TICK = 30
+SEEN_LIMIT = 500
+
+
+def entry_link(entry):
+    try:
+        return entry["links"][1]["href"]
+    except IndexError:
+        return entry["link"]
+
+
+def entry_hashes(entries):
+    return [
+        blake2b(
+            (e.get("id") or e.get("link") or e.get("title", "")).encode(),
+            digest_size=8,
+        ).hexdigest()
+        for e in entries
+    ]
+
+
+def seen_history(hashes, seen):
+    """
+    Seen ids of a feed after a poll: all ids of the current entries, then the
+    latest older ones up to SEEN_LIMIT.
+    """
+    current = list(dict.fromkeys(hashes))
+    current_set = set(current)
+    history = current + [h for h in seen if h not in current_set]
+    return history[: max(SEEN_LIMIT, len(current))]
+
+
+class RssFilter:
+    """
+    The -inf and -exf filters of a feed compiled to regexes: every -inf group
+    ("a or b") is one alternation that must match, and all -exf words are one
+    alternation that must not. Feeds with -stv true match case-insensitively.
+    """
+
+    def __init__(self, inf, exf, sensitive):
+        self.source = (inf, exf, sensitive)
+        flags = IGNORECASE if sensitive else 0
+        self._inf = [re_compile("|".join(map(escape, words)), flags) for words in inf]
+        exf_words = [word for words in exf for word in words]
+        self._exf = (
+            re_compile("|".join(map(escape, exf_words)), flags) if exf_words else None
+        )
+
+    def match(self, title):
+        if not all(pattern.search(title) for pattern in self._inf):
+            return False
+        return self._exf is None or not self._exf.search(title)
+
+
+class _FeedState:
+    def __init__(self):
+        self.etag = None
+        self.modified = None
+        self.next_run = 0
+        self.failures = 0
+
+
+class RssPoller:
+    """
+    Fetches rss feeds through one pooled http client. Feeds of the monitor are
+    fetched with If-None-Match/If-Modified-Since from their last response, so
+    unchanged feeds cost a 304 and no parsing. Every feed is polled on its own
+    interval, or RSS_DELAY, and backs off exponentially while it fails. Every
+    poll runs as its own task, so a slow feed doesn't hold up the others.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._states = {}
+        self._filters = {}
+        self._polls = {}
+        self._slots = Semaphore(FEED_CONCURRENCY)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = AsyncClient(
+                verify=False,
+                follow_redirects=True,
+                timeout=Timeout(30, connect=10),
+                limits=Limits(
+                    max_connections=FEED_CONCURRENCY,
+                    max_keepalive_connections=FEED_CONCURRENCY,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def interval(data):
+        return data.get("interval") or config_dict["RSS_DELAY"]
+
+    def due(self, key):
+        if key in self._polls:
+            return False
+        return (state := self._states.get(key)) is None or state.next_run <= time()
+
+    def poll(self, key, check, *args):
+        """
+        Run check(*args) for the feed of key as its own task.
+        """
+        task = self._polls[key] = create_task(check(*args))
+        task.add_done_callback(lambda _: self._polls.pop(key, None))
+
+    def prune(self, keys):
+        keys = set(keys)
+        for key in set(self._states) - keys:
+            del self._states[key]
+        for key in set(self._filters) - keys:
+            del self._filters[key]
+
+    def forget(self, key):
+        self._states.pop(key, None)
+        self._filters.pop(key, None)
+
+    def matcher(self, key, data):
+        source = (data["inf"], data["exf"], data.get("sensitive", False))
+        rss_filter = self._filters.get(key)
+        if rss_filter is None or rss_filter.source != source:
+            rss_filter = self._filters[key] = RssFilter(*source)
+        return rss_filter
+
+    @staticmethod
+    def new_entries(data, entries):
+        """
+        Entries of a feed that weren't seen before, in feed order, and the seen
+        history to save with the feed.
+        """
+        hashes = entry_hashes(entries)
+        if (seen := data.get("seen")) is None:
+            # subscribed before the seen history, stop at the last sent item
+            new = []
+            for entry in entries:
+                if (
+                    data["last_feed"] == entry_link(entry)
+                    or data["last_title"] == entry["title"]
+                ):
+                    break
+                new.append(entry)
+            seen = []
+        else:
+            seen_set = set(seen)
+            new = [e for e, h in zip(entries, hashes) if h not in seen_set]
+        return new, seen_history(hashes, seen)
+
+    async def fetch(self, link, key=None):
+        """
+        Parsed feed of link. With the key of a monitored feed the request is
+        conditional and None is returned if the feed didn't change.
+        """
+        state = self._states.setdefault(key, _FeedState()) if key else None
+        headers = {}
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.modified:
+                headers["If-Modified-Since"] = state.modified
+        async with self._slots:
+            for tries in range(FEED_RETRIES + 1):
+                try:
+                    res = await self._get_client().get(link, headers=headers)
+                    break
+                except:
+                    if tries == FEED_RETRIES:
+                        raise
+                    await sleep(RETRY_DELAY * 2**tries)
+        if state is not None and res.status_code == 304:
+            return None
+        res.raise_for_status()
+        if state is not None:
+            state.etag = res.headers.get("ETag")
+            state.modified = res.headers.get("Last-Modified")
+        return feedparse(res.text)
+
+    def done(self, key, interval):
+        state = self._states.setdefault(key, _FeedState())
+        state.failures = 0
+        state.next_run = time() + interval
+
+    def failed(self, key, interval):
+        """
+        Back off a failing feed. Returns the delay until its next poll.
+        """
+        state = self._states.setdefault(key, _FeedState())
+        state.failures += 1
+        # a failed poll may have saved validators of a feed that wasn't handled
+        state.etag = state.modified = None
+        delay = min(interval * 2 ** (state.failures - 1), max(interval, MAX_BACKOFF))
+        state.next_run = time() + delay
+        return delay
+
+
+rss_poller = RssPoller()
@@ -1,7 +1,7 @@
 from html import escape
 from psutil import virtual_memory, cpu_percent, disk_usage
 from time import time
-from asyncio import iscoroutinefunction
+from asyncio import iscoroutinefunction, Lock
 from bot import (
     DOWNLOAD_DIR,
     task_dict,
@@ -18,6 +18,11 @@ from bot.helper.switch_helper.bot_commands import BotCommands
 
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
 
+SNAPSHOT_INTERVAL = 3
+
+_snapshot = {"time": 0, "tasks": [], "stats": ""}
+_snapshot_lock = Lock()
+
 
 class MirrorStatus:
     STATUS_UPLOADING = "Upload"
@@ -55,46 +60,43 @@ STATUSES = {
 
 async def getTaskByGid(gid: str):
     async with task_dict_lock:
-        for tk in task_dict.values():
-            if hasattr(tk, "seeding"):
-                await sync_to_async(tk.update)
-            if tk.gid() == gid:
-                return tk
-        return None
+        return task_dict.get_by_gid(gid)
+
+
+def _match_status(st, status):
+    return st == status or (
+        status == MirrorStatus.STATUS_DOWNLOADING and st not in STATUSES.values()
+    )
 
 
 def getSpecificTasks(status, userId):
     if status == "All":
         if userId:
-            return [tk for tk in task_dict.values() if tk.listener.userId == userId]
+            return task_dict.get_by_user(userId)
         else:
             return list(task_dict.values())
-    elif userId:
-        return [
-            tk
-            for tk in task_dict.values()
-            if tk.listener.userId == userId
-            and (
-                (st := tk.status())
-                and st == status
-                or status == MirrorStatus.STATUS_DOWNLOADING
-                and st not in STATUSES.values()
-            )
-        ]
-    else:
-        return [
-            tk
-            for tk in task_dict.values()
-            if (st := tk.status())
-            and st == status
-            or status == MirrorStatus.STATUS_DOWNLOADING
-            and st not in STATUSES.values()
-        ]
+    statuses = [status]
+    if status == MirrorStatus.STATUS_DOWNLOADING:
+        statuses.extend(
+            st for st in task_dict.statuses() if st not in STATUSES.values()
+        )
+    return task_dict.get_by_status(statuses, userId)
 
 
 async def getAllTasks(req_status: str, userId):
     async with task_dict_lock:
-        return await sync_to_async(getSpecificTasks, req_status, userId)
+        tasks = getSpecificTasks(req_status, userId)
+    if req_status == "All":
+        return tasks
+    statuses = await sync_to_async(_get_statuses, tasks)
+    matches = []
+    for tk, st in zip(tasks, statuses):
+        if st is None:
+            continue
+        task_dict.set_status(tk, st)
+        if _match_status(st, req_status):
+            matches.append(tk)
+    return matches
 
 
 def get_readable_file_size(size_in_bytes: int):
@@ -146,11 +148,98 @@ def get_progress_bar_string(pct):
     return f"{p_str}"
 
 
-async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=1):
+def _get_statuses(tasks):
+    statuses = []
+    for task in tasks:
+        try:
+            statuses.append(task.status())
+        except:
+            statuses.append(None)
+    return statuses
+
+
+async def _task_snapshot(task, tstatus):
+    data = {
+        "status": tstatus,
+        "name": task.name(),
+        "gid": task.gid(),
+        "userId": task.listener.userId,
+        "size": task.size(),
+    }
+    if tstatus not in [
+        MirrorStatus.STATUS_SPLITTING,
+        MirrorStatus.STATUS_SEEDING,
+        MirrorStatus.STATUS_QUEUEUP,
+    ]:
+        data["progress"] = (
+            await task.progress()
+            if iscoroutinefunction(task.progress)
+            else task.progress()
+        )
+        data["processed"] = task.processed_bytes()
+        data["speed"] = task.speed()
+        data["engine"] = task.engine
+        data["eta"] = task.eta()
+        data["username"] = task.message.user.username
+        if hasattr(task, "seeders_num"):
+            try:
+                data["peers"] = (task.seeders_num(), task.leechers_num())
+            except:
+                pass
+    elif tstatus == MirrorStatus.STATUS_SEEDING:
+        data["seed_speed"] = task.seed_speed()
+        data["uploaded"] = task.uploaded_bytes()
+        data["ratio"] = task.ratio()
+        data["seeding_time"] = task.seeding_time()
+    return data
+
+
+async def get_status_snapshot(force=False):
+    if not force and time() - _snapshot["time"] < SNAPSHOT_INTERVAL:
+        return _snapshot
+    async with _snapshot_lock:
+        if not force and time() - _snapshot["time"] < SNAPSHOT_INTERVAL:
+            return _snapshot
+        async with task_dict_lock:
+            tasks = list(task_dict.values())
+        statuses = await sync_to_async(_get_statuses, tasks)
+        snapshot = []
+        for task, tstatus in zip(tasks, statuses):
+            if tstatus is None:
+                continue
+            task_dict.set_status(task, tstatus)
+            try:
+                snapshot.append(await _task_snapshot(task, tstatus))
+            except:
+                continue
+        _snapshot["tasks"] = snapshot
+        _snapshot["stats"] = (
+            f"<b>💻 CPU:</b> {cpu_percent()}% | <b>💿 FREE:</b> {get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)}"
+            f"\n<b>💯 RAM:</b> {virtual_memory().percent}% | <b>🕛 UPTIME:</b> {get_readable_time(time() - botStartTime)}"
+        )
+        _snapshot["time"] = time()
+        return _snapshot
+
+
+def _filter_snapshot(snapshot, status, userId):
+    return [
+        data
+        for data in snapshot["tasks"]
+        if (not userId or data["userId"] == userId)
+        and (
+            status == "All"
+            or _match_status(data["status"], status)
+        )
+    ]
+
+
+def get_readable_message(
+    snapshot, sid, is_user, page_no=1, status="All", page_step=1
+):
     msg = "[𝑩𝒐𝒕 𝒃𝒚 🚀 𝑱𝒆𝒕-𝑴𝒊𝒓𝒓𝒐𝒓](https://myswitch.click/Asy3)"
     button = None
 
-    tasks = await sync_to_async(getSpecificTasks, status, sid if is_user else None)
+    tasks = _filter_snapshot(snapshot, status, sid if is_user else None)
 
     STATUS_LIMIT = config_dict["STATUS_LIMIT"]
     tasks_no = len(tasks)
@@ -166,44 +255,31 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
     for index, task in enumerate(
         tasks[start_position : STATUS_LIMIT + start_position], start=1
     ):
-        tstatus = await sync_to_async(task.status) if status == "All" else status
+        tstatus = task["status"] if status == "All" else status
         msg += f"\n\n{index + start_position}. <b>{tstatus}: \n</b>"
-        msg += f"<b>Filename:</b> <copy>{escape(f'{task.name()}')}</copy>"
-        if tstatus not in [
-            MirrorStatus.STATUS_SPLITTING,
-            MirrorStatus.STATUS_SEEDING,
-            MirrorStatus.STATUS_SAMVID,
-            MirrorStatus.STATUS_CONVERTING,
-            MirrorStatus.STATUS_QUEUEUP,
-        ]:
-            progress = (
-                await task.progress()
-                if iscoroutinefunction(task.progress)
-                else task.progress()
-            )
+        msg += f"<b>Filename:</b> <copy>{escape(str(task['name']))}</copy>"
+        if "progress" in task:
+            progress = task["progress"]
             msg += f"\n⌑ {get_progress_bar_string(progress)} » {progress}"
-            msg += f"\n<b>💯 Done   : </b> {task.processed_bytes()} of {task.size()}"
-            msg += f"\n<b>🚀 Speed  : </b> {task.speed()}"
-            msg += f"\n<b>🏎 Engine : </b> {task.engine}"
-            msg += f"\n<b>⏳ ETA    : </b> {task.eta()}"
-            msg += f"\n<b>👤 User   : </b> @{task.message.user.username}"
-            msg += f"\n<b>💽 Size   : </b> {task.size()}"
-            if hasattr(task, "seeders_num"):
-                try:
-                    msg += f"\n<b>🌱 Seeders:</b> {task.seeders_num()} | <b>🔗 Leechers:</b> {task.leechers_num()}"
-                    if config_dict['BASE_URL']:
-                        msg += f"\n\n<b>🗳️ Select Files:</b>\n<copy>@{bot_name}/{BotCommands.BtSelectCommand} {task.gid()}</copy>\n"
-                except:
-                    pass
-        elif tstatus == MirrorStatus.STATUS_SEEDING:
-            msg += f"\n<b>💽 Size      : </b>{task.size()}"
-            msg += f"\n<b>🚀 Speed     : </b>{task.seed_speed()}"
-            msg += f"\n<b>📈 Uploaded  : </b>{task.uploaded_bytes()}"
-            msg += f"\n<b>📟 Ratio     : </b>{task.ratio()}"
-            msg += f"\n<b>⏳ Time      : </b>{task.seeding_time()}"
+            msg += f"\n<b>💯 Done   : </b> {task['processed']} of {task['size']}"
+            msg += f"\n<b>🚀 Speed  : </b> {task['speed']}"
+            msg += f"\n<b>🏎 Engine : </b> {task['engine']}"
+            msg += f"\n<b>⏳ ETA    : </b> {task['eta']}"
+            msg += f"\n<b>👤 User   : </b> @{task['username']}"
+            msg += f"\n<b>💽 Size   : </b> {task['size']}"
+            if peers := task.get("peers"):
+                msg += f"\n<b>🌱 Seeders:</b> {peers[0]} | <b>🔗 Leechers:</b> {peers[1]}"
+                if config_dict['BASE_URL']:
+                    msg += f"\n\n<b>🗳️ Select Files:</b>\n<copy>@{bot_name}/{BotCommands.BtSelectCommand} {task['gid']}</copy>\n"
+        elif "seed_speed" in task:
+            msg += f"\n<b>💽 Size      : </b>{task['size']}"
+            msg += f"\n<b>🚀 Speed     : </b>{task['seed_speed']}"
+            msg += f"\n<b>📈 Uploaded  : </b>{task['uploaded']}"
+            msg += f"\n<b>📟 Ratio     : </b>{task['ratio']}"
+            msg += f"\n<b>⏳ Time      : </b>{task['seeding_time']}"
         else:
-            msg += f"\n<b>💽 Size   : </b>{task.size()}"
-        msg += f"\n<b>❌ Cancel Task: </b>\n<copy>@{bot_name}/{BotCommands.CancelTaskCommand} {task.gid()}</copy>\n\n"
+            msg += f"\n<b>💽 Size   : </b>{task['size']}"
+        msg += f"\n<b>❌ Cancel Task: </b>\n<copy>@{bot_name}/{BotCommands.CancelTaskCommand} {task['gid']}</copy>\n\n"
 
     if len(msg) == 0:
         if status == "All":
@@ -226,6 +302,5 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                 buttons.ibutton(label, f"status {sid} st {status_value}")
     buttons.ibutton("♻️ Refresh Status ♻️", f"status {sid} ref", position="header")
     button = buttons.build_menu(8)
-    msg += f"<b>💻 CPU:</b> {cpu_percent()}% | <b>💿 FREE:</b> {get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)}"
-    msg += f"\n<b>💯 RAM:</b> {virtual_memory().percent}% | <b>🕛 UPTIME:</b> {get_readable_time(time() - botStartTime)}"
+    msg += snapshot["stats"]
     return msg, button
@@ -1,20 +1,11 @@
-from asyncio import Event, sleep
-
-from bot import (
-    config_dict,
-    queued_dl,
-    queued_up,
-    non_queued_up,
-    non_queued_dl,
-    queue_dict_lock,
-    LOGGER,
-)
+from bot import config_dict, LOGGER
 from bot.helper.ext_utils.bot_utils import (
     sync_to_async,
     get_telegraph_list,
 )
 from bot.helper.ext_utils.files_utils import get_base_name, check_storage_threshold
 from bot.helper.ext_utils.links_utils import is_gdrive_id
+from bot.helper.ext_utils.task_scheduler import task_scheduler
 from bot.helper.mirror_leech_utils.gdrive_utils.search import gdSearch
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 
@@ -57,110 +48,25 @@ async def stop_duplicate_check(listener):
     return False, None
 
 
-async def check_running_tasks(listener, state="dl"):
-    all_limit = config_dict["QUEUE_ALL"]
-    state_limit = (
-        config_dict["QUEUE_DOWNLOAD"] if state == "dl" else config_dict["QUEUE_UPLOAD"]
-    )
-    event = None
-    is_over_limit = False
-    async with queue_dict_lock:
-        if state == "up" and listener.mid in non_queued_dl:
-            non_queued_dl.remove(listener.mid)
-        if (
-            (all_limit or state_limit)
-            and not listener.forceRun
-            and not (listener.forceUpload and state == "up")
-            and not (listener.forceDownload and state == "dl")
-        ):
-            dl_count = len(non_queued_dl)
-            up_count = len(non_queued_up)
-            t_count = dl_count if state == "dl" else up_count
-            is_over_limit = (
-                all_limit
-                and dl_count + up_count >= all_limit
-                and (not state_limit or t_count >= state_limit)
-            ) or (state_limit and t_count >= state_limit)
-            if is_over_limit:
-                event = Event()
-                if state == "dl":
-                    queued_dl[listener.mid] = event
-                else:
-                    queued_up[listener.mid] = event
-        if not is_over_limit:
-            if state == "up":
-                non_queued_up.add(listener.mid)
-            else:
-                non_queued_dl.add(listener.mid)
-
-    return is_over_limit, event
+async def check_running_tasks(listener, state="dl", engine=""):
+    return await task_scheduler.add(listener, state, engine)
 
 
 async def start_dl_from_queued(mid: int):
-    queued_dl[mid].set()
-    del queued_dl[mid]
-    await sleep(0.7)
+    return await task_scheduler.start(mid, "dl")
 
 
 async def start_up_from_queued(mid: int):
-    queued_up[mid].set()
-    del queued_up[mid]
-    await sleep(0.7)
+    return await task_scheduler.start(mid, "up")
+
+
+async def release_task(mid: int, state=None):
+    await task_scheduler.release(mid, state)
 
 
 async def start_from_queued():
-    if all_limit := config_dict["QUEUE_ALL"]:
-        dl_limit = config_dict["QUEUE_DOWNLOAD"]
-        up_limit = config_dict["QUEUE_UPLOAD"]
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            up = len(non_queued_up)
-            all_ = dl + up
-            if all_ < all_limit:
-                f_tasks = all_limit - all_
-                if queued_up and (not up_limit or up < up_limit):
-                    for index, mid in enumerate(list(queued_up.keys()), start=1):
-                        f_tasks = all_limit - all_
-                        await start_up_from_queued(mid)
-                        f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
-                if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                        await start_dl_from_queued(mid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
-        return
-
-    if up_limit := config_dict["QUEUE_UPLOAD"]:
-        async with queue_dict_lock:
-            up = len(non_queued_up)
-            if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, mid in enumerate(list(queued_up.keys()), start=1):
-                    await start_up_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_up:
-                for mid in list(queued_up.keys()):
-                    await start_up_from_queued(mid)
-
-    if dl_limit := config_dict["QUEUE_DOWNLOAD"]:
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                    await start_dl_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_dl:
-                for mid in list(queued_dl.keys()):
-                    await start_dl_from_queued(mid)
+    await task_scheduler.start_from_queued()
+
 
 async def limit_checker(
         listener,
@@ -0,0 +1,139 @@
+from aiofiles.os import path as aiopath, remove, listdir, makedirs
+from asyncio import Queue, gather
+from natsort import natsorted
+from os import walk, path as ospath
+
+from bot import LOGGER, MAX_SPLIT_SIZE
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.media_utils import (
+    convert_audio,
+    convert_video,
+    createSampleVideo,
+    get_document_type,
+    split_file,
+)
+
+QUEUE_SIZE = 2
+
+
+class TaskPipeline:
+    """
+    Streams the files of a downloaded folder through convert, sample video and
+    split stages and into the uploader one by one. Every stage is a single
+    worker reading a bounded queue, so files keep their order and the upload
+    of the first files overlaps with processing of the rest. The task size
+    follows the files every stage adds, replaces or removes.
+    """
+
+    def __init__(self, listener, path):
+        self._listener = listener
+        self._path = path
+        self._stages = []
+        if listener.convertAudio or listener.convertVideo:
+            self._convert_options = listener.convertOptions()
+            self._stages.append(self._convert)
+        if listener.sampleVideo:
+            self._sample_options = listener.sampleOptions()
+            self._stages.append(self._sample)
+        self._stages.append(self._split)
+
+    async def _convert(self, f_path):
+        options = self._convert_options
+        if not (ctype := await self._listener.convertType(f_path, options)):
+            return [f_path]
+        LOGGER.info(f"Converting: {f_path}")
+        if ctype == "video":
+            res = await convert_video(self._listener, f_path, options[0])
+        else:
+            res = await convert_audio(self._listener, f_path, options[3])
+        if not res or self._listener.isCancelled:
+            return [f_path]
+        try:
+            await remove(f_path)
+        except:
+            pass
+        return [res]
+
+    async def _sample(self, f_path):
+        if not (await get_document_type(f_path))[0]:
+            return [f_path]
+        LOGGER.info(f"Creating Sample video: {f_path}")
+        res = await createSampleVideo(self._listener, f_path, *self._sample_options)
+        return [res, f_path] if res else [f_path]
+
+    async def _split(self, f_path):
+        f_size = await aiopath.getsize(f_path)
+        if (
+            f_size <= self._listener.splitSize
+            or self._listener.asDoc
+            or not (await get_document_type(f_path))[0]
+        ):
+            return [f_path]
+        dirpath, file_ = f_path.rsplit("/", 1)
+        split_dir = f"{dirpath}/splited_files_mltb"
+        await makedirs(split_dir, exist_ok=True)
+        before = set(await listdir(split_dir))
+        LOGGER.info(f"Splitting: {f_path}")
+        res = await split_file(
+            f_path, f_size, split_dir, file_, self._listener.splitSize, self._listener
+        )
+        parts = natsorted(set(await listdir(split_dir)) - before)
+        if self._listener.isCancelled:
+            return []
+        if not res or not parts:
+            if f_size >= MAX_SPLIT_SIZE:
+                await remove(f_path)
+                return []
+            return [f_path]
+        await remove(f_path)
+        return [f"{split_dir}/{part}" for part in parts]
+
+    async def _produce(self, queue, unwanted_files):
+        for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
+            if dirpath.endswith(("/yt-dlp-thumb", "/splited_files_mltb")):
+                continue
+            for file_ in natsorted(files):
+                if self._listener.isCancelled:
+                    break
+                f_path = ospath.join(dirpath, file_)
+                if f_path not in unwanted_files:
+                    await queue.put(f_path)
+        await queue.put(None)
+
+    @staticmethod
+    async def _size_of(paths):
+        size = 0
+        for path in paths:
+            try:
+                size += await aiopath.getsize(path)
+            except:
+                pass
+        return size
+
+    async def _run_stage(self, stage, in_queue, out_queue):
+        while (f_path := await in_queue.get()) is not None:
+            if self._listener.isCancelled:
+                continue
+            size = await self._size_of([f_path])
+            try:
+                outputs = await stage(f_path)
+            except Exception as e:
+                LOGGER.error(f"{e}. Path: {f_path}")
+                outputs = [f_path]
+            if outputs != [f_path]:
+                self._listener.size += await self._size_of(outputs) - size
+            for output in outputs:
+                await out_queue.put(output)
+        await out_queue.put(None)
+
+    async def run(self, uploader, unwanted_files, files_to_delete):
+        queues = [Queue(QUEUE_SIZE) for _ in range(len(self._stages) + 1)]
+        uploader.pipeline = True
+        await gather(
+            self._produce(queues[0], unwanted_files),
+            *(
+                self._run_stage(stage, queues[i], queues[i + 1])
+                for i, stage in enumerate(self._stages)
+            ),
+            uploader.upload_queue(queues[-1], unwanted_files, files_to_delete),
+        )
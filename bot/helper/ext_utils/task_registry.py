@@ -0,0 +1,124 @@
+class TaskRegistry(dict):
+    """
+    task_dict with secondary indexes by gid, user id and status. It behaves like
+    the plain dict it replaces (keyed by listener mid), while the indexes are
+    kept in sync on every insert/delete and on status changes reported through
+    set_status. Tasks whose status can change without being replaced (the ones
+    with an update method, like qBittorrent and aria2, or marked dynamic, like
+    direct downloads waiting in aria2) are always returned as status candidates
+    so the caller can re-check them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._gids = {}
+        self._mid_gids = {}
+        self._users = {}
+        self._statuses = {}
+        self._mid_status = {}
+        self._dynamic = set()
+
+    def __setitem__(self, mid, task):
+        if mid in self:
+            self._unindex(mid)
+        super().__setitem__(mid, task)
+        self._users.setdefault(task.listener.userId, set()).add(mid)
+        try:
+            self._add_gid(mid, task.gid())
+        except:
+            pass
+        if hasattr(task, "update") or getattr(task, "dynamic", False):
+            self._dynamic.add(mid)
+        else:
+            try:
+                self._set_status(mid, task.status())
+            except:
+                self._dynamic.add(mid)
+
+    def __delitem__(self, mid):
+        self._unindex(mid)
+        super().__delitem__(mid)
+
+    def pop(self, mid, *args):
+        if mid in self:
+            self._unindex(mid)
+        return super().pop(mid, *args)
+
+    def clear(self):
+        self._gids.clear()
+        self._mid_gids.clear()
+        self._users.clear()
+        self._statuses.clear()
+        self._mid_status.clear()
+        self._dynamic.clear()
+        super().clear()
+
+    def _unindex(self, mid):
+        task = self[mid]
+        if (users := self._users.get(task.listener.userId)) is not None:
+            users.discard(mid)
+            if not users:
+                del self._users[task.listener.userId]
+        for gid in self._mid_gids.pop(mid, set()):
+            if self._gids.get(gid) == mid:
+                del self._gids[gid]
+        self._remove_status(mid)
+        self._dynamic.discard(mid)
+
+    def _add_gid(self, mid, gid):
+        self._gids[gid] = mid
+        self._mid_gids.setdefault(mid, set()).add(gid)
+
+    def _remove_status(self, mid):
+        if (status := self._mid_status.pop(mid, None)) is not None:
+            self._statuses[status].discard(mid)
+            if not self._statuses[status]:
+                del self._statuses[status]
+
+    def _set_status(self, mid, status):
+        if self._mid_status.get(mid) == status:
+            return
+        self._remove_status(mid)
+        self._mid_status[mid] = status
+        self._statuses.setdefault(status, set()).add(mid)
+
+    def set_status(self, task, status):
+        mid = task.listener.mid
+        if self.get(mid) is task:
+            self._set_status(mid, status)
+            # the gid of aria2 tasks moves to the followed download on update
+            try:
+                self._add_gid(mid, task.gid())
+            except:
+                pass
+
+    def statuses(self):
+        return list(self._statuses.keys())
+
+    def get_by_user(self, userId):
+        return [self[mid] for mid in self._users.get(userId, ())]
+
+    def get_by_status(self, statuses, userId=None):
+        mids = set(self._dynamic)
+        for status in statuses:
+            mids.update(self._statuses.get(status, ()))
+        if userId:
+            mids.intersection_update(self._users.get(userId, ()))
+        return [self[mid] for mid in mids]
+
+    def get_by_gid(self, gid):
+        if (mid := self._gids.get(gid)) is not None and (task := self.get(mid)):
+            try:
+                if task.gid() == gid:
+                    return task
+            except:
+                pass
+        for mid, task in self.items():
+            try:
+                tgid = task.gid()
+            except:
+                continue
+            self._add_gid(mid, tgid)
+            if tgid == gid:
+                return task
+        return None
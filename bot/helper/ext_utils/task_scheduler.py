@@ -0,0 +1,202 @@
+from asyncio import Event
+from itertools import count
+from psutil import net_io_counters
+from time import time
+
+from bot import (
+    bot_loop,
+    config_dict,
+    queue_dict_lock,
+    user_data,
+    OWNER_ID,
+    LOGGER,
+)
+
+BANDWIDTH_RECHECK = 10
+
+
+class QueuedTask:
+    def __init__(self, listener, engine, priority, seq):
+        self.listener = listener
+        self.engine = engine
+        self.priority = priority
+        self.seq = seq
+        self.event = Event()
+
+
+class TaskScheduler:
+    """
+    Admission control for downloads and uploads. Limits are checked against the
+    tasks marked as running, globally (QUEUE_ALL), per direction (QUEUE_DOWNLOAD,
+    QUEUE_UPLOAD), per engine (QUEUE_ENGINES, like "qbit:2 gdrive:3") and against
+    the measured link throughput (QUEUE_BANDWIDTH in MiB/s). When slots free up,
+    queued tasks of sudo users go first and then the users with the fewest
+    running tasks, in arrival order. A woken task is marked as running before its
+    event is set, so nothing has to sleep under the lock waiting for it.
+    """
+
+    def __init__(self):
+        self._queued = {"dl": {}, "up": {}}
+        self._running = {"dl": {}, "up": {}}
+        self._seq = count()
+        self._engines = ("", {})
+        self._net = (0, 0, 0)
+        self._rates = (0, 0)
+        self._recheck = None
+
+    def _engine_limits(self):
+        value = config_dict.get("QUEUE_ENGINES", "")
+        if self._engines[0] != value:
+            limits = {}
+            for item in str(value).split():
+                try:
+                    engine, limit = item.split(":", 1)
+                    limits[engine.strip().lower()] = int(limit)
+                except:
+                    LOGGER.error(f"Wrong QUEUE_ENGINES item: {item}")
+            self._engines = (value, limits)
+        return self._engines[1]
+
+    def _link_rates(self):
+        net = net_io_counters()
+        now = time()
+        last_time, last_recv, last_sent = self._net
+        if (elapsed := now - last_time) >= 1:
+            if last_time:
+                self._rates = (
+                    (net.bytes_recv - last_recv) / elapsed,
+                    (net.bytes_sent - last_sent) / elapsed,
+                )
+            self._net = (now, net.bytes_recv, net.bytes_sent)
+        return self._rates
+
+    def _is_saturated(self, state):
+        try:
+            limit = float(config_dict.get("QUEUE_BANDWIDTH") or 0) * 1024**2
+        except:
+            return False
+        if not limit or not self._running[state]:
+            return False
+        dl_rate, up_rate = self._link_rates()
+        return (dl_rate if state == "dl" else up_rate) >= limit * 0.9
+
+    def _is_over_limit(self, state, engine):
+        all_limit = config_dict["QUEUE_ALL"]
+        state_limit = (
+            config_dict["QUEUE_DOWNLOAD"]
+            if state == "dl"
+            else config_dict["QUEUE_UPLOAD"]
+        )
+        dl_count = len(self._running["dl"])
+        up_count = len(self._running["up"])
+        t_count = dl_count if state == "dl" else up_count
+        if (
+            all_limit
+            and dl_count + up_count >= all_limit
+            and (not state_limit or t_count >= state_limit)
+        ):
+            return True
+        if state_limit and t_count >= state_limit:
+            return True
+        if engine and (limit := self._engine_limits().get(engine)):
+            running = self._running[state].values()
+            if sum(1 for _, e in running if e == engine) >= limit:
+                return True
+        return False
+
+    def _user_load(self, user_id):
+        return sum(
+            1
+            for running in self._running.values()
+            for uid, _ in running.values()
+            if uid == user_id
+        )
+
+    @staticmethod
+    def _priority(user_id):
+        return int(
+            user_id == OWNER_ID
+            or bool(user_data.get(user_id, {}).get("is_sudo"))
+        )
+
+    def _start(self, state, mid):
+        task = self._queued[state].pop(mid)
+        self._running[state][mid] = (task.listener.userId, task.engine)
+        task.event.set()
+
+    def _schedule_recheck(self):
+        if self._recheck is None:
+            self._recheck = bot_loop.call_later(
+                BANDWIDTH_RECHECK,
+                lambda: bot_loop.create_task(self._run_recheck()),
+            )
+
+    async def _run_recheck(self):
+        self._recheck = None
+        await self.start_from_queued()
+
+    async def add(self, listener, state="dl", engine=""):
+        mid = listener.mid
+        async with queue_dict_lock:
+            if state == "up":
+                self._running["dl"].pop(mid, None)
+            if (
+                not listener.forceRun
+                and not (listener.forceUpload and state == "up")
+                and not (listener.forceDownload and state == "dl")
+            ):
+                if self._is_over_limit(state, engine) or self._is_saturated(state):
+                    task = QueuedTask(
+                        listener,
+                        engine,
+                        self._priority(listener.userId),
+                        next(self._seq),
+                    )
+                    self._queued[state][mid] = task
+                    if not self._is_over_limit(state, engine):
+                        self._schedule_recheck()
+                    return True, task.event
+            self._running[state][mid] = (listener.userId, engine)
+        return False, None
+
+    async def start(self, mid, state):
+        async with queue_dict_lock:
+            if mid in self._queued[state]:
+                self._start(state, mid)
+                return True
+        return False
+
+    async def release(self, mid, state=None):
+        async with queue_dict_lock:
+            for st in [state] if state else ["dl", "up"]:
+                self._running[st].pop(mid, None)
+                if state is None and (task := self._queued[st].pop(mid, None)):
+                    task.event.set()
+
+    def is_queued(self, mid, state):
+        return mid in self._queued[state]
+
+    async def start_from_queued(self):
+        async with queue_dict_lock:
+            for state in ["up", "dl"]:
+                while self._queued[state]:
+                    if self._is_saturated(state):
+                        self._schedule_recheck()
+                        break
+                    candidates = sorted(
+                        self._queued[state].values(),
+                        key=lambda t: (
+                            -t.priority,
+                            self._user_load(t.listener.userId),
+                            t.seq,
+                        ),
+                    )
+                    for task in candidates:
+                        if not self._is_over_limit(state, task.engine):
+                            self._start(state, task.listener.mid)
+                            break
+                    else:
+                        break
+
+
+task_scheduler = TaskScheduler()
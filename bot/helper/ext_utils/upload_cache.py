@@ -0,0 +1,115 @@
+from hashlib import blake2b, md5
+from os import path as ospath
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from bot import config_dict, LOGGER
+
+SAMPLE_SIZE = 1024 * 1024
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class UploadCache:
+    """
+    Content index of uploaded files, kept in upload_cache.db. Files are keyed
+    by size and a hash of their first, middle and last MiB, and the full MD5 is
+    only read when that key matches an earlier upload. A scope names where the
+    copy lives and who can reach it ("gdrive:<token path>", "gdrive:sa",
+    "switch", or "rclone:<config>:<remote>") and ref is what that uploader
+    needs to reuse it: a Drive file id, a Switch media link or an rclone path.
+    """
+
+    def __init__(self):
+        self._db = None
+        self._lock = Lock()
+
+    @staticmethod
+    def enabled():
+        return config_dict.get("UPLOAD_CACHE", False)
+
+    def _connect(self):
+        if self._db is None:
+            self._db = connect("upload_cache.db", check_same_thread=False)
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    scope TEXT, size INTEGER, sample TEXT, md5 TEXT, ref TEXT,
+                    added REAL, PRIMARY KEY (scope, ref)
+                );
+                CREATE INDEX IF NOT EXISTS files_key ON files (scope, size, sample);
+                """
+            )
+        return self._db
+
+    @staticmethod
+    def file_key(path):
+        size = ospath.getsize(path)
+        digest = blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            if size <= SAMPLE_SIZE * 3:
+                digest.update(f.read())
+            else:
+                for offset in [0, (size - SAMPLE_SIZE) // 2, size - SAMPLE_SIZE]:
+                    f.seek(offset)
+                    digest.update(f.read(SAMPLE_SIZE))
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def file_md5(path):
+        digest = md5()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def lookup(self, scope, path, key=None):
+        try:
+            size, sample = key or self.file_key(path)
+            if not size:
+                return None
+            with self._lock:
+                rows = (
+                    self._connect()
+                    .execute(
+                        "SELECT ref, md5 FROM files WHERE scope = ? AND size = ? "
+                        "AND sample = ? AND md5 IS NOT NULL ORDER BY added DESC",
+                        (scope, size, sample),
+                    )
+                    .fetchall()
+                )
+            if not rows:
+                return None
+            file_md5 = self.file_md5(path)
+            return next((ref for ref, ref_md5 in rows if ref_md5 == file_md5), None)
+        except Exception as e:
+            LOGGER.error(f"Upload cache lookup: {e}. Path: {path}")
+            return None
+
+    def record(self, scope, key, ref, file_md5):
+        if not key[0] or not file_md5:
+            return
+        try:
+            with self._lock:
+                db = self._connect()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                        (scope, key[0], key[1], file_md5.lower(), ref, time()),
+                    )
+        except Exception as e:
+            LOGGER.error(f"Upload cache record: {e}. Ref: {ref}")
+
+    def forget(self, scope, ref):
+        try:
+            with self._lock:
+                db = self._connect()
+                with db:
+                    db.execute(
+                        "DELETE FROM files WHERE scope = ? AND ref = ?", (scope, ref)
+                    )
+        except Exception as e:
+            LOGGER.error(f"Upload cache forget: {e}. Ref: {ref}")
+
+
+upload_cache = UploadCache()
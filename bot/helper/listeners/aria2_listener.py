@@ -13,6 +13,7 @@ from bot import (
     task_dict_lock,
     task_dict,
 )
+from bot.helper.ext_utils.aria2_sync import a2_sync
 from bot.helper.ext_utils.bot_utils import (
     new_thread,
     bt_selection_buttons,
@@ -37,12 +38,21 @@ from bot.helper.switch_helper.message_utils import (
 )
 
 
-@new_thread
-async def _onDownloadStarted(api, gid):
+async def _get_download(api, gid):
     download = await sync_to_async(
         api.get_download,
         gid
     )
+    a2_sync.put(download)
+    return download
+
+
+@new_thread
+async def _onDownloadStarted(api, gid):
+    download = await _get_download(
+        api,
+        gid
+    )
     if download.options.follow_torrent == "false":
         return
     if download.is_metadata:
@@ -68,8 +78,8 @@ async def _onDownloadStarted(api, gid):
         await sleep(1)
 
     if task := await getTaskByGid(gid):
-        download = await sync_to_async(
-            api.get_download,
+        download = await _get_download(
+            api,
             gid
         )
         await sleep(2)
@@ -93,14 +103,14 @@ async def _onDownloadStarted(api, gid):
             start_time = time()
             while time() - start_time <= 15:
                 await sleep(5)
-                download = await sync_to_async(
-                    api.get_download,
+                download = await _get_download(
+                    api,
                     gid
                 )
                 await sync_to_async(download.update)
                 if download.followed_by_ids:
-                    download = await sync_to_async(
-                        api.get_download,
+                    download = await _get_download(
+                        api,
                         download.followed_by_ids[0]
                     )
                     await sync_to_async(download.update)
@@ -127,8 +137,8 @@ async def _onDownloadStarted(api, gid):
 @new_thread
 async def _onDownloadComplete(api, gid):
     try:
-        download = await sync_to_async(
-            api.get_download,
+        download = await _get_download(
+            api,
             gid
         )
     except:
@@ -190,8 +200,8 @@ async def _onDownloadComplete(api, gid):
 async def _onBtDownloadComplete(api, gid):
     seed_start_time = time()
     await sleep(1)
-    download = await sync_to_async(
-        api.get_download,
+    download = await _get_download(
+        api,
         gid
     )
     LOGGER.info(f"onBtDownloadComplete: {download.name} - Gid: {gid}")
@@ -292,8 +302,8 @@ async def _onDownloadError(api, gid):
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
     try:
-        download = await sync_to_async(
-            api.get_download,
+        download = await _get_download(
+            api,
             gid
         )
         if download.options.follow_torrent == "false":
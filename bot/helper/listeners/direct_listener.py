@@ -1,6 +1,7 @@
 from time import sleep
 
 from bot import LOGGER, aria2
+from bot.helper.ext_utils.aria2_sync import a2_sync
 from bot.helper.ext_utils.bot_utils import async_to_sync, sync_to_async
 
 
@@ -43,13 +44,13 @@ class DirectListener:
                 self._failed += 1
                 LOGGER.error(f"Unable to download {filename} due to: {e}")
                 continue
-            self.download_task = self.download_task.live
+            gid = self.download_task.gid
             while True:
                 if self.listener.isCancelled:
                     if self.download_task:
                         self.download_task.remove(True, True)
                     break
-                self.download_task = self.download_task.live
+                self.download_task = a2_sync.get(gid) or self.download_task.live
                 if error_message := self.download_task.error_message:
                     self._failed += 1
                     LOGGER.error(
@@ -21,6 +21,7 @@ from bot.helper.ext_utils.bot_utils import (
     sync_to_async
 )
 from bot.helper.ext_utils.files_utils import clean_unwanted
+from bot.helper.ext_utils.qbit_sync import qb_sync
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
@@ -44,6 +45,7 @@ async def _remove_torrent(hash_, tag):
         torrent_hashes=hash_,
         delete_files=True
     )
+    qb_sync.remove(hash_)
     async with qb_listener_lock:
         if tag in QbTorrents:
             del QbTorrents[tag]
@@ -215,13 +217,13 @@ async def _qb_listener():
     while True:
         async with qb_listener_lock:
             try:
-                torrents = await sync_to_async(qbittorrent_client.torrents_info)
-                if len(torrents) == 0:
+                await sync_to_async(qb_sync.sync)
+                if len(qb_sync.torrents) == 0:
                     Intervals["qb"] = ""
+                    qb_sync.reset()
                     break
-                for tor_info in torrents:
-                    tag = tor_info.tags
-                    if tag not in QbTorrents:
+                for tag in list(QbTorrents.keys()):
+                    if (tor_info := qb_sync.get_by_tag(tag)) is None:
                         continue
                     state = tor_info.state
                     if state == "metaDL":
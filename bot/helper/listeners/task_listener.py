@@ -12,15 +12,11 @@ from bot import (
     task_dict_lock,
     LOGGER,
     config_dict,
-    non_queued_up,
-    non_queued_dl,
-    queued_up,
-    queued_dl,
-    queue_dict_lock,
     user_data
 )
 from bot.helper.common import TaskConfig
 from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.download_coalescer import download_coalescer
 from bot.helper.ext_utils.files_utils import (
     get_path_size,
     clean_download,
@@ -28,8 +24,14 @@ from bot.helper.ext_utils.files_utils import (
     join_files,
 )
 from bot.helper.ext_utils.links_utils import is_gdrive_id
+from bot.helper.ext_utils.list_cache import list_cache
 from bot.helper.ext_utils.status_utils import get_readable_file_size
-from bot.helper.ext_utils.task_manager import start_from_queued, check_running_tasks
+from bot.helper.ext_utils.task_pipeline import TaskPipeline
+from bot.helper.ext_utils.task_manager import (
+    start_from_queued,
+    check_running_tasks,
+    release_task,
+)
 from bot.helper.mirror_leech_utils.gdrive_utils.upload import gdUpload
 from bot.helper.mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from bot.helper.mirror_leech_utils.status_utils.gdrive_status import GdriveStatus
@@ -132,10 +134,9 @@ class TaskListener(TaskConfig):
 
         up_path = f"{self.dir}/{self.name}"
         self.size = await get_path_size(up_path)
+        await download_coalescer.complete(self, up_path)
         if not config_dict["QUEUE_ALL"]:
-            async with queue_dict_lock:
-                if self.mid in non_queued_dl:
-                    non_queued_dl.remove(self.mid)
+            await release_task(self.mid, "dl")
             await start_from_queued()
 
         if self.join and await aiopath.isdir(up_path):
@@ -154,7 +155,15 @@ class TaskListener(TaskConfig):
                 return
             self.name = up_path.rsplit("/", 1)[1]
 
-        if self.convertAudio or self.convertVideo:
+        pipeline = (
+            config_dict["LEECH_PIPELINE"]
+            and self.isLeech
+            and not self.compress
+            and not self.seed
+            and await aiopath.isdir(up_path)
+        )
+
+        if not pipeline and (self.convertAudio or self.convertVideo):
             up_path = await self.convertMedia(
                 up_path, gid, unwanted_files, unwanted_files_size, files_to_delete
             )
@@ -163,7 +172,7 @@ class TaskListener(TaskConfig):
             up_dir, self.name = up_path.rsplit("/", 1)
             self.size = await get_path_size(up_dir)
 
-        if self.sampleVideo:
+        if not pipeline and self.sampleVideo:
             up_path = await self.generateSampleVideo(
                 up_path, gid, unwanted_files, files_to_delete
             )
@@ -182,12 +191,18 @@ class TaskListener(TaskConfig):
         up_dir, self.name = up_path.rsplit("/", 1)
         self.size = await get_path_size(up_dir)
 
-        if self.isLeech and not self.compress:
+        if not pipeline and self.isLeech and not self.compress:
             await self.proceedSplit(up_dir, unwanted_files_size, unwanted_files, gid)
             if self.isCancelled:
                 return
 
-        add_to_queue, event = await check_running_tasks(self, "up")
+        if self.isLeech:
+            engine = "switch"
+        elif is_gdrive_id(self.upDest):
+            engine = "gdrive"
+        else:
+            engine = "rclone"
+        add_to_queue, event = await check_running_tasks(self, "up", engine)
         await start_from_queued()
         if add_to_queue:
             LOGGER.info(f"Added to Queue/Upload: {self.name}")
@@ -196,8 +211,6 @@ class TaskListener(TaskConfig):
             await event.wait()
             if self.isCancelled:
                 return
-            async with queue_dict_lock:
-                non_queued_up.add(self.mid)
             LOGGER.info(f"Start from Queued/Upload: {self.name}")
 
         self.size = await get_path_size(up_dir)
@@ -209,10 +222,13 @@ class TaskListener(TaskConfig):
             sw = SwUploader(self, up_dir)
             async with task_dict_lock:
                 task_dict[self.mid] = SwitchStatus(self, sw, gid, "up", self.message)
-            await gather(
-                update_status_message(self.chat),
-                sw.upload(unwanted_files, files_to_delete),
-            )
+            if pipeline:
+                upload = TaskPipeline(self, up_path).run(
+                    sw, unwanted_files, files_to_delete
+                )
+            else:
+                upload = sw.upload(unwanted_files, files_to_delete)
+            await gather(update_status_message(self.chat), upload)
         elif is_gdrive_id(self.upDest):
             LOGGER.info(f"Gdrive Upload Name: {self.name}")
             drive = gdUpload(self, up_path)
@@ -222,6 +238,7 @@ class TaskListener(TaskConfig):
                 update_status_message(self.chat),
                 sync_to_async(drive.upload, unwanted_files, files_to_delete),
             )
+            list_cache.invalidate("gdrive", self.upDest)
         else:
             LOGGER.info(f"Rclone Upload Name: {self.name}")
             RCTransfer = RcloneTransferHelper(self)
@@ -291,9 +308,7 @@ class TaskListener(TaskConfig):
         if self.seed:
             if self.newDir:
                 await clean_target(self.newDir)
-            async with queue_dict_lock:
-                if self.mid in non_queued_up:
-                    non_queued_up.remove(self.mid)
+            await release_task(self.mid, "up")
             await start_from_queued()
             return
         await clean_download(self.dir)
@@ -306,13 +321,11 @@ class TaskListener(TaskConfig):
         else:
             await update_status_message(self.chat)
 
-        async with queue_dict_lock:
-            if self.mid in non_queued_up:
-                non_queued_up.remove(self.mid)
-
+        await release_task(self.mid, "up")
         await start_from_queued()
 
     async def onDownloadError(self, error, button=None):
+        await download_coalescer.fail(self)
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
@@ -325,18 +338,7 @@ class TaskListener(TaskConfig):
         else:
             await update_status_message(self.chat)
 
-        async with queue_dict_lock:
-            if self.mid in queued_dl:
-                queued_dl[self.mid].set()
-                del queued_dl[self.mid]
-            if self.mid in queued_up:
-                queued_up[self.mid].set()
-                del queued_up[self.mid]
-            if self.mid in non_queued_dl:
-                non_queued_dl.remove(self.mid)
-            if self.mid in non_queued_up:
-                non_queued_up.remove(self.mid)
-
+        await release_task(self.mid)
         await start_from_queued()
         await sleep(3)
         await clean_download(self.dir)
@@ -356,18 +358,7 @@ class TaskListener(TaskConfig):
         else:
             await update_status_message(self.chat)
 
-        async with queue_dict_lock:
-            if self.mid in queued_dl:
-                queued_dl[self.mid].set()
-                del queued_dl[self.mid]
-            if self.mid in queued_up:
-                queued_up[self.mid].set()
-                del queued_up[self.mid]
-            if self.mid in non_queued_dl:
-                non_queued_dl.remove(self.mid)
-            if self.mid in non_queued_up:
-                non_queued_up.remove(self.mid)
-
+        await release_task(self.mid)
         await start_from_queued()
         await sleep(3)
         await clean_download(self.dir)
@@ -8,8 +8,6 @@ from bot import (
     config_dict,
     aria2_options,
     aria2c_global,
-    non_queued_dl,
-    queue_dict_lock,
 )
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons, sync_to_async
 from bot.helper.ext_utils.task_manager import check_running_tasks
@@ -32,7 +30,7 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time):
     if TORRENT_TIMEOUT := config_dict["TORRENT_TIMEOUT"]:
         a2c_opt["bt-stop-timeout"] = f"{TORRENT_TIMEOUT}"
 
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="aria2")
     if add_to_queue:
         if listener.link.startswith("magnet:"):
             a2c_opt["pause-metadata"] = "true"
@@ -83,8 +81,6 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time):
         await event.wait()
         if listener.isCancelled:
             return
-        async with queue_dict_lock:
-            non_queued_dl.add(listener.mid)
         async with task_dict_lock:
             task = task_dict[listener.mid]
             task.queued = False
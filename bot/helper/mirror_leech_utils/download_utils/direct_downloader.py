@@ -7,8 +7,6 @@ from bot import (
     aria2c_global,
     task_dict,
     task_dict_lock,
-    non_queued_dl,
-    queue_dict_lock,
 )
 from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.status_utils import get_readable_file_size
@@ -64,7 +62,7 @@ async def add_direct_download(listener, path):
         return
 
     gid = token_urlsafe(10)
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="aria2")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -79,8 +77,6 @@ async def add_direct_download(listener, path):
         await event.wait() # type: ignore
         if listener.isCancelled:
             return
-        async with queue_dict_lock:
-            non_queued_dl.add(listener.mid)
 
     a2c_opt = {**aria2_options}
     [
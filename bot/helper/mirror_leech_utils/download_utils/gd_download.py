@@ -2,8 +2,6 @@ from secrets import token_urlsafe
 
 from bot import (
     LOGGER,
-    non_queued_dl,
-    queue_dict_lock,
     task_dict,
     task_dict_lock,
 )
@@ -75,7 +73,7 @@ async def add_gd_download(listener, path):
     (
         add_to_queue,
         event
-    ) = await check_running_tasks(listener)
+    ) = await check_running_tasks(listener, engine="gdrive")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -90,8 +88,6 @@ async def add_gd_download(listener, path):
         await event.wait() # type: ignore
         if listener.isCancelled:
             return
-        async with queue_dict_lock:
-            non_queued_dl.add(listener.mid)
 
     drive = gdDownload(
         listener,
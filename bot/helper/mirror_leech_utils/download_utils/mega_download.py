@@ -17,8 +17,6 @@ from bot import (
     config_dict,
     task_dict,
     task_dict_lock,
-    non_queued_dl,
-    queue_dict_lock
 )
 from bot.helper.ext_utils.links_utils import get_mega_link_type
 from bot.helper.ext_utils.bot_utils import (
@@ -289,7 +287,7 @@ async def add_mega_download(listener, path):
     (
         added_to_queue,
         event
-    ) = await check_running_tasks(listener)
+    ) = await check_running_tasks(listener, engine="mega")
     if added_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -327,8 +325,6 @@ async def add_mega_download(listener, path):
             gid,
             "dl",
         )
-    async with queue_dict_lock:
-        non_queued_dl.add(listener.mid)
 
     if from_queue:
         LOGGER.info(f"Start Queued Download from Mega: {listener.name}")
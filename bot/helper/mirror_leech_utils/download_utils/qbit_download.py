@@ -5,12 +5,12 @@ from bot import (
     task_dict,
     task_dict_lock,
     qbittorrent_client,
+    QbTorrents,
     LOGGER,
     config_dict,
-    non_queued_dl,
-    queue_dict_lock,
 )
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons, sync_to_async
+from bot.helper.ext_utils.qbit_sync import qb_sync
 from bot.helper.ext_utils.task_manager import check_running_tasks
 from bot.helper.listeners.qbit_listener import onDownloadStart
 from bot.helper.mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
@@ -46,7 +46,7 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
         if await aiopath.exists(listener.link):
             url = None
             tpath = listener.link
-        add_to_queue, event = await check_running_tasks(listener)
+        add_to_queue, event = await check_running_tasks(listener, engine="qbit")
         op = await sync_to_async(
             qbittorrent_client.torrents_add,
             url,
@@ -95,24 +95,19 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
                 metamsg = "Downloading Metadata, wait then you can select files. Use torrent file to avoid this wait."
                 meta = await sendMessage(listener.message, metamsg)
                 while True:
-                    tor_info = await sync_to_async(
-                        qbittorrent_client.torrents_info, tag=f"{listener.mid}"
-                    )
-                    if len(tor_info) == 0:
+                    await sleep(1)
+                    if f"{listener.mid}" not in QbTorrents:
                         await deleteMessage(meta)
                         return
-                    try:
-                        tor_info = tor_info[0]
-                        if tor_info.state not in [
-                            "metaDL",
-                            "checkingResumeData",
-                            "pausedDL",
-                        ]:
-                            await deleteMessage(meta)
-                            break
-                    except:
+                    info = qb_sync.get_by_tag(f"{listener.mid}")
+                    if info is not None and info.state not in [
+                        "metaDL",
+                        "checkingResumeData",
+                        "pausedDL",
+                    ]:
+                        tor_info = info
                         await deleteMessage(meta)
-                        return
+                        break
 
             ext_hash = tor_info.hash
             if not add_to_queue:
@@ -129,8 +124,6 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
             await event.wait()
             if listener.isCancelled:
                 return
-            async with queue_dict_lock:
-                non_queued_dl.add(listener.mid)
             async with task_dict_lock:
                 task_dict[listener.mid].queued = False
 
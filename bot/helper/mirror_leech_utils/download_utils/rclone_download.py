@@ -2,7 +2,7 @@ from asyncio import gather
 from json import loads
 from secrets import token_urlsafe
 
-from bot import task_dict, task_dict_lock, queue_dict_lock, non_queued_dl, LOGGER
+from bot import task_dict, task_dict_lock, LOGGER
 from bot.helper.ext_utils.bot_utils import cmd_exec
 from bot.helper.ext_utils.task_manager import check_running_tasks, limit_checker
 from bot.helper.ext_utils.status_utils import get_readable_file_size
@@ -91,7 +91,7 @@ async def add_rclone_download(listener, path):
     (
         add_to_queue,
         event
-    ) = await check_running_tasks(listener)
+    ) = await check_running_tasks(listener, engine="rclone")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -106,8 +106,6 @@ async def add_rclone_download(listener, path):
         await event.wait() # type: ignore
         if listener.isCancelled:
             return
-        async with queue_dict_lock:
-            non_queued_dl.add(listener.mid)
 
     RCTransfer = RcloneTransferHelper(listener)
     async with task_dict_lock:
@@ -2,7 +2,7 @@
 from time import time
 from asyncio import Lock
 
-from bot import LOGGER, task_dict, task_dict_lock, non_queued_dl, queue_dict_lock
+from bot import LOGGER, task_dict, task_dict_lock
 from bot.helper.mirror_leech_utils.status_utils.switch_status import SwitchStatus
 from bot.helper.mirror_leech_utils.status_utils.queue_status import QueueStatus
 from bot.helper.switch_helper.message_utils import sendStatusMessage
@@ -92,7 +92,7 @@ class SwitchDownloadHelper:
                     await self._listener.onDownloadError(msg, button)
                     return
 
-                add_to_queue, event = await check_running_tasks(self._listener)
+                add_to_queue, event = await check_running_tasks(self._listener, engine="switch")
                 if add_to_queue:
                     LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
                     async with task_dict_lock:
@@ -105,8 +105,6 @@ class SwitchDownloadHelper:
                     await event.wait()
                     if self._listener.isCancelled:
                         return
-                    async with queue_dict_lock:
-                        non_queued_dl.add(self._listener.mid)
 
                 await self._onDownloadStart(gid, add_to_queue)
                 await self._download(message, path)
@@ -6,8 +6,6 @@ from bot import (
     LOGGER,
     task_dict,
     task_dict_lock,
-    non_queued_dl,
-    queue_dict_lock,
     tg,
 )
 from bot.helper.ext_utils.task_manager import check_running_tasks, stop_duplicate_check
@@ -120,7 +118,7 @@ class TelegramDownloadHelper:
                     await self._listener.onDownloadError(msg, button)
                     return
 
-                add_to_queue, event = await check_running_tasks(self._listener)
+                add_to_queue, event = await check_running_tasks(self._listener, engine="telegram")
                 if add_to_queue:
                     LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
                     async with task_dict_lock:
@@ -133,8 +131,6 @@ class TelegramDownloadHelper:
                     await event.wait()
                     if self._listener.isCancelled:
                         return
-                    async with queue_dict_lock:
-                        non_queued_dl.add(self._listener.mid)
 
                 await self._onDownloadStart(gid, add_to_queue)
                 await self._download(message, path)
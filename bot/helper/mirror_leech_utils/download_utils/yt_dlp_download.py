@@ -4,7 +4,7 @@ from re import search as re_search
 from secrets import token_urlsafe
 from yt_dlp import YoutubeDL, DownloadError
 
-from bot import task_dict_lock, task_dict, non_queued_dl, queue_dict_lock
+from bot import task_dict_lock, task_dict
 from bot.helper.ext_utils.bot_utils import sync_to_async, async_to_sync
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.ext_utils.task_manager import check_running_tasks, limit_checker, stop_duplicate_check
@@ -335,7 +335,7 @@ class YoutubeDLHelper:
             )
             return
 
-        add_to_queue, event = await check_running_tasks(self._listener)
+        add_to_queue, event = await check_running_tasks(self._listener, engine="ytdlp")
         if add_to_queue:
             LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
             async with task_dict_lock:
@@ -345,8 +345,6 @@ class YoutubeDLHelper:
             await event.wait()
             if self._listener.isCancelled:
                 return
-            async with queue_dict_lock:
-                non_queued_dl.add(self._listener.mid)
             LOGGER.info(f"Start Queued Download from YT_DLP: {self._listener.name}")
             await self._onDownloadStart(True)
 
@@ -1,6 +1,6 @@
 from googleapiclient.errors import HttpError
 from logging import getLogger
-from os import path as ospath
+from os import path as ospath, makedirs, remove
 from tenacity import (
     retry,
     wait_exponential,
@@ -8,18 +8,23 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
-from time import time
+from time import sleep, time
 
 from bot.helper.ext_utils.bot_utils import async_to_sync
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+BATCH_SIZE = 50
+
 
 class gdClone(GoogleDriveHelper):
     def __init__(self, listener):
         self.listener = listener
         self._start_time = time()
+        self._state = {"folders": {}, "files": []}
+        self._copied = set()
+        self._state_path = ""
         super().__init__()
         self.is_cloning = True
         self.user_setting()
@@ -58,7 +63,7 @@ class gdClone(GoogleDriveHelper):
             meta = self.getFileMetadata(file_id)
             mime_type = meta.get("mimeType")
             if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                dir_id = self.create_directory(meta.get("name"), self.listener.upDest)
+                dir_id = self._load_state(meta)
                 self._cloneFolder(meta.get("name"), meta.get("id"), dir_id)
                 durl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
                 if self.listener.isCancelled:
@@ -66,7 +71,9 @@ class gdClone(GoogleDriveHelper):
                     self.service.files().delete(
                         fileId=dir_id, supportsAllDrives=True
                     ).execute()
+                    self._remove_state()
                     return None, None, None, None, None
+                self._remove_state()
                 mime_type = "Folder"
                 self.listener.size = self.proc_bytes
             else:
@@ -102,28 +109,183 @@ class gdClone(GoogleDriveHelper):
             async_to_sync(self.listener.onUploadError, msg)
             return None, None, None, None, None
 
+    def _load_state(self, meta):
+        """
+        The clone state is a journal appended to as the clone goes: one
+        "d <source id> <dest id>" line per created folder and one "f <id>" line
+        per copied file.
+        """
+        self._state_path = f"clone_states/{meta.get('id')}_{self.listener.upDest}.log"
+        if ospath.exists(self._state_path):
+            try:
+                state = {"folders": {}, "files": []}
+                with open(self._state_path, "r") as f:
+                    for line in f:
+                        # the last line is cut short if the bot stopped writing it
+                        if not line.endswith("\n"):
+                            break
+                        kind, *ids = line.split()
+                        if kind == "d":
+                            state["folders"][ids[0]] = ids[1]
+                        elif kind == "f":
+                            state["files"].append(ids[0])
+                dir_id = state["folders"][meta.get("id")]
+                if not (
+                    self.service.files()
+                    .get(fileId=dir_id, supportsAllDrives=True, fields="trashed")
+                    .execute()
+                    .get("trashed")
+                ):
+                    LOGGER.info(f"Resuming clone of {meta.get('name')} into {dir_id}")
+                    self._state = state
+                    self._copied = set(state["files"])
+                    return dir_id
+            except Exception as e:
+                LOGGER.error(f"Can't resume clone of {meta.get('name')}: {e}")
+        dir_id = self.create_directory(meta.get("name"), self.listener.upDest)
+        self._state["folders"][meta.get("id")] = dir_id
+        makedirs("clone_states", exist_ok=True)
+        with open(self._state_path, "w") as f:
+            f.write(f"d {meta.get('id')} {dir_id}\n")
+        return dir_id
+
+    def _save_state(self, lines):
+        if lines:
+            with open(self._state_path, "a") as f:
+                f.write("".join(f"{line}\n" for line in lines))
+
+    def _remove_state(self):
+        if self._state_path and ospath.exists(self._state_path):
+            remove(self._state_path)
+
     def _cloneFolder(self, folder_name, folder_id, dest_id):
-        LOGGER.info(f"Syncing: {folder_name}")
-        files = self.getFilesByFolderId(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
-            if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._cloneFolder(file_path, file.get("id"), current_dir_id)
-            elif (
-                not file.get("name")
-                .lower()
-                .endswith(tuple(self.listener.extensionFilter))
-            ):
-                self.total_files += 1
-                self._copyFile(file.get("id"), dest_id)
-                self.proc_bytes += int(file.get("size", 0))
-                self.total_time = int(time() - self._start_time)
-            if self.listener.isCancelled:
+        LOGGER.info(f"Listing: {folder_name}")
+        folders = self._state["folders"]
+        files = []
+        level = [folder_id]
+        while level and not self.listener.isCancelled:
+            listed = {}
+            self.run_workers(
+                lambda fid: listed.update({fid: self.getFilesByFolderId(fid)}),
+                [(fid,) for fid in level],
+            )
+            level = []
+            new_folders = []
+            for parent_id, items in listed.items():
+                for file in items:
+                    if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                        self.total_folders += 1
+                        level.append(file.get("id"))
+                        if file.get("id") not in folders:
+                            new_folders.append(
+                                (file.get("id"), file.get("name"), parent_id)
+                            )
+                    elif (
+                        not file.get("name")
+                        .lower()
+                        .endswith(tuple(self.listener.extensionFilter))
+                    ):
+                        self.total_files += 1
+                        if file.get("id") in self._copied:
+                            self.proc_bytes += int(file.get("size", 0))
+                        else:
+                            files.append((file, parent_id))
+            self.run_workers(self._create_folder, new_folders)
+        if self.listener.isCancelled:
+            return
+        LOGGER.info(f"Copying {len(files)} files of: {folder_name}")
+        self.run_workers(
+            self._copyBatch,
+            [(files[i : i + BATCH_SIZE],) for i in range(0, len(files), BATCH_SIZE)],
+        )
+
+    def _create_folder(self, folder_id, name, parent_id):
+        dir_id = self.create_directory(name, self._state["folders"][parent_id])
+        with self._workers_lock:
+            self._state["folders"][folder_id] = dir_id
+            self._save_state([f"d {folder_id} {dir_id}"])
+
+    def _copyBatch(self, items):
+        pending = {file.get("id"): (file, parent_id) for file, parent_id in items}
+        retries = 0
+        while pending and not self.listener.isCancelled:
+            errors = {}
+            copied = []
+
+            def callback(request_id, response, exception):
+                if request_id not in pending:
+                    return
+                if exception is not None:
+                    errors[request_id] = exception
+                    return
+                errors.pop(request_id, None)
+                file = pending.pop(request_id)[0]
+                copied.append(f"f {request_id}")
+                with self._workers_lock:
+                    self._copied.add(request_id)
+                    self.proc_bytes += int(file.get("size", 0))
+
+            try:
+                self._executeBatch(pending, callback)
+            finally:
+                with self._workers_lock:
+                    self.total_time = int(time() - self._start_time)
+                    self._save_state(copied)
+            switch = False
+            for file_id, err in errors.items():
+                reason = ""
+                if err.resp.get("content-type", "").startswith("application/json"):
+                    reason = (
+                        eval(err.content).get("error").get("errors")[0].get("reason")
+                    )
+                if reason == "cannotCopyFile":
+                    LOGGER.error(err)
+                    pending.pop(file_id)
+                elif reason in ["userRateLimitExceeded", "dailyLimitExceeded"]:
+                    switch = True
+                elif reason != "rateLimitExceeded" and err.resp.status not in [
+                    500,
+                    502,
+                    503,
+                    504,
+                    429,
+                ]:
+                    raise err
+            if not pending:
                 break
+            if switch:
+                if not self.use_sa:
+                    raise next(iter(errors.values()))
+                if self.sa_count >= self.sa_number:
+                    LOGGER.info(
+                        f"Reached maximum number of service accounts switching, which is {self.sa_count}"
+                    )
+                    raise next(iter(errors.values()))
+                self.switchServiceAccount()
+            elif retries < 10:
+                retries += 1
+                sleep(min(2**retries, 30))
+            else:
+                raise next(iter(errors.values()))
+
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(Exception),
+    )
+    def _executeBatch(self, pending, callback):
+        batch = self.service.new_batch_http_request(callback=callback)
+        for file_id, (file, parent_id) in pending.items():
+            batch.add(
+                self.service.files().copy(
+                    fileId=file_id,
+                    body={"parents": [self._state["folders"][parent_id]]},
+                    supportsAllDrives=True,
+                    fields="id",
+                ),
+                request_id=file_id,
+            )
+        batch.execute()
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
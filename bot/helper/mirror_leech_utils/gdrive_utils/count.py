@@ -2,6 +2,7 @@ from logging import getLogger
 from tenacity import RetryError
 
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.index import drive_index
 
 LOGGER = getLogger(__name__)
 
@@ -47,7 +48,10 @@ class gdCount(GoogleDriveHelper):
         LOGGER.info(f"Counting: {name}")
         mime_type = meta.get("mimeType")
         if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-            self._gDrive_directory(meta)
+            if (tree := drive_index.tree(meta["id"])) is not None:
+                self.total_files, self.total_folders, self.proc_bytes = tree
+            else:
+                self._gDrive_directory(meta)
             mime_type = "Folder"
         else:
             if mime_type is None:
@@ -2,7 +2,7 @@ from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 from io import FileIO
 from logging import getLogger
-from os import makedirs, path as ospath
+from os import makedirs, path as ospath, open as osopen, close as osclose, pwrite, O_WRONLY
 from tenacity import (
     retry,
     wait_exponential,
@@ -10,6 +10,9 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
+from time import sleep
+
+from bot import config_dict
 
 from bot.helper.ext_utils.bot_utils import async_to_sync
 from bot.helper.ext_utils.bot_utils import setInterval
@@ -17,6 +20,8 @@ from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+RANGE_SIZE = 32 * 1024 * 1024
+
 
 class gdDownload(GoogleDriveHelper):
     def __init__(self, listener, path):
@@ -37,7 +42,11 @@ class gdDownload(GoogleDriveHelper):
             else:
                 makedirs(self._path, exist_ok=True)
                 self._download_file(
-                    file_id, self._path, self.listener.name, meta.get("mimeType")
+                    file_id,
+                    self._path,
+                    self.listener.name,
+                    meta.get("mimeType"),
+                    int(meta.get("size", 0)),
                 )
         except Exception as err:
             if isinstance(err, RetryError):
@@ -63,6 +72,11 @@ class gdDownload(GoogleDriveHelper):
             async_to_sync(self.listener.onDownloadComplete)
 
     def _download_folder(self, folder_id, path, folder_name):
+        jobs = []
+        self._list_folder(folder_id, path, folder_name, jobs)
+        self.run_workers(self._download_file, jobs)
+
+    def _list_folder(self, folder_id, path, folder_name, jobs):
         folder_name = folder_name.replace("/", "")
         if not ospath.exists(f"{path}/{folder_name}"):
             makedirs(f"{path}/{folder_name}")
@@ -81,11 +95,13 @@ class gdDownload(GoogleDriveHelper):
             else:
                 mime_type = item.get("mimeType")
             if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
+                self._list_folder(file_id, path, filename, jobs)
             elif not ospath.isfile(
-                f"{path}{filename}"
+                f"{path}/{filename}"
             ) and not filename.lower().endswith(tuple(self.listener.extensionFilter)):
-                self._download_file(file_id, path, filename, mime_type)
+                jobs.append(
+                    (file_id, path, filename, mime_type, int(item.get("size", 0)))
+                )
             if self.listener.isCancelled:
                 break
 
@@ -94,7 +110,7 @@ class gdDownload(GoogleDriveHelper):
         stop=stop_after_attempt(3),
         retry=(retry_if_exception_type(Exception)),
     )
-    def _download_file(self, file_id, path, filename, mime_type):
+    def _download_file(self, file_id, path, filename, mime_type, size=0):
         request = self.service.files().get_media(fileId=file_id, supportsAllDrives=True)
         filename = filename.replace("/", "")
         if len(filename.encode()) > 255:
@@ -104,6 +120,13 @@ class gdDownload(GoogleDriveHelper):
                 self.listener.name = filename
         if self.listener.isCancelled:
             return
+        if (
+            size > 2 * RANGE_SIZE
+            and config_dict["GDRIVE_WORKERS"] > 1
+            and getattr(self._local, "worker", None) is None
+        ):
+            self._download_ranges(file_id, f"{path}/{filename}", size)
+            return
         fh = FileIO(f"{path}/{filename}", "wb")
         downloader = MediaIoBaseDownload(fh, request, chunksize=50 * 1024 * 1024)
         done = False
@@ -139,9 +162,66 @@ class gdDownload(GoogleDriveHelper):
                             self.switchServiceAccount()
                             LOGGER.info(f"Got: {reason}, Trying Again...")
                             return self._download_file(
-                                file_id, path, filename, mime_type
+                                file_id, path, filename, mime_type, size
                             )
                     else:
                         LOGGER.error(f"Got: {reason}")
                         raise err
-        self.file_processed_bytes = 0
+        if not self.listener.isCancelled:
+            self.file_done(self.status.total_size if self.status else 0)
+
+    def _download_ranges(self, file_id, file_path, size):
+        with open(file_path, "wb") as f:
+            f.truncate(size)
+        fd = osopen(file_path, O_WRONLY)
+        try:
+            self.run_workers(
+                self._download_range,
+                [
+                    (file_id, fd, start, min(start + RANGE_SIZE, size) - 1)
+                    for start in range(0, size, RANGE_SIZE)
+                ],
+            )
+        finally:
+            osclose(fd)
+
+    def _download_range(self, file_id, fd, start, end):
+        retries = 0
+        while not self.listener.isCancelled:
+            request = self.service.files().get_media(
+                fileId=file_id, supportsAllDrives=True
+            )
+            request.headers["range"] = f"bytes={start}-{end}"
+            try:
+                content = request.execute()
+            except HttpError as err:
+                if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
+                    retries += 1
+                    sleep(min(2**retries, 30))
+                    continue
+                reason = ""
+                if err.resp.get("content-type", "").startswith("application/json"):
+                    reason = (
+                        eval(err.content).get("error").get("errors")[0].get("reason")
+                    )
+                if (
+                    reason not in ["downloadQuotaExceeded", "dailyLimitExceeded"]
+                    or not self.use_sa
+                ):
+                    raise err
+                if self.sa_count >= self.sa_number:
+                    LOGGER.info(
+                        f"Reached maximum number of service accounts switching, which is {self.sa_count}"
+                    )
+                    raise err
+                self.switchServiceAccount()
+                LOGGER.info(f"Got: {reason}, Trying Again...")
+                continue
+            if len(content) != end - start + 1:
+                raise Exception(
+                    f"Got {len(content)} bytes for range {start}-{end} of {file_id}"
+                )
+            pwrite(fd, content, start)
+            with self._workers_lock:
+                self.proc_bytes += len(content)
+            return
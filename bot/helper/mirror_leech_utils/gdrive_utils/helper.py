@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from google_auth_httplib2 import AuthorizedHttp
@@ -6,6 +7,7 @@ from logging import getLogger, ERROR
 from os import path as ospath, listdir
 from pickle import load as pload
 from random import randrange
+from queue import SimpleQueue, Empty
 from re import search as re_search
 from tenacity import (
     retry,
@@ -13,6 +15,7 @@ from tenacity import (
     stop_after_attempt,
     retry_if_exception_type,
 )
+from threading import Lock, local
 from urllib.parse import parse_qs, urlparse
 
 from bot import config_dict
@@ -22,8 +25,45 @@ LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
 
 
+class DriveWorker:
+    def __init__(self):
+        self.service = None
+        self.sa_index = 0
+        self.sa_count = 1
+        self.status = None
+        self.file_processed_bytes = 0
+
+
+class WorkerAttribute:
+    """
+    Helper attribute that each worker thread started by run_workers keeps its
+    own copy of, so the single-threaded transfer code can be reused as is.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(getattr(obj._local, "worker", None) or obj._main, self.name)
+
+    def __set__(self, obj, value):
+        setattr(getattr(obj._local, "worker", None) or obj._main, self.name, value)
+
+
 class GoogleDriveHelper:
+    service = WorkerAttribute()
+    sa_index = WorkerAttribute()
+    sa_count = WorkerAttribute()
+    status = WorkerAttribute()
+    file_processed_bytes = WorkerAttribute()
+
     def __init__(self):
+        self._local = local()
+        self._main = DriveWorker()
+        self._workers = []
+        self._workers_lock = Lock()
         self._OAUTH_SCOPE = ["https://www.googleapis.com/auth/drive"]
         self.token_path = "token.pickle"
         self.G_DRIVE_DIR_MIME_TYPE = "application/vnd.google-apps.folder"
@@ -60,21 +100,32 @@ class GoogleDriveHelper:
         return self.proc_bytes
 
     async def progress(self):
-        if self.status is not None:
-            chunk_size = (
-                self.status.total_size * self.status.progress()
-                - self.file_processed_bytes
-            )
-            self.file_processed_bytes = self.status.total_size * self.status.progress()
-            self.proc_bytes += chunk_size
+        active = False
+        with self._workers_lock:
+            for state in [self._main, *self._workers]:
+                if (status := state.status) is not None:
+                    active = True
+                    processed = status.total_size * status.progress()
+                    self.proc_bytes += processed - state.file_processed_bytes
+                    state.file_processed_bytes = processed
+        if active or self._workers:
             self.total_time += self.update_interval
 
-    def authorize(self):
+    def file_done(self, size):
+        with self._workers_lock:
+            self.proc_bytes += size - self.file_processed_bytes
+            self.file_processed_bytes = 0
+            self.status = None
+
+    def authorize(self, sa_index=None):
         credentials = None
         if self.use_sa:
             json_files = listdir("accounts")
             self.sa_number = len(json_files)
-            self.sa_index = randrange(self.sa_number)
+            if sa_index is None:
+                self.sa_index = randrange(self.sa_number)
+            else:
+                self.sa_index = sa_index % self.sa_number
             LOGGER.info(f"Authorizing with {json_files[self.sa_index]} service account")
             credentials = service_account.Credentials.from_service_account_file(
                 f"accounts/{json_files[self.sa_index]}", scopes=self._OAUTH_SCOPE
@@ -96,7 +147,53 @@ class GoogleDriveHelper:
             self.sa_index += 1
         self.sa_count += 1
         LOGGER.info(f"Switching to {self.sa_index} index")
-        self.service = self.authorize()
+        self.service = self.authorize(self.sa_index)
+
+    def run_workers(self, func, jobs, workers=None):
+        """
+        Call func(*job) for every job from a pool of worker threads. Each worker
+        authorizes its own service, starting from its own service account, and
+        switches accounts on its own when it hits rate limits.
+        """
+        if workers is None:
+            workers = config_dict["GDRIVE_WORKERS"]
+        workers = max(min(workers, len(jobs)), 1)
+        if workers == 1:
+            for job in jobs:
+                if self.listener.isCancelled:
+                    break
+                func(*job)
+            return
+        queue = SimpleQueue()
+        for job in jobs:
+            queue.put(job)
+        errors = []
+        first_index = self.sa_index
+
+        def work(index):
+            worker = DriveWorker()
+            self._local.worker = worker
+            with self._workers_lock:
+                self._workers.append(worker)
+            try:
+                worker.service = self.authorize(first_index + index)
+                while not errors and not self.listener.isCancelled:
+                    try:
+                        job = queue.get_nowait()
+                    except Empty:
+                        break
+                    func(*job)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self._local.worker = None
+                with self._workers_lock:
+                    self._workers.remove(worker)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(work, range(workers)))
+        if errors:
+            raise errors[0]
 
     def getIdFromUrl(self, link, user_id=""):
         if user_id and link.startswith("mtp:"):
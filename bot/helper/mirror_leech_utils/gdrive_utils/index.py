@@ -0,0 +1,330 @@
+from logging import getLogger
+from sqlite3 import connect
+from threading import RLock, Thread
+from time import time
+
+from bot import config_dict, DRIVES_IDS
+from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+
+LOGGER = getLogger(__name__)
+
+SHORTCUT_MIME_TYPE = "application/vnd.google-apps.shortcut"
+FIELDS = "id, name, mimeType, size, parents, trashed, ownedByMe"
+
+
+class DriveIndex(GoogleDriveHelper):
+    """
+    On-disk index of the drives in DRIVES_IDS. A drive is listed once in the
+    background, folder ids with all their subfolders, and then kept up to date
+    with changes.list (folder ids, which have no change feed, are listed again)
+    whenever it is older than DRIVE_INDEX_TTL seconds. Updates run in the
+    background too, lookups meanwhile answer from the older index. Every lookup
+    returns None when the index can't answer, so callers fall back to live
+    queries.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._db = None
+        self._lock = RLock()
+        self._building = set()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = connect("drive_index.db", check_same_thread=False)
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    id TEXT, drive TEXT, name TEXT, mime TEXT, size INTEGER,
+                    parent TEXT, PRIMARY KEY (drive, id)
+                );
+                CREATE INDEX IF NOT EXISTS items_name ON items (drive, name COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS items_parent ON items (drive, parent);
+                CREATE TABLE IF NOT EXISTS drives (
+                    id TEXT PRIMARY KEY, root TEXT, token TEXT, synced REAL
+                );
+                """
+            )
+        return self._db
+
+    @staticmethod
+    def _kind(drive_id):
+        if drive_id == "root":
+            return "root"
+        return "drive" if len(drive_id) <= 23 else "folder"
+
+    def _service(self):
+        self.use_sa = config_dict["USE_SERVICE_ACCOUNTS"] and len(DRIVES_IDS) <= 1
+        return self.authorize()
+
+    def _list_items(self, service, drive_id):
+        kind = self._kind(drive_id)
+        kwargs = {
+            "supportsAllDrives": True,
+            "includeItemsFromAllDrives": True,
+            "spaces": "drive",
+            "pageSize": 1000,
+            "fields": f"nextPageToken, files({FIELDS})",
+        }
+        if kind == "root":
+            kwargs["q"] = "'me' in owners and trashed = false"
+        elif kind == "drive":
+            kwargs.update(
+                {"q": "trashed = false", "corpora": "drive", "driveId": drive_id}
+            )
+        else:
+            # a folder has no query for all its descendants, list level by level
+            folders = [drive_id]
+            while folders:
+                kwargs["q"] = f"'{folders.pop()}' in parents and trashed = false"
+                for file in self._list_pages(service, kwargs):
+                    if file["mimeType"] == self.G_DRIVE_DIR_MIME_TYPE:
+                        folders.append(file["id"])
+                    yield file
+            return
+        yield from self._list_pages(service, kwargs)
+
+    @staticmethod
+    def _list_pages(service, kwargs):
+        page_token = None
+        while True:
+            response = service.files().list(pageToken=page_token, **kwargs).execute()
+            yield from response.get("files", [])
+            if (page_token := response.get("nextPageToken")) is None:
+                break
+
+    @staticmethod
+    def _row(drive_id, file):
+        parents = file.get("parents") or [""]
+        size = file.get("size")
+        return (
+            file["id"],
+            drive_id,
+            file["name"],
+            file["mimeType"],
+            int(size) if size is not None else None,
+            parents[0],
+        )
+
+    def _refresh_thread(self, drive_id, token=None):
+        try:
+            if token is None:
+                self._build(drive_id)
+            else:
+                self._sync_changes(drive_id, token)
+        except Exception as e:
+            LOGGER.error(f"Drive index update failed for {drive_id}: {e}")
+        finally:
+            self._building.discard(drive_id)
+
+    def _build(self, drive_id):
+        service = self._service()
+        kind = self._kind(drive_id)
+        token = None
+        if kind == "root":
+            root = service.files().get(fileId="root", fields="id").execute()["id"]
+            token = service.changes().getStartPageToken().execute()
+        else:
+            root = drive_id
+            if kind == "drive":
+                token = (
+                    service.changes()
+                    .getStartPageToken(driveId=drive_id, supportsAllDrives=True)
+                    .execute()
+                )
+        rows = [
+            self._row(drive_id, file)
+            for file in self._list_items(service, drive_id)
+        ]
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM items WHERE drive = ?", (drive_id,))
+                db.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO drives VALUES (?, ?, ?, ?)",
+                    (
+                        drive_id,
+                        root,
+                        token["startPageToken"] if token else None,
+                        time(),
+                    ),
+                )
+        LOGGER.info(f"Indexed {len(rows)} items of drive: {drive_id}")
+
+    def _sync_changes(self, drive_id, token):
+        service = self._service()
+        kwargs = {
+            "spaces": "drive",
+            "pageSize": 1000,
+            "fields": f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FIELDS}))",
+        }
+        if self._kind(drive_id) == "drive":
+            kwargs.update(
+                {
+                    "driveId": drive_id,
+                    "supportsAllDrives": True,
+                    "includeItemsFromAllDrives": True,
+                }
+            )
+        removed = []
+        rows = []
+        while True:
+            response = service.changes().list(pageToken=token, **kwargs).execute()
+            for change in response.get("changes", []):
+                file = change.get("file")
+                if (
+                    change.get("removed")
+                    or file is None
+                    or file.get("trashed")
+                    or drive_id == "root"
+                    and not file.get("ownedByMe")
+                ):
+                    removed.append((drive_id, change["fileId"]))
+                else:
+                    rows.append(self._row(drive_id, file))
+            if new_token := response.get("newStartPageToken"):
+                break
+            token = response["nextPageToken"]
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "DELETE FROM items WHERE drive = ? AND id = ?", removed
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                db.execute(
+                    "UPDATE drives SET token = ?, synced = ? WHERE id = ?",
+                    (new_token, time(), drive_id),
+                )
+
+    def _ensure(self, drive_id):
+        if not (ttl := config_dict["DRIVE_INDEX_TTL"]) or drive_id not in DRIVES_IDS:
+            return None
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT root, token, synced FROM drives WHERE id = ?", (drive_id,))
+                .fetchone()
+            )
+            token = None
+            if row is not None:
+                root, token, synced = row
+                if time() - synced < ttl:
+                    return root
+            if drive_id not in self._building:
+                self._building.add(drive_id)
+                Thread(
+                    target=self._refresh_thread, args=(drive_id, token), daemon=True
+                ).start()
+            return None if row is None else root
+
+    def _drive_of(self, folder_id):
+        with self._lock:
+            db = self._connect()
+            if folder_id == "root":
+                return "root"
+            if db.execute("SELECT 1 FROM drives WHERE id = ?", (folder_id,)).fetchone():
+                return folder_id
+            row = db.execute(
+                "SELECT drive FROM items WHERE id = ? AND mime = ?",
+                (folder_id, self.G_DRIVE_DIR_MIME_TYPE),
+            ).fetchone()
+            return row[0] if row else None
+
+    def _files(self, rows):
+        files = []
+        for id_, name, mime, size, parent in rows:
+            file = {"id": id_, "name": name, "mimeType": mime, "parents": [parent]}
+            if mime != self.G_DRIVE_DIR_MIME_TYPE:
+                file["size"] = str(size or 0)
+            files.append(file)
+        return files
+
+    def search(self, drive_id, file_name, stop_dup, recursive, item_type=""):
+        if (root := self._ensure(drive_id)) is None:
+            return None
+        query = "SELECT id, name, mime, size, parent FROM items WHERE drive = ?"
+        params = [drive_id]
+        if not recursive:
+            query += " AND parent = ?"
+            params.append(root)
+        if stop_dup:
+            query += " AND name = ?"
+            params.append(file_name)
+        else:
+            for name in file_name.split():
+                name = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                query += " AND name LIKE ? ESCAPE '\\'"
+                params.append(f"%{name}%")
+            if item_type == "files":
+                query += " AND mime != ?"
+                params.append(self.G_DRIVE_DIR_MIME_TYPE)
+            elif item_type == "folders":
+                query += " AND mime = ?"
+                params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        query += " ORDER BY mime != ?, name COLLATE NOCASE LIMIT 200"
+        params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        with self._lock:
+            return self._files(self._connect().execute(query, params).fetchall())
+
+    def children(self, folder_id, item_type=""):
+        if (drive_id := self._drive_of(folder_id)) is None:
+            return None
+        if (root := self._ensure(drive_id)) is None:
+            return None
+        if folder_id in ["root", drive_id]:
+            folder_id = root
+        query = "SELECT id, name, mime, size, parent FROM items WHERE drive = ? AND parent = ?"
+        params = [drive_id, folder_id]
+        if item_type == "folders":
+            query += " AND mime = ?"
+            params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        elif item_type == "files":
+            query += " AND mime != ?"
+            params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        query += " ORDER BY mime != ?, name COLLATE NOCASE"
+        params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        with self._lock:
+            return self._files(self._connect().execute(query, params).fetchall())
+
+    def tree(self, folder_id):
+        if (drive_id := self._drive_of(folder_id)) is None:
+            return None
+        if self._ensure(drive_id) is None:
+            return None
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    """
+                    WITH RECURSIVE sub(id) AS (
+                        SELECT ?
+                        UNION
+                        SELECT items.id FROM items JOIN sub ON items.parent = sub.id
+                        WHERE items.drive = ?
+                    )
+                    SELECT mime, size FROM items
+                    WHERE drive = ? AND id IN sub AND id != ?
+                    """,
+                    (folder_id, drive_id, drive_id, folder_id),
+                )
+                .fetchall()
+            )
+        files = folders = size = 0
+        for mime, fsize in rows:
+            if mime == SHORTCUT_MIME_TYPE:
+                return None
+            if mime == self.G_DRIVE_DIR_MIME_TYPE:
+                folders += 1
+            else:
+                files += 1
+                size += fsize or 0
+        return files, folders, size
+
+
+drive_index = DriveIndex()
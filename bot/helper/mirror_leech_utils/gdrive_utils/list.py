@@ -4,14 +4,17 @@ from functools import partial
 from logging import getLogger
 from natsort import natsorted
 from tenacity import RetryError
+from threading import Lock
 from time import time
 from swibots import CallbackQueryHandler, regexp, user
 
 from bot import config_dict
-from bot.helper.ext_utils.bot_utils import update_user_ldata
+from bot.helper.ext_utils.bot_utils import update_user_ldata, sync_to_async
 from bot.helper.ext_utils.db_handler import DbManager
+from bot.helper.ext_utils.list_cache import list_cache
 from bot.helper.ext_utils.status_utils import get_readable_file_size, get_readable_time
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.index import drive_index
 from bot.helper.switch_helper.button_build import ButtonMaker
 from bot.helper.switch_helper.message_utils import (
     sendMessage,
@@ -129,6 +132,8 @@ class gdriveList(GoogleDriveHelper):
         self.items_list = []
         self.iter_start = 0
         self.page_step = 1
+        # the service's http isn't thread-safe, prefetches share it
+        self._service_lock = Lock()
         super().__init__()
 
     async def _event_handler(self):
@@ -153,6 +158,37 @@ class gdriveList(GoogleDriveHelper):
             else:
                 await editMessage(self._reply_to, msg, button)
 
+    def _files(self, folder_id, item_type, use_index):
+        if use_index:
+            files = drive_index.children(folder_id, item_type)
+            if files is not None:
+                return files
+        with self._service_lock:
+            return self.getFilesByFolderId(folder_id, item_type)
+
+    def _list_key(self, folder_id, item_type):
+        owner = "accounts" if self.use_sa else self.token_path
+        return ("gdrive", owner, folder_id, item_type)
+
+    def _list(self, folder_id, item_type):
+        use_index = self.token_path != self.user_token_path
+        return list_cache.get(
+            self._list_key(folder_id, item_type),
+            partial(sync_to_async, self._files, folder_id, item_type, use_index),
+        )
+
+    def _prefetch_page(self):
+        use_index = self.token_path != self.user_token_path
+        for item in self.items_list[self.iter_start : LIST_LIMIT + self.iter_start]:
+            if item["mimeType"] != self.G_DRIVE_DIR_MIME_TYPE:
+                continue
+            list_cache.prefetch(
+                self._list_key(item["id"], self.item_type),
+                partial(
+                    sync_to_async, self._files, item["id"], self.item_type, use_index
+                ),
+            )
+
     async def get_items_buttons(self):
         items_no = len(self.items_list)
         pages = (items_no + LIST_LIMIT - 1) // LIST_LIMIT
@@ -161,6 +197,7 @@ class gdriveList(GoogleDriveHelper):
         elif self.iter_start < 0 or self.iter_start > items_no:
             self.iter_start = LIST_LIMIT * (pages - 1)
         page = (self.iter_start / LIST_LIMIT) + 1 if self.iter_start != 0 else 1
+        self._prefetch_page()
         buttons = ButtonMaker()
         for index, item in enumerate(
             self.items_list[self.iter_start : LIST_LIMIT + self.iter_start]
@@ -223,7 +260,7 @@ class gdriveList(GoogleDriveHelper):
         elif self.list_status == "gdu":
             self.item_type == "folders"
         try:
-            files = self.getFilesByFolderId(self.id, self.item_type)
+            files = await self._list(self.id, self.item_type)
             if self.listener.isCancelled:
                 return
         except Exception as err:
@@ -241,10 +278,14 @@ class gdriveList(GoogleDriveHelper):
         self.iter_start = 0
         await self.get_items_buttons()
 
+    def _drives(self):
+        with self._service_lock:
+            self.service = self.authorize()
+            return self.service.drives().list(pageSize="100").execute()
+
     async def list_drives(self):
-        self.service = self.authorize()
         try:
-            result = self.service.drives().list(pageSize="100").execute()
+            result = await sync_to_async(self._drives)
         except Exception as e:
             self.id = str(e)
             self.event.set()
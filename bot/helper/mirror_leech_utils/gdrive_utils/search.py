@@ -3,6 +3,7 @@ from logging import getLogger
 from bot import DRIVES_NAMES, DRIVES_IDS, INDEX_URLS, user_data
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.index import drive_index
 
 LOGGER = getLogger(__name__)
 
@@ -94,6 +95,7 @@ class gdSearch(GoogleDriveHelper):
 
     def drive_list(self, fileName, target_id="", user_id=""):
         msg = ""
+        rawName = str(fileName).strip()
         fileName = self.escapes(str(fileName))
         contents_no = 0
         telegraph_content = []
@@ -124,7 +126,15 @@ class gdSearch(GoogleDriveHelper):
             isRecur = (
                 False if self._isRecursive and len(dir_id) > 23 else self._isRecursive
             )
-            response = self._drive_query(dir_id, fileName, isRecur)
+            files = None
+            if not target_id.startswith("mtp:"):
+                files = drive_index.search(
+                    dir_id, rawName, self._stopDup, isRecur, self._itemType
+                )
+            if files is None:
+                response = self._drive_query(dir_id, fileName, isRecur)
+            else:
+                response = {"files": files}
             if not response["files"]:
                 if self._noMulti:
                     break
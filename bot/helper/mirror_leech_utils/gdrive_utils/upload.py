@@ -13,6 +13,7 @@ from tenacity import (
 from bot import config_dict
 from bot.helper.ext_utils.bot_utils import async_to_sync, setInterval
 from bot.helper.ext_utils.files_utils import get_mime_type
+from bot.helper.ext_utils.upload_cache import upload_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
@@ -105,6 +106,18 @@ class gdUpload(GoogleDriveHelper):
             )
 
     def _upload_dir(self, input_directory, dest_id, unwanted_files, ft_delete):
+        jobs = []
+        new_id = self._create_tree(
+            input_directory, dest_id, unwanted_files, ft_delete, jobs
+        )
+        if self.listener.isCancelled:
+            return None
+        self.run_workers(self._upload_job, jobs)
+        if self.listener.isCancelled:
+            return None
+        return new_id
+
+    def _create_tree(self, input_directory, dest_id, unwanted_files, ft_delete, jobs):
         list_dirs = listdir(input_directory)
         if len(list_dirs) == 0:
             return dest_id
@@ -113,19 +126,15 @@ class gdUpload(GoogleDriveHelper):
             current_file_name = ospath.join(input_directory, item)
             if ospath.isdir(current_file_name):
                 current_dir_id = self.create_directory(item, dest_id)
-                new_id = self._upload_dir(
-                    current_file_name, current_dir_id, unwanted_files, ft_delete
+                new_id = self._create_tree(
+                    current_file_name, current_dir_id, unwanted_files, ft_delete, jobs
                 )
                 self.total_folders += 1
             elif current_file_name not in unwanted_files and not item.lower().endswith(
                 tuple(self.listener.extensionFilter)
             ):
                 mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
-                self._upload_file(
-                    current_file_name, file_name, mime_type, dest_id, ft_delete
-                )
-                self.total_files += 1
+                jobs.append((current_file_name, item, mime_type, dest_id, ft_delete))
                 new_id = dest_id
             else:
                 if not self.listener.seed or self.listener.newDir:
@@ -135,6 +144,44 @@ class gdUpload(GoogleDriveHelper):
                 break
         return new_id
 
+    def _upload_job(self, file_path, file_name, mime_type, dest_id, ft_delete):
+        self._upload_file(file_path, file_name, mime_type, dest_id, ft_delete)
+        with self._workers_lock:
+            self.total_files += 1
+
+    def _cache_scope(self):
+        # copies are only offered to the credentials that can see the file
+        return "gdrive:sa" if self.use_sa else f"gdrive:{self.token_path}"
+
+    def _copy_cached(self, file_path, file_name, dest_id, ft_delete):
+        if not (file_id := upload_cache.lookup(self._cache_scope(), file_path)):
+            return None
+        body = {"name": file_name, "description": "Uploaded by Mirror-leech-switch-bot"}
+        if dest_id is not None:
+            body["parents"] = [dest_id]
+        try:
+            response = (
+                self.service.files()
+                .copy(fileId=file_id, body=body, supportsAllDrives=True)
+                .execute()
+            )
+        except HttpError as err:
+            LOGGER.warning(f"Upload cache copy failed: {err}. Path: {file_path}")
+            if err.resp.status == 404:
+                upload_cache.forget(self._cache_scope(), file_id)
+            return None
+        LOGGER.info(f"Copied from upload cache: {file_path}")
+        file_size = ospath.getsize(file_path)
+        if not self.listener.seed or self.listener.newDir or file_path in ft_delete:
+            try:
+                remove(file_path)
+            except:
+                pass
+        self.file_done(file_size)
+        if not config_dict["IS_TEAM_DRIVE"]:
+            self.set_permission(response["id"])
+        return response["id"]
+
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
@@ -152,7 +199,14 @@ class gdUpload(GoogleDriveHelper):
         if dest_id is not None:
             file_metadata["parents"] = [dest_id]
 
-        if ospath.getsize(file_path) == 0:
+        if upload_cache.enabled() and (
+            file_id := self._copy_cached(file_path, file_name, dest_id, ft_delete)
+        ):
+            if not in_dir:
+                return self.G_DRIVE_BASE_DOWNLOAD_URL.format(file_id)
+            return
+
+        if (file_size := ospath.getsize(file_path)) == 0:
             media_body = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
             response = (
                 self.service.files()
@@ -176,7 +230,10 @@ class gdUpload(GoogleDriveHelper):
 
         # Insert a file
         drive_file = self.service.files().create(
-            body=file_metadata, media_body=media_body, supportsAllDrives=True
+            body=file_metadata,
+            media_body=media_body,
+            fields="id, md5Checksum",
+            supportsAllDrives=True,
         )
         response = None
         retries = 0
@@ -220,12 +277,19 @@ class gdUpload(GoogleDriveHelper):
                         raise err
         if self.listener.isCancelled:
             return
+        if upload_cache.enabled():
+            upload_cache.record(
+                self._cache_scope(),
+                upload_cache.file_key(file_path),
+                response["id"],
+                response.get("md5Checksum"),
+            )
         if not self.listener.seed or self.listener.newDir or file_path in ft_delete:
             try:
                 remove(file_path)
             except:
                 pass
-        self.file_processed_bytes = 0
+        self.file_done(file_size)
         # Insert new permissions
         if not config_dict["IS_TEAM_DRIVE"]:
             self.set_permission(response["id"])
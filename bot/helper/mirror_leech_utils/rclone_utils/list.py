@@ -13,6 +13,7 @@ from bot.helper.ext_utils.bot_utils import (
     update_user_ldata,
 )
 from bot.helper.ext_utils.db_handler import DbManager
+from bot.helper.ext_utils.list_cache import list_cache
 from bot.helper.ext_utils.status_utils import get_readable_file_size, get_readable_time
 from bot.helper.switch_helper.button_build import ButtonMaker
 from bot.helper.switch_helper.message_utils import (
@@ -146,6 +147,43 @@ class RcloneList:
             else:
                 await editMessage(self._reply_to, msg, button)
 
+    async def _lsjson(self, location, item_type):
+        cmd = [
+            "rclone",
+            "lsjson",
+            item_type,
+            "--fast-list",
+            "--no-mimetype",
+            "--no-modtime",
+            "--config",
+            self.config_path,
+            location,
+        ]
+        res, err, code = await cmd_exec(cmd)
+        if code == -9:
+            raise Exception("")
+        elif code != 0:
+            raise Exception(err or "Use '/shell cat rlog.txt' to see more information")
+        return loads(res)
+
+    def _list(self, location, item_type):
+        return list_cache.get(
+            ("rclone", self.config_path, location, item_type),
+            partial(self._lsjson, location, item_type),
+        )
+
+    def _prefetch_page(self):
+        location = f"{self.remote}{self.path}"
+        for idict in self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]:
+            if not idict["IsDir"]:
+                continue
+            sep = "/" if self.path else ""
+            child = f"{location}{sep}{idict['Path']}"
+            list_cache.prefetch(
+                ("rclone", self.config_path, child, self.item_type),
+                partial(self._lsjson, child, self.item_type),
+            )
+
     async def get_path_buttons(self):
         items_no = len(self.path_list)
         pages = (items_no + LIST_LIMIT - 1) // LIST_LIMIT
@@ -154,6 +192,7 @@ class RcloneList:
         elif self.iter_start < 0 or self.iter_start > items_no:
             self.iter_start = LIST_LIMIT * (pages - 1)
         page = (self.iter_start / LIST_LIMIT) + 1 if self.iter_start != 0 else 1
+        self._prefetch_page()
         buttons = ButtonMaker()
         for index, idict in enumerate(
             self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]
@@ -207,23 +246,14 @@ class RcloneList:
             self.item_type == itype
         elif self.list_status == "rcu":
             self.item_type == "--dirs-only"
-        cmd = [
-            "rclone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-        ]
         if self.listener.isCancelled:
             return
-        res, err, code = await cmd_exec(cmd)
-        if code not in [0, -9]:
-            if not err:
-                err = "Use '/shell cat rlog.txt' to see more information"
+        try:
+            result = await self._list(f"{self.remote}{self.path}", self.item_type)
+        except Exception as err:
+            if not (err := str(err)):
+                # killed listing
+                return
             LOGGER.error(
                 f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}"
             )
@@ -231,7 +261,6 @@ class RcloneList:
             self.path = ""
             self.event.set()
             return
-        result = loads(res)
         if len(result) == 0 and itype != self.item_type and self.list_status == "rcd":
             itype = (
                 "--dirs-only" if self.item_type == "--files-only" else "--files-only"
@@ -0,0 +1,111 @@
+from asyncio import create_subprocess_exec, Lock, sleep
+from httpx import AsyncClient
+from logging import getLogger
+from secrets import token_urlsafe
+
+from bot import config_dict
+from bot.helper.ext_utils.exceptions import RcloneRcError
+
+LOGGER = getLogger(__name__)
+
+RCD_ADDR = "127.0.0.1:5572"
+
+# remote types that point to other remotes by name, so they only work with the
+# config file of the daemon
+WRAPPER_TYPES = [
+    "alias",
+    "cache",
+    "chunker",
+    "combine",
+    "compress",
+    "crypt",
+    "hasher",
+    "union",
+]
+
+
+class RcloneDaemon:
+    """
+    One long-lived `rclone rcd` on localhost, used by RcloneTransferHelper when
+    RCLONE_DAEMON is enabled instead of a new rclone process per transfer. It's
+    started on first use (and again if it died) with rclone.conf, remotes from
+    other config files are passed as connection strings.
+    """
+
+    def __init__(self):
+        self._proc = None
+        self._client = None
+        self._auth = None
+        self._lock = Lock()
+
+    @staticmethod
+    def enabled():
+        return config_dict.get("RCLONE_DAEMON", False)
+
+    async def _start(self):
+        async with self._lock:
+            if self._proc is not None and self._proc.returncode is None:
+                return
+            self._auth = ("mltb", token_urlsafe(16))
+            cmd = [
+                "rclone",
+                "rcd",
+                "--rc-addr",
+                RCD_ADDR,
+                "--rc-user",
+                self._auth[0],
+                "--rc-pass",
+                self._auth[1],
+                "--config",
+                "rclone.conf",
+                "--log-file",
+                "rlog.txt",
+                "--log-level",
+                "INFO",
+            ]
+            self._proc = await create_subprocess_exec(*cmd)
+            if self._client is None:
+                self._client = AsyncClient(base_url=f"http://{RCD_ADDR}", timeout=None)
+            for _ in range(50):
+                try:
+                    await self._client.post("/rc/noop", json={}, auth=self._auth)
+                    break
+                except:
+                    if self._proc.returncode is not None:
+                        break
+                    await sleep(0.2)
+            else:
+                LOGGER.error("rclone rcd didn't start listening in time!")
+            LOGGER.info(f"Started rclone rcd on {RCD_ADDR}")
+
+    async def call(self, method, **params):
+        if self._proc is None or self._proc.returncode is not None:
+            await self._start()
+        resp = await self._client.post(f"/{method}", json=params, auth=self._auth)
+        try:
+            data = resp.json()
+        except:
+            data = {"error": resp.text}
+        if resp.status_code != 200:
+            raise RcloneRcError(data.get("error") or f"{method} failed")
+        return data
+
+    @staticmethod
+    def fs_string(remote, path="", opts=None, **overrides):
+        """
+        The fs of remote:path for rc calls. With opts (the section of a config
+        file other than rclone.conf) the remote is given as a connection
+        string, otherwise by name. Overrides set backend options for this call.
+        """
+        params = dict(overrides)
+        if opts is not None:
+            params = {k: v for k, v in opts.items() if k != "type"} | params
+            remote = f":{opts['type']}"
+        params = "".join(
+            f",{key}='{str(value).replace(chr(39), chr(39) * 2)}'"
+            for key, value in params.items()
+        )
+        return f"{remote}{params}:{path}"
+
+
+rclone_daemon = RcloneDaemon()
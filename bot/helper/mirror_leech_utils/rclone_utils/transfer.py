@@ -1,20 +1,26 @@
 from aiofiles import open as aiopen
-from aiofiles.os import path as aiopath, makedirs, listdir
-from asyncio import create_subprocess_exec, gather
+from aiofiles.os import path as aiopath, makedirs, listdir, remove
+from asyncio import create_subprocess_exec, gather, sleep
 from asyncio.subprocess import PIPE
 from configparser import ConfigParser
 from json import loads
 from logging import getLogger
+from os import walk, path as ospath
 from random import randrange
 from re import findall as re_findall
 
 from bot import config_dict
 from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.exceptions import RcloneRcError
 from bot.helper.ext_utils.files_utils import (
     get_mime_type,
     count_files_and_folders,
     clean_unwanted,
 )
+from bot.helper.ext_utils.list_cache import list_cache
+from bot.helper.ext_utils.status_utils import get_readable_file_size, get_readable_time
+from bot.helper.ext_utils.upload_cache import upload_cache
+from bot.helper.mirror_leech_utils.rclone_utils.rcd import rclone_daemon, WRAPPER_TYPES
 
 LOGGER = getLogger(__name__)
 
@@ -23,6 +29,7 @@ class RcloneTransferHelper:
     def __init__(self, listener):
         self._listener = listener
         self._proc = None
+        self._jobid = None
         self._transferred_size = "0 B"
         self._eta = "-"
         self._percentage = "0%"
@@ -110,6 +117,214 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
+    def _use_daemon(self, config_path, *remotes_opts):
+        return (
+            rclone_daemon.enabled()
+            and not self._listener.rcFlags
+            and not config_dict["RCLONE_FLAGS"]
+            and (
+                config_path == "rclone.conf"
+                or all(opts["type"] not in WRAPPER_TYPES for opts in remotes_opts)
+            )
+        )
+
+    async def _rc_fs(self, config_path, remote, path="", **overrides):
+        opts = (
+            None
+            if config_path == "rclone.conf"
+            else await self._get_remote_options(config_path, remote)
+        )
+        return rclone_daemon.fs_string(remote, path, opts, **overrides)
+
+    def _rc_config(self, **options):
+        return {
+            "UseListR": True,
+            "LowLevelRetries": 1,
+            "RetriesInterval": 3 * 10**9,
+            "Metadata": True,
+        } | options
+
+    def _rc_filter(self, unwanted_files=None):
+        rules = ["*.{" + ",".join(self._listener.extensionFilter) + "}"]
+        rules.extend(f.rsplit("/", 1)[1] for f in unwanted_files or [])
+        return {"ExcludeRule": rules, "IgnoreCase": True}
+
+    def _update_stats(self, stats):
+        done = stats.get("bytes") or 0
+        total = stats.get("totalBytes") or 0
+        self._transferred_size = get_readable_file_size(done)
+        self._size = get_readable_file_size(total)
+        self._percentage = f"{round(done / total * 100, 2)}%" if total else "0%"
+        self._speed = f"{get_readable_file_size(stats.get('speed') or 0)}/s"
+        self._eta = get_readable_time(eta) if (eta := stats.get("eta")) else "-"
+
+    async def _rc_job(self, method, params):
+        """
+        Run an rc call as an async job of the daemon, reading its progress from
+        the stats group of the job until it finishes. Returns "" on success,
+        the error otherwise or None if it got cancelled.
+        """
+        try:
+            res = await rclone_daemon.call(method, _async=True, **params)
+        except Exception as e:
+            return str(e) or f"{method} failed"
+        self._jobid = res["jobid"]
+        group = f"job/{self._jobid}"
+        try:
+            while True:
+                await sleep(1)
+                job, stats = await gather(
+                    rclone_daemon.call("job/status", jobid=self._jobid),
+                    rclone_daemon.call("core/stats", group=group),
+                )
+                self._update_stats(stats)
+                if job["finished"]:
+                    break
+        except Exception as e:
+            return None if self._listener.isCancelled else str(e) or "rclone rcd failed"
+        finally:
+            self._jobid = None
+            try:
+                await rclone_daemon.call("core/stats-delete", group=group)
+            except:
+                pass
+        if self._listener.isCancelled:
+            return None
+        return "" if job["success"] else job["error"] or f"{method} failed"
+
+    def _can_switch_sa(self, remote_type, error):
+        if not (
+            self._sa_number != 0
+            and remote_type == "drive"
+            and "RATE_LIMIT_EXCEEDED" in error
+            and self._use_service_accounts
+        ):
+            return False
+        if self._sa_count < self._sa_number:
+            return True
+        LOGGER.info(
+            f"Reached maximum number of service accounts switching, which is {self._sa_count}"
+        )
+        return False
+
+    async def _rc_download(self, remote, config_path, remote_type, path):
+        link = self._listener.link
+        overrides = {"acknowledge_abuse": "true"} if remote_type == "drive" else {}
+        while True:
+            root = await self._rc_fs(config_path, remote, **overrides)
+            try:
+                item = (
+                    await rclone_daemon.call("operations/stat", fs=root, remote=link)
+                )["item"]
+            except RcloneRcError as e:
+                item = None
+                error = str(e)
+            else:
+                error = "" if item else f"Not found: {remote}:{link}"
+            if item and item["IsDir"]:
+                error = await self._rc_job(
+                    "sync/copy",
+                    {
+                        "srcFs": await self._rc_fs(config_path, remote, link, **overrides),
+                        "dstFs": path,
+                        "_config": self._rc_config(),
+                        "_filter": self._rc_filter(),
+                    },
+                )
+            elif item:
+                error = await self._rc_job(
+                    "operations/copyfile",
+                    {
+                        "srcFs": root,
+                        "srcRemote": link,
+                        "dstFs": path,
+                        "dstRemote": item["Name"],
+                        "_config": self._rc_config(),
+                    },
+                )
+            if error is None or self._listener.isCancelled:
+                return
+            if not error:
+                await self._listener.onDownloadComplete()
+                return
+            LOGGER.error(error)
+            if not self._can_switch_sa(remote_type, error):
+                break
+            remote = self._switchServiceAccount()
+        await self._listener.onDownloadError(error[:4000])
+
+    async def _rc_upload(
+        self,
+        path,
+        config_path,
+        remote,
+        rc_path,
+        mime_type,
+        method,
+        unwanted_files,
+        remote_type,
+    ):
+        overrides = (
+            {"chunk_size": "128M", "upload_cutoff": "128M"}
+            if remote_type == "drive"
+            else {}
+        )
+        while True:
+            dest = await self._rc_fs(config_path, remote, rc_path, **overrides)
+            if mime_type == "Folder":
+                params = {
+                    "srcFs": path,
+                    "dstFs": dest,
+                    "_config": self._rc_config(),
+                    "_filter": self._rc_filter(unwanted_files),
+                }
+                if method == "move":
+                    params["deleteEmptySrcDirs"] = True
+                error = await self._rc_job(f"sync/{method}", params)
+            else:
+                dirpath, file_ = path.rsplit("/", 1)
+                error = await self._rc_job(
+                    f"operations/{method}file",
+                    {
+                        "srcFs": dirpath,
+                        "srcRemote": file_,
+                        "dstFs": dest,
+                        "dstRemote": file_,
+                        "_config": self._rc_config(),
+                    },
+                )
+            if error is None or self._listener.isCancelled:
+                return False
+            if not error:
+                return True
+            LOGGER.error(error)
+            if not self._can_switch_sa(remote_type, error):
+                break
+            remote = self._switchServiceAccount()
+        await self._listener.onUploadError(error[:4000])
+        return False
+
+    async def _rc_link(self, config_path, remote, rc_path, remote_type, mime_type):
+        root = await self._rc_fs(config_path, remote)
+        try:
+            if remote_type == "drive":
+                item = (
+                    await rclone_daemon.call("operations/stat", fs=root, remote=rc_path)
+                )["item"]
+                if not item:
+                    return ""
+                if mime_type == "Folder":
+                    return f"https://drive.google.com/drive/folders/{item['ID']}"
+                return f"https://drive.google.com/uc?id={item['ID']}&export=download"
+            return (
+                await rclone_daemon.call(
+                    "operations/publiclink", fs=root, remote=rc_path
+                )
+            )["url"]
+        except Exception as e:
+            LOGGER.error(f"while getting link. Path: {remote}:{rc_path} | Error: {e}")
+            return ""
+
     async def _start_download(self, cmd, remote_type):
         self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
         _, return_code = await gather(self._progress(), self._proc.wait())
@@ -170,6 +385,10 @@ class RcloneTransferHelper:
                 remote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
+        if self._use_daemon(config_path, remote_opts):
+            await self._rc_download(remote, config_path, remote_type, path)
+            return
+
         cmd = self._getUpdatedCommand(
             config_path, f"{remote}:{self._listener.link}", path, "copy"
         )
@@ -267,6 +486,92 @@ class RcloneTransferHelper:
         else:
             return True
 
+    @staticmethod
+    def _remote_path(remote, rc_path, rel):
+        return f"{remote}:{rc_path}/{rel}" if rc_path else f"{remote}:{rel}"
+
+    async def _list_upload_files(self, path, unwanted_files):
+        if not await aiopath.isdir(path):
+            return [(path, self._listener.name)]
+        files = []
+        for dirpath, _, fnames in await sync_to_async(walk, path):
+            for file_ in fnames:
+                f_path = ospath.join(dirpath, file_)
+                if f_path in unwanted_files or file_.lower().endswith(
+                    tuple(self._listener.extensionFilter)
+                ):
+                    continue
+                files.append((f_path, ospath.relpath(f_path, path)))
+        return files
+
+    async def _copy_cached(self, files, config_path, remote, rc_path):
+        """
+        Server-side copy the files already uploaded to this remote. Returns the
+        local paths that were copied and the content keys of the rest, to be
+        recorded once they are uploaded.
+        """
+        scope = f"rclone:{config_path}:{remote}"
+        copied = []
+        keys = {}
+        for f_path, rel in files:
+            if self._listener.isCancelled:
+                break
+            key = await sync_to_async(upload_cache.file_key, f_path)
+            if ref := await sync_to_async(upload_cache.lookup, scope, f_path, key):
+                cmd = [
+                    "rclone",
+                    "copyto",
+                    "--config",
+                    config_path,
+                    ref,
+                    self._remote_path(remote, rc_path, rel),
+                ]
+                _, err, code = await cmd_exec(cmd)
+                if code == 0:
+                    LOGGER.info(f"Copied from upload cache: {f_path}")
+                    copied.append(f_path)
+                    continue
+                LOGGER.warning(f"Upload cache copy failed: {err}. Path: {f_path}")
+                # rclone exits with 3 or 4 when the directory or file is gone
+                if code in [3, 4]:
+                    await sync_to_async(upload_cache.forget, scope, ref)
+            keys[rel] = key
+        return copied, keys
+
+    async def _record_uploaded(self, config_path, remote, rc_path, mime_type, keys):
+        if mime_type == "Folder":
+            target = f"{remote}:{rc_path}"
+        else:
+            target = self._remote_path(remote, rc_path, self._listener.name)
+        cmd = [
+            "rclone",
+            "lsjson",
+            "--config",
+            config_path,
+            "--files-only",
+            "--hash",
+            "--hash-type",
+            "MD5",
+            target,
+        ]
+        if mime_type == "Folder":
+            cmd.append("-R")
+        res, err, code = await cmd_exec(cmd)
+        if code != 0:
+            LOGGER.error(f"while listing hashes. Path: {target} | Stderr: {err}")
+            return
+        scope = f"rclone:{config_path}:{remote}"
+        for item in loads(res):
+            rel = item["Path"] if mime_type == "Folder" else self._listener.name
+            if (key := keys.get(rel)) and (file_md5 := item.get("Hashes", {}).get("md5")):
+                await sync_to_async(
+                    upload_cache.record,
+                    scope,
+                    key,
+                    self._remote_path(remote, rc_path, rel),
+                    file_md5,
+                )
+
     async def upload(self, path, unwanted_files, ft_delete):
         self._is_upload = True
         rc_path = self._listener.upDest.strip("/")
@@ -319,21 +624,69 @@ class RcloneTransferHelper:
                 LOGGER.info(f"Upload with service account {fremote}")
 
         method = "move" if not self._listener.seed or self._listener.newDir else "copy"
-        cmd = self._getUpdatedCommand(
-            fconfig_path, path, f"{fremote}:{rc_path}", method, unwanted_files
-        )
-        if (
-            remote_type == "drive"
-            and not config_dict["RCLONE_FLAGS"]
-            and not self._listener.rcFlags
-        ):
-            cmd.extend(("--drive-chunk-size", "128M", "--drive-upload-cutoff", "128M"))
+        keys = {}
+        if upload_cache.enabled():
+            copied, keys = await self._copy_cached(
+                await self._list_upload_files(path, unwanted_files),
+                oconfig_path,
+                oremote,
+                rc_path,
+            )
+            if self._listener.isCancelled:
+                return
+            if method == "move":
+                for f_path in copied:
+                    await remove(f_path)
+            else:
+                unwanted_files = unwanted_files + copied
+        else:
+            copied = []
+        if mime_type == "Folder" or not copied:
+            if self._use_daemon(fconfig_path, remote_opts):
+                result = await self._rc_upload(
+                    path,
+                    fconfig_path,
+                    fremote,
+                    rc_path,
+                    mime_type,
+                    method,
+                    unwanted_files,
+                    remote_type,
+                )
+            else:
+                cmd = self._getUpdatedCommand(
+                    fconfig_path, path, f"{fremote}:{rc_path}", method, unwanted_files
+                )
+                if (
+                    remote_type == "drive"
+                    and not config_dict["RCLONE_FLAGS"]
+                    and not self._listener.rcFlags
+                ):
+                    cmd.extend(
+                        ("--drive-chunk-size", "128M", "--drive-upload-cutoff", "128M")
+                    )
 
-        result = await self._start_upload(cmd, remote_type)
-        if not result:
-            return
+                result = await self._start_upload(cmd, remote_type)
+            if not result:
+                return
+            if keys:
+                await self._record_uploaded(
+                    oconfig_path, oremote, rc_path, mime_type, keys
+                )
+        list_cache.invalidate("rclone", f"{oremote}:", oconfig_path, prefix=True)
 
-        if remote_type == "drive":
+        if self._use_daemon(oconfig_path, remote_opts):
+            if mime_type == "Folder":
+                rel = rc_path
+            elif rc_path:
+                rel = f"{rc_path}/{self._listener.name}"
+            else:
+                rel = self._listener.name
+            destination = f"{oremote}:{rel}"
+            link = await self._rc_link(
+                oconfig_path, oremote, rel, remote_type, mime_type
+            )
+        elif remote_type == "drive":
             link, destination = await self._get_gdrive_link(
                 oconfig_path, oremote, rc_path, mime_type
             )
@@ -382,6 +735,19 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
+        if self._use_daemon(config_path, src_remote_opts, dst_remote_opt):
+            return await self._rc_clone(
+                config_path,
+                src_remote,
+                src_path,
+                dst_remote,
+                dst_path,
+                src_remote_type,
+                dst_remote_type,
+                mime_type,
+                method,
+            )
+
         cmd = self._getUpdatedCommand(
             config_path, f"{src_remote}:{src_path}", destination, method
         )
@@ -436,6 +802,60 @@ class RcloneTransferHelper:
                     )
                     return None, destination
 
+    async def _rc_clone(
+        self,
+        config_path,
+        src_remote,
+        src_path,
+        dst_remote,
+        dst_path,
+        src_remote_type,
+        dst_remote_type,
+        mime_type,
+        method,
+    ):
+        src_overrides = {}
+        options = {}
+        if src_remote_type == "drive" and dst_remote_type != "drive":
+            src_overrides["acknowledge_abuse"] = "true"
+        elif src_remote_type == "drive":
+            options = {"TPSLimit": 3, "Transfers": 3}
+        if mime_type == "Folder":
+            error = await self._rc_job(
+                f"sync/{method}",
+                {
+                    "srcFs": await self._rc_fs(
+                        config_path, src_remote, src_path, **src_overrides
+                    ),
+                    "dstFs": await self._rc_fs(config_path, dst_remote, dst_path),
+                    "_config": self._rc_config(**options),
+                    "_filter": self._rc_filter(),
+                },
+            )
+            rel = dst_path
+        else:
+            error = await self._rc_job(
+                "operations/copyfile",
+                {
+                    "srcFs": await self._rc_fs(config_path, src_remote, **src_overrides),
+                    "srcRemote": src_path,
+                    "dstFs": await self._rc_fs(config_path, dst_remote, dst_path),
+                    "dstRemote": src_path.rsplit("/", 1)[-1],
+                    "_config": self._rc_config(**options),
+                },
+            )
+            rel = f"{dst_path}/{self._listener.name}" if dst_path else self._listener.name
+        if error is None or self._listener.isCancelled:
+            return None, None
+        if error:
+            LOGGER.error(error)
+            await self._listener.onUploadError(error[:4000])
+            return None, None
+        link = await self._rc_link(config_path, dst_remote, rel, dst_remote_type, mime_type)
+        if self._listener.isCancelled:
+            return None, None
+        return link, f"{dst_remote}:{rel}"
+
     def _getUpdatedCommand(
         self, config_path, source, destination, method, unwanted_files=None
     ):
@@ -488,6 +908,11 @@ class RcloneTransferHelper:
 
     async def cancel_task(self):
         self._listener.isCancelled = True
+        if self._jobid is not None:
+            try:
+                await rclone_daemon.call("job/stop", jobid=self._jobid)
+            except:
+                pass
         if self._proc is not None:
             try:
                 self._proc.kill()
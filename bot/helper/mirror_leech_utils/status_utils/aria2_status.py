@@ -1,11 +1,14 @@
 from time import time
 
 from bot import aria2, LOGGER
+from bot.helper.ext_utils.aria2_sync import a2_sync
 from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.status_utils import MirrorStatus, get_readable_time
 
 
 def get_download(gid, old_info=None):
+    if res := a2_sync.get(gid):
+        return res
     try:
         res = aria2.get_download(gid)
         return res or old_info
@@ -27,10 +30,7 @@ class Aria2Status:
         self.message = listener.message
 
     def update(self):
-        if self._download is None:
-            self._download = get_download(self._gid, self._download)
-        else:
-            self._download = self._download.live
+        self._download = get_download(self._gid, self._download)
         if self._download.followed_by_ids:
             self._gid = self._download.followed_by_ids[0]
             self._download = get_download(self._gid)
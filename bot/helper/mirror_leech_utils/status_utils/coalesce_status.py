@@ -0,0 +1,66 @@
+from asyncio import iscoroutinefunction
+
+from bot import LOGGER, task_dict
+from bot.helper.ext_utils.status_utils import get_readable_file_size, MirrorStatus
+
+
+class CoalesceStatus:
+    def __init__(self, listener, coalescer, gid):
+        self.listener = listener
+        self._coalescer = coalescer
+        self._gid = gid
+        self.engine = "Shared Download"
+        self.message = listener.message
+
+    def _leader_task(self):
+        if (leader := self._coalescer.leader(self.listener)) is None:
+            return None
+        return task_dict.get(leader.mid)
+
+    def gid(self):
+        return self._gid
+
+    def name(self):
+        if self.listener.name:
+            return self.listener.name
+        if task := self._leader_task():
+            return task.name()
+        return ""
+
+    def size(self):
+        if task := self._leader_task():
+            return task.size()
+        return get_readable_file_size(self.listener.size)
+
+    def status(self):
+        return MirrorStatus.STATUS_DOWNLOADING
+
+    def processed_bytes(self):
+        if task := self._leader_task():
+            return task.processed_bytes()
+        return 0
+
+    async def progress(self):
+        if task := self._leader_task():
+            if iscoroutinefunction(task.progress):
+                return await task.progress()
+            return task.progress()
+        return "0%"
+
+    def speed(self):
+        if task := self._leader_task():
+            return task.speed()
+        return "0B/s"
+
+    def eta(self):
+        if task := self._leader_task():
+            return task.eta()
+        return "-"
+
+    def task(self):
+        return self
+
+    async def cancel_task(self):
+        self.listener.isCancelled = True
+        LOGGER.info(f"Cancelling Shared Download: {self.name()}")
+        await self.listener.onDownloadError("Download stopped by user!")
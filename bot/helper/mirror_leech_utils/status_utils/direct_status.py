@@ -7,6 +7,9 @@ from bot import aria2, LOGGER
 engine_ = f"Aria2 v{aria2.client.get_version()['version']}"
 
 class DirectStatus:
+    # queued in aria2 without being replaced, see TaskRegistry
+    dynamic = True
+
     def __init__(self, listener, obj, gid):
         self._gid = gid
         self._obj = obj
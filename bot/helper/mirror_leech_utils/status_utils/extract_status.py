@@ -2,6 +2,7 @@ from time import time
 from subprocess import run as prun
 from bot import LOGGER, subprocess_lock
 from bot.helper.ext_utils.files_utils import get_path_size
+from bot.helper.ext_utils.media_pool import media_pool
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     MirrorStatus,
@@ -19,6 +20,7 @@ class ExtractStatus:
         self._gid = gid
         self._start_time = time()
         self._proccessed_bytes = 0
+        self.unpacked = 0
         self.engine = f'p7zip v{_eng_ver()}'
         self.message = listener.message
 
@@ -31,7 +33,7 @@ class ExtractStatus:
     async def progress_raw(self):
         await self.processed_raw()
         try:
-            return self._proccessed_bytes / self._size * 100
+            return self._proccessed_bytes / (self.unpacked or self._size) * 100
         except:
             return 0
 
@@ -49,7 +51,8 @@ class ExtractStatus:
 
     def eta(self):
         try:
-            seconds = (self._size - self._proccessed_bytes) / self.speed_raw()
+            total = self.unpacked or self._size
+            seconds = (total - self._proccessed_bytes) / self.speed_raw()
             return get_readable_time(seconds)
         except:
             return "-"
@@ -78,4 +81,5 @@ class ExtractStatus:
                 and self.listener.suproc.returncode is None
             ):
                 self.listener.suproc.kill()
+        media_pool.kill(self.listener)
         await self.listener.onUploadError("extracting stopped by user!")
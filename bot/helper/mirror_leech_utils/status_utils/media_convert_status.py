@@ -1,5 +1,12 @@
+from time import time
+
 from bot import LOGGER
-from bot.helper.ext_utils.status_utils import get_readable_file_size, MirrorStatus
+from bot.helper.ext_utils.media_pool import media_pool
+from bot.helper.ext_utils.status_utils import (
+    get_readable_file_size,
+    MirrorStatus,
+    get_readable_time,
+)
 
 
 class MediaConvertStatus:
@@ -7,12 +14,42 @@ class MediaConvertStatus:
         self.listener = listener
         self._gid = gid
         self._size = self.listener.size
+        self._start_time = time()
+        self._processed = 0
         self.engine = "Media Converter v69.0"
         self.message = listener.message
 
     def gid(self):
         return self._gid
 
+    def add_processed(self, size):
+        self._processed += size
+
+    def speed_raw(self):
+        return self._processed / (time() - self._start_time)
+
+    def progress_raw(self):
+        try:
+            return self._processed / self._size * 100
+        except:
+            return 0
+
+    def progress(self):
+        return f"{round(self.progress_raw(), 2)}%"
+
+    def speed(self):
+        return f"{get_readable_file_size(self.speed_raw())}/s"
+
+    def processed_bytes(self):
+        return get_readable_file_size(self._processed)
+
+    def eta(self):
+        try:
+            seconds = (self._size - self._processed) / self.speed_raw()
+            return get_readable_time(seconds)
+        except:
+            return "-"
+
     def name(self):
         return self.listener.name
 
@@ -28,6 +65,5 @@ class MediaConvertStatus:
     async def cancel_task(self):
         LOGGER.info(f"Cancelling Converting: {self.listener.name}")
         self.listener.isCancelled = True
-        if self.listener.suproc is not None and self.listener.suproc.returncode is None:
-            self.listener.suproc.kill()
+        media_pool.kill(self.listener)
         await self.listener.onUploadError("Converting stopped by user!")
@@ -2,6 +2,7 @@ from asyncio import sleep
 
 from bot import LOGGER, qbittorrent_client, QbTorrents, qb_listener_lock, get_client
 from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.qbit_sync import qb_sync
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
@@ -11,6 +12,8 @@ from bot.helper.ext_utils.status_utils import (
 engine_ = f"qBit {get_client().app.version}"
 
 def get_download(tag, old_info=None):
+    if res := qb_sync.get_by_tag(tag):
+        return res
     try:
         res = qbittorrent_client.torrents_info(tag=tag)[0]
         return res or old_info
@@ -113,6 +116,7 @@ class QbittorrentStatus:
                 torrent_hashes=self._info.hash,
                 delete_files=True,
             )
+            qb_sync.remove(self._info.hash)
             await sync_to_async(qbittorrent_client.torrents_delete_tags, tags=self._info.tags)
             async with qb_listener_lock:
                 if self._info.tags in QbTorrents:
@@ -20,6 +20,7 @@ class ZipStatus:
         self._gid = gid
         self._start_time = time()
         self._proccessed_bytes = 0
+        self.streamed = None
         self.engine = f'p7zip v{_eng_ver()}'
         self.message = listener.message
 
@@ -59,7 +60,9 @@ class ZipStatus:
         return MirrorStatus.STATUS_ARCHIVING
 
     async def processed_raw(self):
-        if self.listener.newDir:
+        if self.streamed is not None:
+            self._proccessed_bytes = self.streamed
+        elif self.listener.newDir:
             self._proccessed_bytes = await get_path_size(self.listener.newDir)
         else:
             self._proccessed_bytes = await get_path_size(self.listener.dir) - self._size
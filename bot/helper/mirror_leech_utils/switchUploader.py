@@ -1,3 +1,4 @@
+from asyncio import gather, Semaphore
 from logging import getLogger
 from aiofiles.os import (
     remove,
@@ -18,16 +19,22 @@ from re import sub as re_sub
 from natsort import natsorted
 from aioshutil import copy
 
-from bot import config_dict, bot
-from bot.helper.ext_utils.files_utils import clean_unwanted, get_mime_type
+from bot import bot_loop, config_dict, bot, subprocess_lock
+from bot.helper.ext_utils.files_utils import (
+    clean_unwanted,
+    copy_range,
+    get_mime_type,
+)
 from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.media_pool import media_pool
 from bot.helper.ext_utils.media_utils import (
     get_document_type,
     get_audio_thumb,
     create_thumbnail,
 )
+from bot.helper.ext_utils.upload_cache import upload_cache
 from bot.helper.switch_helper.button_build import ButtonMaker
-from bot.helper.switch_helper.message_utils import editMessage
+from bot.helper.switch_helper.message_utils import sendMessage
 
 LOGGER = getLogger(__name__)
 
@@ -41,9 +48,15 @@ class SwUploader:
         self._total_files = 0
         self._thumb = f"Thumbnails/{self._listener.userId}.jpg"
         self._corrupted = 0
-        self._up_path = ""
         self._lprefix = ""
         self._sent_msg = None
+        self._private = None
+        self._jobs = set()
+        self._last_slot = None
+        self._uploads = None
+        self._ahead = None
+        self._uploaded_size = 0
+        self.pipeline = False
 
     async def _upload_progress(self, progress):
         if self._listener.isCancelled:
@@ -60,9 +73,12 @@ class SwUploader:
         if not await aiopath.exists(self._thumb):
             self._thumb = None
 
-    async def _prepare_file(self, file_, dirpath, delete_file):
+        workers = max(config_dict.get("LEECH_WORKERS") or 1, 1)
+        self._uploads = Semaphore(workers)
+        self._ahead = Semaphore(workers * 2)
+
+    async def _prepare_file(self, up_path, file_, dirpath, delete_file):
         if self._lprefix:
-            description = f"{self._lprefix} <copy>{file_}</copy>"
             self._lprefix = re_sub("<.*?>", "", self._lprefix)
             if (
                 self._listener.seed
@@ -73,14 +89,12 @@ class SwUploader:
                 dirpath = f"{dirpath}/copied_mltb"
                 await makedirs(dirpath, exist_ok=True)
                 new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
-                self._up_path = await copy(self._up_path, new_path)
+                up_path = await copy(up_path, new_path)
             else:
                 new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
-                await rename(self._up_path, new_path)
-                self._up_path = new_path
-        else:
-            description = f"{file_}"
-        return description
+                await rename(up_path, new_path)
+                up_path = new_path
+        return up_path
 
     async def _msg_to_reply(self):
         if self._listener.upDest:
@@ -118,48 +132,191 @@ class SwUploader:
             if dirpath.endswith("/yt-dlp-thumb"):
                 continue
             for file_ in natsorted(files):
-                delete_file = False
-                self._up_path = ospath.join(dirpath, file_)
-                if self._up_path in ft_delete:
-                    delete_file = True
-                if self._up_path in o_files:
-                    continue
-                if file_.lower().endswith(tuple(self._listener.extensionFilter)):
-                    if not self._listener.seed or self._listener.newDir:
-                        await remove(self._up_path)
-                    continue
-                try:
-                    self._total_files += 1
-                    if self._listener.isCancelled:
-                        return
-                    description = await self._prepare_file(file_, dirpath, delete_file)
-                    await self._upload_file(description, file_)
-                    if self._listener.isCancelled:
-                        return
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(
-                            f"Total Attempts: {err.last_attempt.attempt_number}"
+                if not await self._upload_path(dirpath, file_, o_files, ft_delete):
+                    return
+        await self._finish()
+
+    async def upload_queue(self, queue, o_files, ft_delete):
+        """
+        Upload the file paths put in queue until None is received, so uploading
+        can start while the next files are still being processed.
+        """
+        await self._user_settings()
+        res = await self._msg_to_reply()
+        while (path := await queue.get()) is not None:
+            if not res or self._listener.isCancelled:
+                continue
+            dirpath, file_ = path.rsplit("/", 1)
+            if not await self._upload_path(dirpath, file_, o_files, ft_delete):
+                res = False
+        if res:
+            await self._finish()
+
+    async def _upload_path(self, dirpath, file_, o_files, ft_delete, part=None):
+        up_path = ospath.join(dirpath, file_)
+        if part is None:
+            if up_path in o_files:
+                return True
+            if file_.lower().endswith(tuple(self._listener.extensionFilter)):
+                if not self._listener.seed or self._listener.newDir:
+                    await remove(up_path)
+                return True
+            if await self._needs_range_split(up_path):
+                return await self._upload_ranges(dirpath, file_, o_files, ft_delete)
+        self._total_files += 1
+        if self._listener.isCancelled:
+            return False
+        await self._ahead.acquire()
+        if self._listener.isCancelled:
+            self._ahead.release()
+            return False
+        previous = self._last_slot
+        self._last_slot = slot = bot_loop.create_future()
+        job = bot_loop.create_task(
+            self._upload_job(
+                up_path, dirpath, file_, up_path in ft_delete, previous, slot, part
+            )
+        )
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        return True
+
+    async def _upload_job(
+        self, up_path, dirpath, file_, delete_file, previous, slot, part=None
+    ):
+        """
+        Upload one file while others upload too. The file is probed and
+        thumbnailed as soon as it's queued, uploaded once one of LEECH_WORKERS
+        is free, and then waits for the file before it to be sent, so messages
+        keep the order of the files. A part of a range upload is first copied
+        out of its source.
+        """
+        ahead = True
+        thumb = None
+        try:
+            if part is not None:
+                source, offset, length, created = part
+                await sync_to_async(copy_range, source, up_path, offset, length)
+                created.set_result(None)
+            up_path = await self._prepare_file(up_path, file_, dirpath, delete_file)
+            media = None
+            media_link = None
+            if upload_cache.enabled():
+                media_link = await sync_to_async(upload_cache.lookup, "switch", up_path)
+            if media_link:
+                mime_type = await sync_to_async(get_mime_type, up_path)
+            else:
+                thumb, mime_type = await self._file_meta(up_path, file_)
+                if self._listener.isCancelled:
+                    return
+                file_md5 = None
+                async with self._uploads:
+                    if upload_cache.enabled():
+                        # hashed while the upload reads the file, so both reads
+                        # share the page cache instead of reading it twice
+                        media, file_md5 = await gather(
+                            self._upload_media(up_path, file_, thumb, mime_type),
+                            sync_to_async(upload_cache.file_md5, up_path),
                         )
-                        err = err.last_attempt.exception()
-                    LOGGER.error(f"{err}. Path: {self._up_path}")
-                    self._corrupted += 1
-                    if self._listener.isCancelled:
-                        return
-                    continue
-                finally:
-                    if (
-                        not self._listener.isCancelled
-                        and await aiopath.exists(self._up_path)
-                        and (
-                            not self._listener.seed
-                            or self._listener.newDir
-                            or dirpath.endswith("/splited_files_mltb")
-                            or "/copied_mltb/" in self._up_path
+                    else:
+                        media = await self._upload_media(
+                            up_path, file_, thumb, mime_type
                         )
-                    ):
-                        await remove(self._up_path)
-                    continue
+                if self._listener.isCancelled:
+                    return
+                media_link = media.url
+                if file_md5:
+                    key = await sync_to_async(upload_cache.file_key, up_path)
+                    await sync_to_async(
+                        upload_cache.record, "switch", key, media_link, file_md5
+                    )
+            self._ahead.release()
+            ahead = False
+            if previous is not None:
+                await previous
+            if self._listener.isCancelled:
+                return
+            await self._send(file_, mime_type, media, media_link)
+            size = await aiopath.getsize(up_path)
+            self._uploaded_size += size
+            if media is None:
+                LOGGER.info(f"Linked from upload cache: {up_path}")
+                self._processed_bytes += size
+        except Exception as err:
+            if isinstance(err, RetryError):
+                LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+                err = err.last_attempt.exception()
+            LOGGER.error(f"{err}. Path: {up_path}")
+            self._corrupted += 1
+        finally:
+            if ahead:
+                self._ahead.release()
+            if not slot.done():
+                slot.set_result(None)
+            if part is not None and not part[3].done():
+                part[3].set_result(None)
+            if self._thumb is None and thumb is not None and await aiopath.exists(thumb):
+                await remove(thumb)
+            if (
+                not self._listener.isCancelled
+                and await aiopath.exists(up_path)
+                and (
+                    not self._listener.seed
+                    or self._listener.newDir
+                    or dirpath.endswith("/splited_files_mltb")
+                    or "/copied_mltb/" in up_path
+                )
+            ):
+                await remove(up_path)
+
+    async def _needs_range_split(self, path):
+        if self._listener.isCancelled or "/splited_files_mltb/" in path:
+            return False
+        if await aiopath.getsize(path) <= self._listener.splitSize:
+            return False
+        return self._listener.asDoc or not (await get_document_type(path))[0]
+
+    async def _upload_ranges(self, dirpath, file_, o_files, ft_delete):
+        """
+        Upload a file bigger than the split size as byte ranges. Every part is
+        copied out of the original with copy_range by its upload job, once it
+        has a slot, and removed once it's uploaded, so only the parts in flight
+        exist on disk.
+        """
+        source = ospath.join(dirpath, file_)
+        f_size = await aiopath.getsize(source)
+        split_size = self._listener.splitSize
+        if self._listener.equalSplits:
+            parts = -(-f_size // split_size)
+            split_size = (f_size // parts) + (f_size % parts)
+        part_dir = f"{dirpath}/splited_files_mltb"
+        await makedirs(part_dir, exist_ok=True)
+        LOGGER.info(f"Uploading in parts: {source}")
+        created = []
+        for i, offset in enumerate(range(0, f_size, split_size), start=1):
+            created.append(bot_loop.create_future())
+            if not await self._upload_path(
+                part_dir,
+                f"{file_}.{i:03}",
+                o_files,
+                ft_delete,
+                (source, offset, split_size, created[-1]),
+            ):
+                return False
+        # the original is read until the last part is copied out of it
+        await gather(*created)
+        if (
+            not self._listener.seed
+            or self._listener.newDir
+            or source in ft_delete
+            or "/copied_mltb/" in source
+        ):
+            await remove(source)
+        return True
+
+    async def _finish(self):
+        if self._jobs:
+            await gather(*self._jobs)
         if self._listener.isCancelled:
             return
         if self._listener.seed and not self._listener.newDir:
@@ -174,56 +331,74 @@ class SwUploader:
                 "Files Corrupted or unable to upload. Check logs!"
             )
             return
+        if self.pipeline:
+            # measured before the pipeline converted and split the files
+            self._listener.size = self._uploaded_size
         LOGGER.info(f"Leech Completed: {self._listener.name}")
         await self._listener.onUploadComplete(
             None, None, self._total_files, self._corrupted
         )
 
-    @retry(
-        wait=wait_exponential(multiplier=2, min=4, max=8),
-        stop=stop_after_attempt(3),
-        retry=retry_if_exception_type(Exception),
-    )
-    async def _upload_file(self, description, file):
+    async def _file_meta(self, up_path, file_):
         if self._thumb is not None and not await aiopath.exists(self._thumb):
             self._thumb = None
         thumb = self._thumb
-        is_video, is_audio, is_image = await get_document_type(self._up_path)
+        is_video, is_audio, is_image = await get_document_type(up_path)
 
         if not is_image and thumb is None:
-            file_name = ospath.splitext(file)[0]
+            file_name = ospath.splitext(file_)[0]
             thumb_path = f"{self._path}/yt-dlp-thumb/{file_name}.jpg"
             if await aiopath.isfile(thumb_path):
                 thumb = thumb_path
             elif is_audio and not is_video:
-                thumb = await get_audio_thumb(self._up_path)
+                thumb = await get_audio_thumb(up_path)
 
         if is_video and thumb is None:
-            thumb = await create_thumbnail(self._up_path, None)
-        if self._listener.isCancelled:
-            return
+            thumb = await create_thumbnail(up_path, None)
+
+        mime_type = await sync_to_async(get_mime_type, up_path)
+        return thumb, mime_type
 
-        mime_type = await sync_to_async(get_mime_type, self._up_path)
+    async def _private_community(self):
+        if self._private is None:
+            private = bool(self._sent_msg.personal_chat)
+            if self._sent_msg.community_id:
+                community = await bot.get_community(self._sent_msg.community_id)
+                private = not community.is_public
+            self._private = private
+        return self._private
 
-        self._sent_msg = await self._sent_msg.reply_media(
-            document=self._up_path,
-            message=description,
-            description=file,
+    @retry(
+        wait=wait_exponential(multiplier=2, min=4, max=8),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(Exception),
+    )
+    async def _upload_media(self, up_path, file_, thumb, mime_type):
+        return await bot.upload_media(
+            path=up_path,
+            description=file_,
             mime_type=mime_type,
+            media_type=7 if self._listener.asDoc else None,
             thumb=thumb,
-            progress=self._upload_progress,
+            callback=self._upload_progress,
             part_size=100 * 1024 * 1024,
             task_count=30,
-            media_type=7 if self._listener.asDoc else None,
+            private_community=await self._private_community(),
         )
+
+    async def _send(self, file_, mime_type, media, media_link):
         buttons = ButtonMaker()
-        buttons.ubutton("Direct Download Link", self._sent_msg.media_link)
-        button = buttons.build_menu()
-        self._sent_msg = await editMessage(
-            self._sent_msg, f"<copy>{file}</copy>\nMime Type: {mime_type}", button
-        )
-        if self._thumb is None and thumb is not None and await aiopath.exists(thumb):
-            await remove(thumb)
+        buttons.ubutton("Direct Download Link", media_link)
+        text = f"<copy>{file_}</copy>\nMime Type: {mime_type}"
+        if media is None:
+            msg = await sendMessage(self._sent_msg, text, buttons.build_menu())
+            if isinstance(msg, str):
+                raise Exception(msg)
+        else:
+            msg = await self._sent_msg.reply_media(
+                None, media=media, message=text, inline_markup=buttons.build_menu()
+            )
+        self._sent_msg = msg
 
     @property
     def speed(self):
@@ -239,4 +414,13 @@ class SwUploader:
     async def cancel_task(self):
         self._listener.isCancelled = True
         LOGGER.info(f"Cancelling Upload: {self._listener.name}")
+        if self.pipeline:
+            # convert, sample and split jobs of the pipeline run under this status
+            async with subprocess_lock:
+                if (
+                    self._listener.suproc is not None
+                    and self._listener.suproc.returncode is None
+                ):
+                    self._listener.suproc.kill()
+            media_pool.kill(self._listener)
         await self._listener.onUploadError("your upload has been stopped!")
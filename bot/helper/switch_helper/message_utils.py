@@ -3,7 +3,7 @@ from asyncio import sleep
 
 from bot import config_dict, LOGGER, status_dict, task_dict_lock, Intervals, bot, user
 from bot.helper.ext_utils.bot_utils import setInterval
-from bot.helper.ext_utils.status_utils import get_readable_message
+from bot.helper.ext_utils.status_utils import get_readable_message, get_status_snapshot
 
 
 async def sendMessage(message, text, buttons=None):
@@ -79,8 +79,8 @@ async def delete_status():
 
 
 async def update_status_message(sid, force=False):
+    sid = f"{sid}"
     async with task_dict_lock:
-        sid = f"{sid}"
         if not status_dict.get(sid):
             if obj := Intervals["status"].get(sid):
                 obj.cancel()
@@ -89,12 +89,16 @@ async def update_status_message(sid, force=False):
         if not force and time() - status_dict[sid]["time"] < 3:
             return
         status_dict[sid]["time"] = time()
+    snapshot = await get_status_snapshot(force)
+    async with task_dict_lock:
+        if not status_dict.get(sid):
+            return
         page_no = status_dict[sid]["page_no"]
         status = status_dict[sid]["status"]
         is_user = status_dict[sid]["is_user"]
         page_step = status_dict[sid]["page_step"]
-        text, buttons = await get_readable_message(
-            sid, is_user, page_no, status, page_step
+        text, buttons = get_readable_message(
+            snapshot, sid, is_user, page_no, status, page_step
         )
         if text is None:
             del status_dict[sid]
@@ -102,7 +106,8 @@ async def update_status_message(sid, force=False):
                 obj.cancel()
                 del Intervals["status"][sid]
             return
-        if text != status_dict[sid]["message"].message:
+        page = text.removesuffix(snapshot["stats"])
+        if force or page != status_dict[sid].get("page"):
             message = await editMessage(status_dict[sid]["message"], text, buttons)
             if isinstance(message, str):
                 del status_dict[sid]
@@ -115,10 +120,12 @@ async def update_status_message(sid, force=False):
                 return
             status_dict[sid]["message"] = message
             status_dict[sid]["message"].message = text
+            status_dict[sid]["page"] = page
             status_dict[sid]["time"] = time()
 
 
 async def sendStatusMessage(msg, user_id=0):
+    snapshot = await get_status_snapshot(True)
     async with task_dict_lock:
         sid = str(msg.group_id or msg.receiver_id)
         is_user = bool(user_id)
@@ -126,8 +133,8 @@ async def sendStatusMessage(msg, user_id=0):
             page_no = status_dict[sid]["page_no"]
             status = status_dict[sid]["status"]
             page_step = status_dict[sid]["page_step"]
-            text, buttons = await get_readable_message(
-                sid, is_user, page_no, status, page_step
+            text, buttons = get_readable_message(
+                snapshot, sid, is_user, page_no, status, page_step
             )
             if text is None:
                 del status_dict[sid]
@@ -144,9 +151,15 @@ async def sendStatusMessage(msg, user_id=0):
                 )
                 return
             message.message = text
-            status_dict[sid].update({"message": message, "time": time()})
+            status_dict[sid].update(
+                {
+                    "message": message,
+                    "time": time(),
+                    "page": text.removesuffix(snapshot["stats"]),
+                }
+            )
         else:
-            text, buttons = await get_readable_message(sid, is_user)
+            text, buttons = get_readable_message(snapshot, sid, is_user)
             if text is None:
                 return
             message = await sendMessage(msg, text, buttons)
@@ -163,6 +176,7 @@ async def sendStatusMessage(msg, user_id=0):
                 "page_step": 1,
                 "status": "All",
                 "is_user": is_user,
+                "page": text.removesuffix(snapshot["stats"]),
             }
     if not Intervals["status"].get(sid) and not is_user:
         Intervals["status"][sid] = setInterval(
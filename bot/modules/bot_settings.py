@@ -73,6 +73,10 @@ default_values = {
     "SEARCH_LIMIT": 0,
     "UPSTREAM_BRANCH": "master",
     "DEFAULT_UPLOAD": "gd",
+    "GDRIVE_WORKERS": 4,
+    "LEECH_WORKERS": 1,
+    "LIST_CACHE_TTL": 120,
+    "COMPRESS_FORMAT": "7z",
 }
 
 
@@ -255,7 +259,13 @@ async def edit_variable(ctx, pre_message, key):
         await DbManager().update_config({key: value})
     if key in ["SEARCH_PLUGINS", "SEARCH_API_LINK"]:
         await initiate_search_tools()
-    elif key in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+    elif key in [
+        "QUEUE_ALL",
+        "QUEUE_DOWNLOAD",
+        "QUEUE_UPLOAD",
+        "QUEUE_ENGINES",
+        "QUEUE_BANDWIDTH",
+    ]:
         await start_from_queued()
     elif key in [
         "RCLONE_SERVE_URL",
@@ -498,7 +508,13 @@ async def edit_bot_settings(ctx):
             await DbManager().update_config({data[2]: value})
         if data[2] in ["SEARCH_PLUGINS", "SEARCH_API_LINK"]:
             await initiate_search_tools()
-        elif data[2] in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+        elif data[2] in [
+            "QUEUE_ALL",
+            "QUEUE_DOWNLOAD",
+            "QUEUE_UPLOAD",
+            "QUEUE_ENGINES",
+            "QUEUE_BANDWIDTH",
+        ]:
             await start_from_queued()
         elif data[2] in [
             "RCLONE_SERVE_URL",
@@ -690,6 +706,9 @@ async def load_config():
     if len(RCLONE_FLAGS) == 0:
         RCLONE_FLAGS = ""
 
+    RCLONE_DAEMON = environ.get("RCLONE_DAEMON", "")
+    RCLONE_DAEMON = RCLONE_DAEMON.lower() == "true"
+
     AUTHORIZED_CHATS = environ.get("AUTHORIZED_CHATS", "")
     if len(AUTHORIZED_CHATS) != 0:
         aid = AUTHORIZED_CHATS.split()
@@ -769,6 +788,9 @@ async def load_config():
     STATUS_LIMIT = environ.get("STATUS_LIMIT", "")
     STATUS_LIMIT = 4 if len(STATUS_LIMIT) == 0 else int(STATUS_LIMIT)
 
+    MEDIA_THREADS = environ.get("MEDIA_THREADS", "")
+    MEDIA_THREADS = "" if len(MEDIA_THREADS) == 0 else int(MEDIA_THREADS)
+
     RSS_CHAT = environ.get("RSS_CHAT", "")
     RSS_CHAT = "" if len(RSS_CHAT) == 0 else RSS_CHAT
 
@@ -821,15 +843,32 @@ async def load_config():
     QUEUE_UPLOAD = environ.get("QUEUE_UPLOAD", "")
     QUEUE_UPLOAD = "" if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+    QUEUE_ENGINES = environ.get("QUEUE_ENGINES", "")
+
+    QUEUE_BANDWIDTH = environ.get("QUEUE_BANDWIDTH", "")
+    QUEUE_BANDWIDTH = "" if len(QUEUE_BANDWIDTH) == 0 else float(QUEUE_BANDWIDTH)
+
     STOP_DUPLICATE = environ.get("STOP_DUPLICATE", "")
     STOP_DUPLICATE = STOP_DUPLICATE.lower() == "true"
 
     IS_TEAM_DRIVE = environ.get("IS_TEAM_DRIVE", "")
     IS_TEAM_DRIVE = IS_TEAM_DRIVE.lower() == "true"
 
+    GDRIVE_WORKERS = environ.get("GDRIVE_WORKERS", "")
+    GDRIVE_WORKERS = 4 if len(GDRIVE_WORKERS) == 0 else int(GDRIVE_WORKERS)
+
+    DRIVE_INDEX_TTL = environ.get("DRIVE_INDEX_TTL", "")
+    DRIVE_INDEX_TTL = "" if len(DRIVE_INDEX_TTL) == 0 else int(DRIVE_INDEX_TTL)
+
+    LIST_CACHE_TTL = environ.get("LIST_CACHE_TTL", "")
+    LIST_CACHE_TTL = 120 if len(LIST_CACHE_TTL) == 0 else int(LIST_CACHE_TTL)
+
     USE_SERVICE_ACCOUNTS = environ.get("USE_SERVICE_ACCOUNTS", "")
     USE_SERVICE_ACCOUNTS = USE_SERVICE_ACCOUNTS.lower() == "true"
 
+    UPLOAD_CACHE = environ.get("UPLOAD_CACHE", "")
+    UPLOAD_CACHE = UPLOAD_CACHE.lower() == "true"
+
     WEB_PINCODE = environ.get("WEB_PINCODE", "")
     WEB_PINCODE = WEB_PINCODE.lower() == "true"
 
@@ -839,6 +878,16 @@ async def load_config():
     EQUAL_SPLITS = environ.get("EQUAL_SPLITS", "")
     EQUAL_SPLITS = EQUAL_SPLITS.lower() == "true"
 
+    COMPRESS_FORMAT = environ.get("COMPRESS_FORMAT", "").lower()
+    if COMPRESS_FORMAT not in ["zstd", "lz4"]:
+        COMPRESS_FORMAT = "7z"
+
+    LEECH_PIPELINE = environ.get("LEECH_PIPELINE", "")
+    LEECH_PIPELINE = LEECH_PIPELINE.lower() == "true"
+
+    LEECH_WORKERS = environ.get("LEECH_WORKERS", "")
+    LEECH_WORKERS = 1 if len(LEECH_WORKERS) == 0 else int(LEECH_WORKERS)
+
     BASE_URL_PORT = environ.get("BASE_URL_PORT", "")
     BASE_URL_PORT = 80 if len(BASE_URL_PORT) == 0 else int(BASE_URL_PORT)
 
@@ -933,22 +982,29 @@ async def load_config():
             "BASE_URL_PORT": BASE_URL_PORT,
             "BOT_TOKEN": BOT_TOKEN,
             "CMD_SUFFIX": CMD_SUFFIX,
+            "COMPRESS_FORMAT": COMPRESS_FORMAT,
             "DATABASE_URL": DATABASE_URL,
             "DEFAULT_UPLOAD": DEFAULT_UPLOAD,
             "DELETE_LINKS": DELETE_LINKS,
             "DIRECT_LIMIT": DIRECT_LIMIT,
             "DISABLE_SEED": DISABLE_SEED,
             "DOWNLOAD_DIR": DOWNLOAD_DIR,
+            "DRIVE_INDEX_TTL": DRIVE_INDEX_TTL,
             "EQUAL_SPLITS": EQUAL_SPLITS,
             "EXTENSION_FILTER": EXTENSION_FILTER,
             "FILELION_API": FILELION_API,
             "GDRIVE_ID": GDRIVE_ID,
+            "GDRIVE_WORKERS": GDRIVE_WORKERS,
             "GDRIVE_LIMIT": GDRIVE_LIMIT,
             "INDEX_URL": INDEX_URL,
             "IS_TEAM_DRIVE": IS_TEAM_DRIVE,
             "LEECH_DUMP_CHAT": LEECH_DUMP_CHAT,
             "LEECH_FILENAME_PREFIX": LEECH_FILENAME_PREFIX,
+            "LEECH_PIPELINE": LEECH_PIPELINE,
             "LEECH_SPLIT_SIZE": LEECH_SPLIT_SIZE,
+            "LEECH_WORKERS": LEECH_WORKERS,
+            "LIST_CACHE_TTL": LIST_CACHE_TTL,
+            "MEDIA_THREADS": MEDIA_THREADS,
             "MEGA_EMAIL": MEGA_EMAIL,
             "MEGA_LIMIT": MEGA_LIMIT,
             "MEGA_PASSWORD": MEGA_PASSWORD,
@@ -957,6 +1013,9 @@ async def load_config():
             "QUEUE_ALL": QUEUE_ALL,
             "QUEUE_DOWNLOAD": QUEUE_DOWNLOAD,
             "QUEUE_UPLOAD": QUEUE_UPLOAD,
+            "QUEUE_ENGINES": QUEUE_ENGINES,
+            "QUEUE_BANDWIDTH": QUEUE_BANDWIDTH,
+            "RCLONE_DAEMON": RCLONE_DAEMON,
             "RCLONE_FLAGS": RCLONE_FLAGS,
             "RCLONE_PATH": RCLONE_PATH,
             "RCLONE_SERVE_URL": RCLONE_SERVE_URL,
@@ -979,6 +1038,7 @@ async def load_config():
             "TG_SESSION_STRING": TG_SESSION_STRING,
             "TORRENT_LIMIT": TORRENT_LIMIT,
             "TORRENT_TIMEOUT": TORRENT_TIMEOUT,
+            "UPLOAD_CACHE": UPLOAD_CACHE,
             "UPSTREAM_REPO": UPSTREAM_REPO,
             "UPSTREAM_BRANCH": UPSTREAM_BRANCH,
             "USE_SERVICE_ACCOUNTS": USE_SERVICE_ACCOUNTS,
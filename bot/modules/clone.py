@@ -19,6 +19,7 @@ from bot.helper.ext_utils.links_utils import (
     is_rclone_path,
     is_gdrive_id,
 )
+from bot.helper.ext_utils.list_cache import list_cache
 from bot.helper.ext_utils.task_manager import stop_duplicate_check
 from bot.helper.listeners.task_listener import TaskListener
 from bot.helper.mirror_leech_utils.download_utils.direct_link_generator import (
@@ -163,6 +164,7 @@ class Clone(TaskListener):
                 await deleteMessage(msg)
             if not flink:
                 return
+            list_cache.invalidate("gdrive", self.upDest)
             await self.onUploadComplete(flink, files, folders, mime_type, dir_id=dir_id)
             LOGGER.info(f"Cloning Done: {self.name}")
         elif is_rclone_path(self.link):
@@ -225,6 +227,8 @@ class Clone(TaskListener):
             )
             if not destination:
                 return
+            dst_remote = self.upDest.split(":", 1)[0]
+            list_cache.invalidate("rclone", f"{dst_remote}:", config_path, prefix=True)
             LOGGER.info(f"Cloning Done: {self.name}")
             cmd1 = [
                 "rclone",
@@ -6,9 +6,6 @@ from bot import (
     task_dict_lock,
     OWNER_ID,
     user_data,
-    queued_up,
-    queued_dl,
-    queue_dict_lock,
 )
 from bot.helper.ext_utils.status_utils import getTaskByGid
 from bot.helper.switch_helper.bot_commands import BotCommands
@@ -51,26 +48,21 @@ async def remove_from_queue(ctx):
     obj = task.task()
     listener = obj.listener
     msg = ""
-    async with queue_dict_lock:
-        if status == "fu":
-            listener.forceUpload = True
-            if listener.mid in queued_up:
-                await start_up_from_queued(listener.mid)
-                msg = "Task have been force started to upload!"
-        elif status == "fd":
-            listener.forceDownload = True
-            if listener.mid in queued_dl:
-                await start_dl_from_queued(listener.mid)
-                msg = "Task have been force started to download only!"
-        else:
-            listener.forceDownload = True
-            listener.forceUpload = True
-            if listener.mid in queued_up:
-                await start_up_from_queued(listener.mid)
-                msg = "Task have been force started to upload!"
-            elif listener.mid in queued_dl:
-                await start_dl_from_queued(listener.mid)
-                msg = "Task have been force started to download and upload will start once download finish!"
+    if status == "fu":
+        listener.forceUpload = True
+        if await start_up_from_queued(listener.mid):
+            msg = "Task have been force started to upload!"
+    elif status == "fd":
+        listener.forceDownload = True
+        if await start_dl_from_queued(listener.mid):
+            msg = "Task have been force started to download only!"
+    else:
+        listener.forceDownload = True
+        listener.forceUpload = True
+        if await start_up_from_queued(listener.mid):
+            msg = "Task have been force started to upload!"
+        elif await start_dl_from_queued(listener.mid):
+            msg = "Task have been force started to download and upload will start once download finish!"
     if msg:
         await sendMessage(message, msg)
 
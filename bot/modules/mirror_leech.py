@@ -11,6 +11,7 @@ from bot.helper.ext_utils.bot_utils import (
     arg_parser,
     COMMAND_USAGE,
 )
+from bot.helper.ext_utils.download_coalescer import download_coalescer
 from bot.helper.ext_utils.exceptions import DirectDownloadLinkException, TgLinkException
 from bot.helper.ext_utils.links_utils import (
     is_url,
@@ -268,6 +269,8 @@ class Mirror(TaskListener):
             self.removeFromSameDir()
             return
 
+        coalesce_key = download_coalescer.key_of(self)
+
         if (
             not self.isQbit
             and not is_magnet(self.link)
@@ -300,7 +303,22 @@ class Mirror(TaskListener):
             await TelegramDownloadHelper(self).add_download(tg_msg, f"{path}/")
         elif file_:
             await SwitchDownloadHelper(self).add_download(reply_to, f"{path}/")
-        elif isinstance(self.link, dict):
+        else:
+            ussr = args["-au"]
+            pssw = args["-ap"]
+            if ussr or pssw:
+                auth = f"{ussr}:{pssw}"
+                headers += (
+                    f" authorization: Basic {b64encode(auth.encode()).decode('ascii')}"
+                )
+            await download_coalescer.run(
+                self,
+                None if headers else coalesce_key,
+                lambda: self._addDownload(path, headers, ratio, seed_time),
+            )
+
+    async def _addDownload(self, path, headers, ratio, seed_time):
+        if isinstance(self.link, dict):
             await add_direct_download(self, path)
         elif self.isQbit:
             await add_qb_torrent(self, path, ratio, seed_time)
@@ -311,13 +329,6 @@ class Mirror(TaskListener):
         elif is_mega_link(self.link):
             await add_mega_download(self, f"{path}/")
         else:
-            ussr = args["-au"]
-            pssw = args["-ap"]
-            if ussr or pssw:
-                auth = f"{ussr}:{pssw}"
-                headers += (
-                    f" authorization: Basic {b64encode(auth.encode()).decode('ascii')}"
-                )
             await add_aria2c_download(self, path, headers, ratio, seed_time)
 
 
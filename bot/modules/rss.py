@@ -1,8 +1,6 @@
-from httpx import AsyncClient
 from apscheduler.triggers.interval import IntervalTrigger
 from asyncio import Lock, sleep
 from datetime import datetime, timedelta
-from feedparser import parse as feedparse
 from functools import partial
 from io import BytesIO
 from swibots import (
@@ -19,6 +17,14 @@ from bot.helper.ext_utils.bot_utils import arg_parser
 from bot.helper.ext_utils.db_handler import DbManager
 from bot.helper.ext_utils.exceptions import RssShutdownException
 from bot.helper.ext_utils.help_messages import RSS_HELP_MESSAGE
+from bot.helper.ext_utils.rss_poller import (
+    rss_poller,
+    entry_hashes,
+    entry_link,
+    seen_history,
+    POLL_TICK,
+)
+from bot.helper.ext_utils.status_utils import get_readable_time
 from bot.helper.switch_helper.bot_commands import BotCommands
 from bot.helper.switch_helper.button_build import ButtonMaker
 from bot.helper.switch_helper.filters import CustomFilters
@@ -103,14 +109,23 @@ async def rssSub(ctx, pre_event):
         inf_lists = []
         exf_lists = []
         if len(args) > 2:
-            arg_base = {"-c": None, "-inf": None, "-exf": None, "-stv": None}
+            arg_base = {
+                "-c": None,
+                "-inf": None,
+                "-exf": None,
+                "-stv": None,
+                "-int": None,
+            }
             arg_parser(args[2:], arg_base)
             cmd = arg_base["-c"]
             inf = arg_base["-inf"]
             exf = arg_base["-exf"]
             stv = arg_base["-stv"]
+            interval = arg_base["-int"]
             if stv is not None:
                 stv = stv.lower() == "true"
+            if interval is not None:
+                interval = int(interval) if interval.isdigit() else None
             if inf is not None:
                 filters_list = inf.split("|")
                 for x in filters_list:
@@ -126,11 +141,9 @@ async def rssSub(ctx, pre_event):
             exf = None
             cmd = None
             stv = False
+            interval = None
         try:
-            async with AsyncClient(verify=False) as client:
-                res = await client.get(feed_link)
-            html = res.text
-            rss_d = feedparse(html)
+            rss_d = await rss_poller.fetch(feed_link)
             last_title = rss_d.entries[0]["title"]
             msg += "<b>Subscribed!</b>"
             msg += f"\n<b>Title: </b><copy>{title}</copy>\n<b>Feed Url: </b>{feed_link}"
@@ -138,13 +151,13 @@ async def rssSub(ctx, pre_event):
             msg += (
                 f"\nName: <copy>{last_title.replace('>', '').replace('<', '')}</copy>"
             )
-            try:
-                last_link = rss_d.entries[0]["links"][1]["href"]
-            except IndexError:
-                last_link = rss_d.entries[0]["link"]
+            last_link = entry_link(rss_d.entries[0])
+            seen = seen_history(entry_hashes(rss_d.entries), [])
             msg += f"\nLink: <copy>{last_link}</copy>"
             msg += f"\n<b>Command: </b><copy>{cmd}</copy>"
             msg += f"\n<b>Filters:-</b>\ninf: <copy>{inf}</copy>\nexf: <copy>{exf}</copy>\n<b>sensitive: </b>{stv}"
+            if interval:
+                msg += f"\n<b>Interval: </b>{get_readable_time(interval)}"
             async with rss_dict_lock:
                 if rss_dict.get(user_id, False):
                     rss_dict[user_id][title] = {
@@ -156,6 +169,8 @@ async def rssSub(ctx, pre_event):
                         "paused": False,
                         "command": cmd,
                         "sensitive": stv,
+                        "interval": interval,
+                        "seen": seen,
                         "tag": tag,
                     }
                 else:
@@ -169,11 +184,13 @@ async def rssSub(ctx, pre_event):
                             "paused": False,
                             "command": cmd,
                             "sensitive": stv,
+                            "interval": interval,
+                            "seen": seen,
                             "tag": tag,
                         }
                     }
             LOGGER.info(
-                f"Rss Feed Added: id: {user_id} - title: {title} - link: {feed_link} - c: {cmd} - inf: {inf} - exf: {exf} - stv {stv}"
+                f"Rss Feed Added: id: {user_id} - title: {title} - link: {feed_link} - c: {cmd} - inf: {inf} - exf: {exf} - stv {stv} - int: {interval}"
             )
         except (IndexError, AttributeError) as e:
             emsg = f"The link: {feed_link} doesn't seem to be a RSS feed or it's region-blocked!"
@@ -229,6 +246,7 @@ async def rssUpdate(ctx, pre_event, state):
             updated.append(title)
             if state == "unsubscribe":
                 del rss_dict[user_id][title]
+                rss_poller.forget((user_id, title))
             elif state == "pause":
                 rss_dict[user_id][title]["paused"] = True
             elif state == "resume":
@@ -278,6 +296,7 @@ async def rssList(ctx, start, all_users=False):
                     list_feed += f"<b>Inf:</b> <copy>{data['inf']}</copy>\n"
                     list_feed += f"<b>Exf:</b> <copy>{data['exf']}</copy>\n"
                     list_feed += f"<b>Sensitive:</b> <copy>{data.get('sensitive', False)}</copy>\n"
+                    list_feed += f"<b>Interval:</b> <copy>{get_readable_time(rss_poller.interval(data))}</copy>\n"
                     list_feed += f"<b>Paused:</b> <copy>{data['paused']}</copy>\n"
                     list_feed += f"<b>User:</b> {data['tag'].replace('@', '', 1)}"
                     index += 1
@@ -295,6 +314,7 @@ async def rssList(ctx, start, all_users=False):
                 list_feed += (
                     f"<b>Sensitive:</b> <copy>{data.get('sensitive', False)}</copy>\n"
                 )
+                list_feed += f"<b>Interval:</b> <copy>{get_readable_time(rss_poller.interval(data))}</copy>\n"
                 list_feed += f"<b>Paused:</b> <copy>{data['paused']}</copy>"
     buttons.ibutton("Back", f"rss back {user_id}")
     buttons.ibutton("Close", f"rss close {user_id}")
@@ -330,10 +350,7 @@ async def rssGet(ctx, pre_event):
                 msg = await sendMessage(
                     message, f"Getting the last <b>{count}</b> item(s) from {title}"
                 )
-                async with AsyncClient(verify=False) as client:
-                    res = await client.get(data["link"])
-                html = res.text
-                rss_d = feedparse(html)
+                rss_d = await rss_poller.fetch(data["link"])
                 item_info = ""
                 for item_num in range(count):
                     try:
@@ -389,13 +406,25 @@ async def rssEdit(ctx, pre_event):
         updated = True
         inf_lists = []
         exf_lists = []
-        arg_base = {"-c": None, "-inf": None, "-exf": None, "-stv": None}
+        arg_base = {
+            "-c": None,
+            "-inf": None,
+            "-exf": None,
+            "-stv": None,
+            "-int": None,
+        }
         arg_parser(args[1:], arg_base)
         cmd = arg_base["-c"]
         inf = arg_base["-inf"]
         exf = arg_base["-exf"]
         stv = arg_base["-stv"]
+        interval = arg_base["-int"]
+        # recompile filters and poll with the new options
+        rss_poller.forget((user_id, title))
         async with rss_dict_lock:
+            if interval is not None:
+                interval = int(interval) if interval.isdigit() else None
+                rss_dict[user_id][title]["interval"] = interval
             if stv is not None:
                 stv = stv.lower() == "true"
                 rss_dict[user_id][title]["sensitive"] = stv
@@ -639,6 +668,64 @@ Timeout: 60 sec. Argument -c for command and arguments
             await ctx.event.answer(text="Already Running!", show_alert=True)
 
 
+async def rssCheck(user, title, data):
+    key = (user, title)
+    interval = rss_poller.interval(data)
+    try:
+        if (rss_d := await rss_poller.fetch(data["link"], key)) is None:
+            rss_poller.done(key, interval)
+            return
+        last_link = entry_link(rss_d.entries[0])
+        last_title = rss_d.entries[0]["title"]
+        entries, seen = rss_poller.new_entries(data, rss_d.entries)
+        if not entries and "seen" in data:
+            rss_poller.done(key, interval)
+            return
+        if data.get("seen") and len(entries) == len(rss_d.entries):
+            LOGGER.warning(
+                f"No seen items left in this feed: {title}. Maybe you need to use less interval to not miss some torrents"
+            )
+        rss_filter = rss_poller.matcher(key, data)
+        for entry in entries:
+            if not scheduler.running:
+                raise RssShutdownException("Rss Monitor Stopped!")
+            item_title = entry["title"]
+            if not rss_filter.match(item_title):
+                continue
+            url = entry_link(entry)
+            if command := data["command"]:
+                cmd = command.split(maxsplit=1)
+                cmd.insert(1, url)
+                feed_msg = " ".join(cmd).lstrip("/")
+                if "|" in config_dict["RSS_CHAT"]:
+                    if not feed_msg.startswith("@"):
+                        feed_msg = f"@{bot_name}/{feed_msg}"
+                else:
+                    feed_msg = f"/{feed_msg}"
+            else:
+                feed_msg = f"<b>Name: </b><copy>{item_title.replace('>', '').replace('<', '')}</copy>\n\n"
+                feed_msg += f"<b>Link: </b><copy>{url}</copy>"
+            feed_msg += f"\n<b>Tag: </b><copy>{data['tag']}</copy> <copy>{user}</copy>"
+            await sendRss(feed_msg)
+        rss_poller.done(key, interval)
+        async with rss_dict_lock:
+            if user not in rss_dict or not rss_dict[user].get(title, False):
+                return
+            rss_dict[user][title].update(
+                {"last_feed": last_link, "last_title": last_title, "seen": seen}
+            )
+        await DbManager().rss_update(user)
+        LOGGER.info(f"Feed Name: {title}")
+        LOGGER.info(f"Last item: {last_link}")
+    except RssShutdownException as ex:
+        LOGGER.info(ex)
+    except Exception as e:
+        delay = rss_poller.failed(key, interval)
+        LOGGER.error(
+            f"{e} - Feed Name: {title} - Feed Link: {data['link']} - Retry in: {get_readable_time(delay)}"
+        )
+
+
 async def rssMonitor():
     if not config_dict["RSS_CHAT"]:
         LOGGER.warning("RSS_CHAT not added! Shutting down rss scheduler...")
@@ -647,120 +734,25 @@ async def rssMonitor():
     if len(rss_dict) == 0:
         scheduler.pause()
         return
-    all_paused = True
-    for user, items in list(rss_dict.items()):
-        for title, data in items.items():
-            try:
-                if data["paused"]:
-                    continue
-                tries = 0
-                while True:
-                    try:
-                        async with AsyncClient(verify=False) as client:
-                            res = await client.get(data["link"])
-                        html = res.text
-                        break
-                    except:
-                        tries += 1
-                        if tries > 3:
-                            raise
-                        continue
-                rss_d = feedparse(html)
-                try:
-                    last_link = rss_d.entries[0]["links"][1]["href"]
-                except IndexError:
-                    last_link = rss_d.entries[0]["link"]
-                finally:
-                    all_paused = False
-                last_title = rss_d.entries[0]["title"]
-                if data["last_feed"] == last_link or data["last_title"] == last_title:
-                    continue
-                feed_count = 0
-                while True:
-                    try:
-                        await sleep(10)
-                    except:
-                        raise RssShutdownException("Rss Monitor Stopped!")
-                    try:
-                        item_title = rss_d.entries[feed_count]["title"]
-                        try:
-                            url = rss_d.entries[feed_count]["links"][1]["href"]
-                        except IndexError:
-                            url = rss_d.entries[feed_count]["link"]
-                        if data["last_feed"] == url or data["last_title"] == item_title:
-                            break
-                    except IndexError:
-                        LOGGER.warning(
-                            f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
-                        )
-                        break
-                    parse = True
-                    for flist in data["inf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and all(x.lower() not in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and all(x not in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    for flist in data["exf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and any(x.lower() in item_title.lower() for x in flist)
-                        ) or (
-                            data.get("sensitive", False)
-                            and any(x in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    if command := data["command"]:
-                        cmd = command.split(maxsplit=1)
-                        cmd.insert(1, url)
-                        feed_msg = " ".join(cmd).lstrip("/")
-                        if "|" in config_dict["RSS_CHAT"]:
-                            if not feed_msg.startswith("@"):
-                                feed_msg = f"@{bot_name}/{feed_msg}"
-                        else:
-                            feed_msg = f"/{feed_msg}"
-                    else:
-                        feed_msg = f"<b>Name: </b><copy>{item_title.replace('>', '').replace('<', '')}</copy>\n\n"
-                        feed_msg += f"<b>Link: </b><copy>{url}</copy>"
-                    feed_msg += (
-                        f"\n<b>Tag: </b><copy>{data['tag']}</copy> <copy>{user}</copy>"
-                    )
-                    await sendRss(feed_msg)
-                    feed_count += 1
-                async with rss_dict_lock:
-                    if user not in rss_dict or not rss_dict[user].get(title, False):
-                        continue
-                    rss_dict[user][title].update(
-                        {"last_feed": last_link, "last_title": last_title}
-                    )
-                await DbManager().rss_update(user)
-                LOGGER.info(f"Feed Name: {title}")
-                LOGGER.info(f"Last item: {last_link}")
-            except RssShutdownException as ex:
-                LOGGER.info(ex)
-                break
-            except Exception as e:
-                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
-                continue
-    if all_paused:
+    feeds = [
+        (user, title, data)
+        for user, items in list(rss_dict.items())
+        for title, data in list(items.items())
+    ]
+    rss_poller.prune((user, title) for user, title, _ in feeds)
+    feeds = [feed for feed in feeds if not feed[2]["paused"]]
+    if not feeds:
         scheduler.pause()
+        return
+    for user, title, data in feeds:
+        if rss_poller.due((user, title)):
+            rss_poller.poll((user, title), rssCheck, user, title, data)
 
 
 def addJob():
     scheduler.add_job(
         rssMonitor,
-        trigger=IntervalTrigger(seconds=config_dict["RSS_DELAY"]),
+        trigger=IntervalTrigger(seconds=min(config_dict["RSS_DELAY"], POLL_TICK)),
         id="0",
         name="RSS",
         misfire_grace_time=15,
@@ -11,9 +11,9 @@ from bot import (
     Intervals,
     bot,
 )
-from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
+    get_status_snapshot,
     get_readable_file_size,
     get_readable_time,
     speed_string_to_bytes,
@@ -97,41 +97,41 @@ async def status_pages(ctx):
         dl_speed = 0
         up_speed = 0
         seed_speed = 0
-        async with task_dict_lock:
-            for download in task_dict.values():
-                match await sync_to_async(download.status):
-                    case MirrorStatus.STATUS_DOWNLOADING:
-                        tasks["Download"] += 1
-                        dl_speed += speed_string_to_bytes(download.speed())
-                    case MirrorStatus.STATUS_UPLOADING:
-                        tasks["Upload"] += 1
-                        up_speed += speed_string_to_bytes(download.speed())
-                    case MirrorStatus.STATUS_SEEDING:
-                        tasks["Seed"] += 1
-                        seed_speed += speed_string_to_bytes(download.seed_speed())
-                    case MirrorStatus.STATUS_ARCHIVING:
-                        tasks["Archive"] += 1
-                    case MirrorStatus.STATUS_EXTRACTING:
-                        tasks["Extract"] += 1
-                    case MirrorStatus.STATUS_SPLITTING:
-                        tasks["Split"] += 1
-                    case MirrorStatus.STATUS_QUEUEDL:
-                        tasks["QueueDl"] += 1
-                    case MirrorStatus.STATUS_QUEUEUP:
-                        tasks["QueueUp"] += 1
-                    case MirrorStatus.STATUS_CLONING:
-                        tasks["Clone"] += 1
-                    case MirrorStatus.STATUS_CHECKING:
-                        tasks["CheckUp"] += 1
-                    case MirrorStatus.STATUS_PAUSED:
-                        tasks["Pause"] += 1
-                    case MirrorStatus.STATUS_SAMVID:
-                        tasks["SamVid"] += 1
-                    case MirrorStatus.STATUS_CONVERTING:
-                        tasks["ConvertMedia"] += 1
-                    case _:
-                        tasks["Download"] += 1
-                        dl_speed += speed_string_to_bytes(download.speed())
+        snapshot = await get_status_snapshot()
+        for download in snapshot["tasks"]:
+            match download["status"]:
+                case MirrorStatus.STATUS_DOWNLOADING:
+                    tasks["Download"] += 1
+                    dl_speed += speed_string_to_bytes(download["speed"])
+                case MirrorStatus.STATUS_UPLOADING:
+                    tasks["Upload"] += 1
+                    up_speed += speed_string_to_bytes(download["speed"])
+                case MirrorStatus.STATUS_SEEDING:
+                    tasks["Seed"] += 1
+                    seed_speed += speed_string_to_bytes(download["seed_speed"])
+                case MirrorStatus.STATUS_ARCHIVING:
+                    tasks["Archive"] += 1
+                case MirrorStatus.STATUS_EXTRACTING:
+                    tasks["Extract"] += 1
+                case MirrorStatus.STATUS_SPLITTING:
+                    tasks["Split"] += 1
+                case MirrorStatus.STATUS_QUEUEDL:
+                    tasks["QueueDl"] += 1
+                case MirrorStatus.STATUS_QUEUEUP:
+                    tasks["QueueUp"] += 1
+                case MirrorStatus.STATUS_CLONING:
+                    tasks["Clone"] += 1
+                case MirrorStatus.STATUS_CHECKING:
+                    tasks["CheckUp"] += 1
+                case MirrorStatus.STATUS_PAUSED:
+                    tasks["Pause"] += 1
+                case MirrorStatus.STATUS_SAMVID:
+                    tasks["SamVid"] += 1
+                case MirrorStatus.STATUS_CONVERTING:
+                    tasks["ConvertMedia"] += 1
+                case _:
+                    tasks["Download"] += 1
+                    dl_speed += speed_string_to_bytes(download["speed"])
 
         msg = f"""<b>DL:</b> {tasks['Download']} | <b>UP:</b> {tasks['Upload']} | <b>SD:</b> {tasks['Seed']} | <b>AR:</b> {tasks['Archive']}
 <b>EX:</b> {tasks['Extract']} | <b>SP:</b> {tasks['Split']} | <b>QD:</b> {tasks['QueueDl']} | <b>QU:</b> {tasks['QueueUp']}
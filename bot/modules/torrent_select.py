@@ -4,6 +4,7 @@ from swibots import CommandHandler, CallbackQueryHandler, regexp
 from bot import (
     bot,
     aria2,
+    qbittorrent_client,
     task_dict,
     task_dict_lock,
     OWNER_ID,
@@ -12,6 +13,7 @@ from bot import (
     config_dict,
 )
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons, sync_to_async
+from bot.helper.ext_utils.qbit_sync import qb_sync
 from bot.helper.ext_utils.status_utils import getTaskByGid, MirrorStatus
 from bot.helper.switch_helper.bot_commands import BotCommands
 from bot.helper.switch_helper.filters import CustomFilters
@@ -76,7 +78,7 @@ async def select(ctx):
         if task.listener.isQbit:
             id_ = task.hash()
             if not task.queued:
-                await sync_to_async(task.client.torrents_pause, torrent_hashes=id_)
+                await sync_to_async(qbittorrent_client.torrents_pause, torrent_hashes=id_)
         else:
             id_ = task.gid()
             if not task.queued:
@@ -113,11 +115,16 @@ async def get_confirm(ctx):
         if hasattr(task, "seeding"):
             id_ = data[3]
             if len(id_) > 20:
-                tor_info = (
-                    await sync_to_async(task.client.torrents_info, torrent_hash=id_)
-                )[0]
+                if (tor_info := qb_sync.get_by_hash(id_)) is None:
+                    tor_info = (
+                        await sync_to_async(
+                            qbittorrent_client.torrents_info, torrent_hash=id_
+                        )
+                    )[0]
                 path = tor_info.content_path.rsplit("/", 1)[0]
-                res = await sync_to_async(task.client.torrents_files, torrent_hash=id_)
+                res = await sync_to_async(
+                    qbittorrent_client.torrents_files, torrent_hash=id_
+                )
                 for f in res:
                     if f.priority == 0:
                         f_paths = [f"{path}/{f.name}", f"{path}/{f.name}.!qB"]
@@ -128,7 +135,9 @@ async def get_confirm(ctx):
                                 except:
                                     pass
                 if not task.queued:
-                    await sync_to_async(task.client.torrents_resume, torrent_hashes=id_)
+                    await sync_to_async(
+                        qbittorrent_client.torrents_resume, torrent_hashes=id_
+                    )
             else:
                 res = await sync_to_async(aria2.client.get_files, id_)
                 for f in res: